@@ -0,0 +1,161 @@
+"""Model routing — pick a model tier per request and cache one compiled graph per tier.
+
+Two tiers per provider (see config.settings):
+
+  * `fast` (`google_fast_model` / `groq_fast_model`) for single lookups such as
+    "convert 200 EUR to JPY" or "weather in Lisbon",
+  * `strong` (`google_model` / `groq_model`) for itineraries, multi-part questions
+    and anything the classifier doesn't recognise.
+
+The classifier is a few local regexes, so routing adds microseconds, not an LLM
+call. A strong run that wasn't routed there for an itinerary may drop to the fast
+model inside the ReAct loop. That happens once all of the turn's tool calls are
+plain lookups, because the rest of the turn only formats their results (see
+`step_tier`).
+"""
+
+import re
+import threading
+from typing import Dict, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from pydantic import BaseModel
+
+from config.settings import Settings, get_settings, on_reload
+from logger.logging import get_logger
+from utils.metrics import observe_route
+from utils.model_loader import PROVIDER_MODULES
+
+logger = get_logger("ai_trip_planner.router")
+
+FAST = "fast"
+STRONG = "strong"
+TIERS = (FAST, STRONG)
+
+# Tools whose results the model only has to relay; planning tools are left out
+LOOKUP_TOOLS = frozenset({
+    "get_weather_forecast", "convert_currency", "get_exchange_rate", "convert_currency_batch",
+    "search_places", "search_hotels", "estimate_daily_food_cost",
+})
+
+_PLAN = re.compile(
+    r"\b(plan|planning|itinerary|trip|vacation|holiday|getaway|honeymoon|tour|schedule|"
+    r"day[- ]by[- ]day|things to do|what to do|where to go)\b"
+    r"|\b\d+\s*-?\s*(day|night|week)s?\b"
+)
+_INTENTS = {
+    "currency": re.compile(
+        r"\b(convert|conversion|exchange rate|currency)\b"
+        r"|\b\d[\d,.]*\s*[a-z]{3}\s+(to|in|into)\s+[a-z]{3}\b"
+    ),
+    "weather": re.compile(r"\b(weather|forecast|temperature|rain|sunny|climate)\b"),
+    "places": re.compile(
+        r"\b(restaurants?|hotels?|hostels?|cafes?|bars?|museums?|attractions?|sights?|places)\b"
+        r"\s+(in|near|around|at)\b"
+    ),
+    "food_cost": re.compile(r"\b(food|meals?|eating)\b.*\b(cost|price|budget)\b"),
+}
+
+
+class RouteDecision(BaseModel):
+    tier: str
+    reason: str
+    downshift: bool = False   # may drop to the fast tier after lookup-only tool calls
+
+
+def classify(question: str, follow_up: bool = False, settings: Optional[Settings] = None) -> RouteDecision:
+    """
+    Assign a request to a tier from its text alone.
+
+    `follow_up` marks questions in an existing thread: "make it cheaper" refers
+    to an earlier plan, so unrecognised follow-ups stay on the strong tier.
+    """
+    settings = settings or get_settings()
+    text = question.lower()
+    if _PLAN.search(text):
+        return RouteDecision(tier=STRONG, reason="itinerary")
+    intents = [name for name, pattern in _INTENTS.items() if pattern.search(text)]
+    if len(intents) > 1:
+        return RouteDecision(tier=STRONG, reason="multi_intent", downshift=True)
+    if len(text.split()) > settings.routing_fast_max_words:
+        return RouteDecision(tier=STRONG, reason="long_query", downshift=True)
+    if intents:
+        return RouteDecision(tier=FAST, reason=intents[0])
+    if follow_up:
+        return RouteDecision(tier=STRONG, reason="follow_up")
+    return RouteDecision(tier=STRONG, reason="unrecognised", downshift=True)
+
+
+def route(question: str, provider: str, follow_up: bool = False, tier: Optional[str] = None) -> RouteDecision:
+    """Classify a request (or honour an explicit `tier`), then log and count the decision."""
+    settings = get_settings()
+    if tier is not None:
+        decision = RouteDecision(tier=tier, reason="requested")
+    elif not settings.model_routing:
+        decision = RouteDecision(tier=STRONG, reason="routing_disabled")
+    else:
+        decision = classify(question, follow_up, settings)
+    if not settings.routing_downshift:
+        decision = decision.model_copy(update={"downshift": False})
+    observe_route(decision.tier, decision.reason)
+    logger.info("routed to %s tier (%s)", decision.tier, decision.reason,
+                extra={"model_provider": provider, "model_tier": decision.tier, "route_reason": decision.reason})
+    return decision
+
+
+def step_tier(messages: list, tier: str, downshift: bool) -> str:
+    """
+    Tier for the next agent step of a run that started on `tier`.
+
+    Downshifts when the step follows tool results and every tool called since
+    the latest user message is a lookup: the remaining work is formatting.
+    """
+    if tier == FAST or not downshift or not messages or not isinstance(messages[-1], ToolMessage):
+        return tier
+    called = set()
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, AIMessage):
+            called.update(call["name"] for call in message.tool_calls)
+    return FAST if called and called <= LOOKUP_TOOLS else tier
+
+
+# ── Graph cache ──
+
+# providers × tiers × downshift × with/without checkpointer, with room to spare
+MAX_CACHED_GRAPHS = 32
+
+_graphs: Dict[tuple, object] = {}
+_graphs_lock = threading.Lock()
+
+
+def get_graph(provider: str, decision: RouteDecision, checkpointer=None):
+    """The compiled graph for (provider, tier, downshift), built once per process and settings."""
+    if provider not in PROVIDER_MODULES:
+        raise ValueError(f"Unknown model provider '{provider}'")
+    if decision.tier not in TIERS:
+        raise ValueError(f"Unknown model tier '{decision.tier}'")
+    key = (provider, decision.tier, decision.downshift, id(checkpointer) if checkpointer is not None else None)
+    graph = _graphs.get(key)
+    if graph is None:
+        from agent.workflow import GraphBuilder
+
+        with _graphs_lock:
+            graph = _graphs.get(key)
+            if graph is None:
+                graph = GraphBuilder(model_provider=provider, checkpointer=checkpointer,
+                                     tier=decision.tier, downshift=decision.downshift)()
+                if len(_graphs) >= MAX_CACHED_GRAPHS:
+                    _graphs.pop(next(iter(_graphs)))   # oldest first
+                _graphs[key] = graph
+    return graph
+
+
+def _clear_graphs(old: Settings, new: Settings):
+    # Graphs hold model clients built from the old settings
+    with _graphs_lock:
+        _graphs.clear()
+
+
+on_reload(_clear_graphs)
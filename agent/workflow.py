@@ -1,17 +1,26 @@
 """LangGraph agent workflow — ReAct loop with tool calling."""
 
+import time
+
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import SystemMessage, HumanMessage, RemoveMessage
 
+from agent.router import FAST, step_tier
+from logger.logging import get_logger
 from prompts.prompt import SYSTEM_PROMPT
 from utils.model_loader import ModelLoader
+from utils.checkpointer import MAX_THREAD_MESSAGES
+from utils.metrics import observe_agent_step, observe_route
 
 # Import tool lists from each tool module
 from tools.weather_search import weather_tools
 from tools.place_search import place_tools
 from tools.currency_converter import currency_tools
 from tools.expense_calculator import expense_tools
+from tools.route_planner import route_tools
+
+logger = get_logger("ai_trip_planner.workflow")
 
 
 class GraphBuilder:
@@ -22,16 +31,24 @@ class GraphBuilder:
         builder = GraphBuilder(model_provider="google")
         graph = builder()          # returns a compiled StateGraph
         result = graph.invoke({"messages": ["Plan a 3-day trip to Goa"]})
+
+    Pass a checkpointer (see utils.checkpointer) to persist state per
+    `thread_id`, so follow-up questions reuse earlier messages and tool results.
+
+    `tier` picks the provider's fast or strong model (see agent.router); with
+    `downshift`, steps that only format lookup results use the fast model.
     """
 
-    def __init__(self, model_provider: str = "google"):
+    def __init__(self, model_provider: str = "google", checkpointer=None,
+                 max_messages: int = MAX_THREAD_MESSAGES, tier: str = "strong", downshift: bool = False):
         self.model_loader = ModelLoader()
+        self.checkpointer = checkpointer
+        self.max_messages = max_messages
+        self.tier = tier
+        self.downshift = downshift and tier != FAST
 
-        # Select model based on provider
-        if model_provider == "groq":
-            self.llm = self.model_loader.load_groq_model()
-        else:
-            self.llm = self.model_loader.load_google_model()
+        # Select model based on provider and tier
+        self.llm = self.model_loader.load_model(model_provider, tier)
 
         # Collect all tools into a single flat list
         self.tool_list = []
@@ -39,18 +56,48 @@ class GraphBuilder:
         self.tool_list.extend(place_tools)
         self.tool_list.extend(currency_tools)
         self.tool_list.extend(expense_tools)
+        self.tool_list.extend(route_tools)
 
-        # Bind tools to the LLM
+        # Bind tools to the LLM (and to the fast model a run may drop to)
         self.llm_with_tools = self.llm.bind_tools(self.tool_list)
+        self.tier_llms = {tier: self.llm_with_tools}
+        if self.downshift:
+            self.tier_llms[FAST] = self.model_loader.load_model(model_provider, FAST).bind_tools(self.tool_list)
         self.system_prompt = SYSTEM_PROMPT
 
     # ── Agent node ──────────────────────────────────────────────
     def agent_function(self, state: MessagesState):
         """The main agent node — prepends the system prompt and calls the LLM."""
         user_messages = state["messages"]
+        stale = self.select_stale_messages(user_messages)
+        if stale:
+            user_messages = user_messages[len(stale):]
         input_messages = [self.system_prompt] + user_messages
-        response = self.llm_with_tools.invoke(input_messages)
-        return {"messages": [response]}
+        tier = step_tier(user_messages, self.tier, self.downshift)
+        if tier != self.tier:
+            observe_route(tier, "downshift")
+            logger.info("downshifted from %s to %s tier after lookups", self.tier, tier,
+                        extra={"model_tier": tier})
+        started = time.perf_counter()
+        response = self.tier_llms[tier].invoke(input_messages)
+        observe_agent_step(tier, time.perf_counter() - started)
+        removals = [RemoveMessage(id=m.id) for m in stale if m.id]
+        return {"messages": removals + [response]}
+
+    def select_stale_messages(self, messages: list) -> list:
+        """
+        Pick the oldest messages to drop once a thread exceeds `max_messages`.
+
+        Cuts only at a user turn so tool calls and their results stay paired,
+        and never drops the latest user turn.
+        """
+        if not self.max_messages or len(messages) <= self.max_messages:
+            return []
+        turn_starts = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage) and i > 0]
+        for start in turn_starts:
+            if len(messages) - start <= self.max_messages:
+                return messages[:start]
+        return messages[:turn_starts[-1]] if turn_starts else []
 
     # ── Graph builder ───────────────────────────────────────────
     def build_graph(self):
@@ -67,7 +114,7 @@ class GraphBuilder:
         graph_builder.add_edge("tools", "agent")
 
         # Compile and return
-        compiled_graph = graph_builder.compile()
+        compiled_graph = graph_builder.compile(checkpointer=self.checkpointer)
         return compiled_graph
 
     def __call__(self):
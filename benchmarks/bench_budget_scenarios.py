@@ -0,0 +1,88 @@
+"""Scenario-grid budget benchmark: vectorized engine vs. one scalar calculation per scenario.
+
+Usage:
+    python -m benchmarks.bench_budget_scenarios --grids 10x4,100x10,365x50,1000x200
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RATES = {"accommodation_per_night": 120.0, "food_per_day": 35.0, "transport_per_day": 25.0,
+         "activities_per_day": 20.0}
+
+
+def _scalar_grid(durations, travelers, levels):
+    """The pre-engine approach: one budget_breakdown call per combination."""
+    from tools.expense_calculator import (
+        LEVEL_RATE_MULTIPLIERS, TRAVELERS_PER_ROOM, TRAVELERS_PER_VEHICLE, budget_breakdown,
+    )
+
+    rows = []
+    for days in durations:
+        for people in travelers:
+            for level in levels:
+                acc, food, transport, activities = LEVEL_RATE_MULTIPLIERS[level]
+                rows.append(budget_breakdown(
+                    days,
+                    RATES["accommodation_per_night"] * acc * math.ceil(people / TRAVELERS_PER_ROOM),
+                    RATES["food_per_day"] * food * people,
+                    RATES["transport_per_day"] * transport * math.ceil(people / TRAVELERS_PER_VEHICLE),
+                    RATES["activities_per_day"] * activities * people,
+                    people,
+                ))
+    return rows
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budget scenario engine benchmark.")
+    parser.add_argument("--grids", default="10x4,100x10,365x50,1000x200",
+                        help="Comma-separated DAYSxTRAVELERS grids (all three budget levels each)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--scalar-max", type=int, default=200_000,
+                        help="Skip the scalar baseline above this many scenarios")
+    args = parser.parse_args(argv)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    from tools.expense_calculator import LEVEL_RATE_MULTIPLIERS, budget_scenarios
+
+    levels = list(LEVEL_RATE_MULTIPLIERS)
+    results = []
+    for grid in args.grids.split(","):
+        n_days, n_travelers = (int(x) for x in grid.lower().split("x"))
+        durations, travelers = range(1, n_days + 1), range(1, n_travelers + 1)
+        count = n_days * n_travelers * len(levels)
+
+        vectorized = _best_of(lambda: budget_scenarios(durations, travelers, levels, **RATES), args.repeat)
+        entry = {
+            "grid": grid,
+            "scenarios": count,
+            "vectorized_ms": round(vectorized * 1000, 3),
+            "vectorized_ns_per_scenario": round(vectorized / count * 1e9, 1),
+        }
+        if count <= args.scalar_max:
+            scalar = _best_of(lambda: _scalar_grid(durations, travelers, levels), 1)
+            entry["scalar_ms"] = round(scalar * 1000, 3)
+            entry["speedup"] = round(scalar / vectorized, 1) if vectorized else None
+        results.append(entry)
+
+    print(json.dumps({"levels": levels, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Cold-start benchmark: time from launching uvicorn to the first `/health` response.
+
+Each run starts a fresh `uvicorn main:app` process on a free port, polls
+`GET /health` until it answers 200 and then, optionally, times the first call
+to a few other endpoints (which pay for whatever was imported lazily). State
+files go to a temporary directory, so runs don't share caches.
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 5
+    python -m benchmarks.bench_cold_start --repo /tmp/old-checkout --then "/tools/cities?q=par"
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLL_INTERVAL_S = 0.005
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(port: int, path: str, timeout: float = 60.0) -> int:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def cold_start(repo: str, python: str, then: list, timeout: float) -> dict:
+    """Launch one server and time /health, then each path in `then`, in milliseconds."""
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix="trip-cold-")
+    env = dict(os.environ, TRACE_EXPORTER="none", LOG_CONSOLE_LEVEL="ERROR")
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [python, "-m", "uvicorn", "main:app", "--app-dir", repo, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise SystemExit(f"server exited during startup:\n{proc.stderr.read().decode()[-2000:]}")
+            if time.perf_counter() - started > timeout:
+                raise SystemExit(f"no /health response within {timeout:.0f}s")
+            try:
+                if _get(port, "/health", timeout=1.0) == 200:
+                    break
+            except OSError:
+                pass
+            time.sleep(POLL_INTERVAL_S)
+        result = {"health_ms": round((time.perf_counter() - started) * 1000, 1)}
+        for path in then:
+            first = time.perf_counter()
+            status = _get(port, path)
+            result[path] = {"status": status, "ms": round((time.perf_counter() - first) * 1000, 1)}
+        return result
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _summary(values: list) -> dict:
+    return {"min_ms": min(values), "median_ms": round(statistics.median(values), 1), "max_ms": max(values)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API cold-start benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--repo", default=REPO_ROOT, help="Checkout to serve (e.g. a worktree of another commit)")
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--then", action="append", default=[],
+                        help="Path to time on the first request after /health (repeatable)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for /health")
+    args = parser.parse_args(argv)
+
+    runs = [cold_start(os.path.abspath(args.repo), args.python, args.then, args.timeout) for _ in range(args.runs)]
+    report = {"repo": os.path.abspath(args.repo), "runs": args.runs,
+              "health": _summary([r["health_ms"] for r in runs])}
+    for path in args.then:
+        report[path] = _summary([r[path]["ms"] for r in runs])
+        report[path]["statuses"] = sorted({r[path]["status"] for r in runs})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Batch currency conversion benchmark: cross-rate matrix vs. one `convert()` per conversion.
+
+Runs offline against the upstream stubs. Amounts are priced in a handful of
+source currencies, each converted into every target, like a budget's line items
+shown in several currencies. The scalar baseline is what the agent did before:
+one conversion per (amount, target). Both paths are timed with warm rates caches,
+so the timing difference is per-call overhead, not HTTP. Cold-cache fetches are
+reported separately: one table per source currency vs. one table in total.
+
+Usage:
+    python -m benchmarks.bench_currency_batch --sizes 10x3,100x5,1000x10,10000x20
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = ["EUR", "USD", "GBP", "INR", "JPY", "THB"]
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _scalar(amounts, sources, targets):
+    """The pre-engine approach: one convert() per amount and target currency."""
+    from tools.currency_converter import convert
+
+    return [[convert(amount, source, target)["converted"] for target in targets]
+            for amount, source in zip(amounts, sources)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch currency conversion benchmark.")
+    parser.add_argument("--sizes", default="10x3,100x5,1000x10,10000x20",
+                        help="Comma-separated AMOUNTSxTARGETS batches")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scalar-max", type=int, default=50_000,
+                        help="Skip the scalar baseline above this many conversions")
+    args = parser.parse_args(argv)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    from benchmarks.stubs import CURRENCIES, StubConfig, UpstreamStubs
+
+    stubs = UpstreamStubs(StubConfig(latency=0.0)).start()
+    os.environ.update(stubs.env())
+    os.environ.setdefault("TRACE_EXPORTER", "none")
+    # The engine is measured beyond the API's response limit
+    os.environ.setdefault("MAX_BATCH_CONVERSIONS", "10000000")
+
+    import numpy as np
+
+    from tools.currency_converter import RATE_TABLE_BASE, convert, convert_batch, get_rate_matrix
+
+    fetches = stubs.calls["exchange_rates"]
+    get_rate_matrix()
+    cold_fetches = {"batch": stubs.calls["exchange_rates"] - fetches}
+    fetches = stubs.calls["exchange_rates"]
+    for source in SOURCES:
+        convert(1.0, source, RATE_TABLE_BASE)
+    cold_fetches["scalar"] = stubs.calls["exchange_rates"] - fetches + 1   # the base table is already cached
+
+    rng = np.random.default_rng(7)
+    results = []
+    for size in args.sizes.split(","):
+        n_amounts, n_targets = (int(x) for x in size.lower().split("x"))
+        amounts = np.round(rng.uniform(1, 5000, n_amounts), 2).tolist()
+        sources = [SOURCES[i] for i in rng.integers(0, len(SOURCES), n_amounts)]
+        targets = CURRENCIES[:n_targets]
+        count = n_amounts * n_targets
+
+        batch = _best_of(lambda: convert_batch(amounts, sources, targets), args.repeat)
+        entry = {
+            "batch": size,
+            "conversions": count,
+            "batch_ms": round(batch * 1000, 3),
+            "batch_ns_per_conversion": round(batch / count * 1e9, 1),
+        }
+        if count <= args.scalar_max:
+            scalar = _best_of(lambda: _scalar(amounts, sources, targets), 1)
+            entry["scalar_ms"] = round(scalar * 1000, 3)
+            entry["speedup"] = round(scalar / batch, 1) if batch else None
+        results.append(entry)
+
+    stubs.stop()
+    print(json.dumps({"sources": SOURCES, "cold_upstream_fetches": cold_fetches, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Logging overhead per request.
+
+Emits the records a typical /query produces (one access line, a few LLM turns,
+tool calls and upstream attempts at DEBUG) through several logging setups and
+reports the time spent on the calling thread — the part that lands on request
+latency — plus the time until the log file is fully written.
+
+Usage:
+    python -m benchmarks.bench_logging --requests 2000 --disk-latency-ms 0.2
+    python -m benchmarks.bench_logging --request-gap-ms 0   # worst case: logging-bound loop
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _SlowDisk(logging.Handler):
+    """Wraps a handler and sleeps before each write to model slow or contended storage."""
+
+    def __init__(self, inner: logging.Handler, latency: float):
+        super().__init__(inner.level)
+        self.inner = inner
+        self.latency = latency
+
+    def emit(self, record):
+        if self.latency:
+            time.sleep(self.latency)
+        self.inner.handle(record)
+
+    def close(self):
+        self.inner.close()
+        super().close()
+
+
+def _legacy_handler(log_dir: str) -> logging.Handler:
+    """The previous setup: a synchronous FileHandler with a text format."""
+    handler = logging.FileHandler(os.path.join(log_dir, "legacy.log"), encoding="utf-8")
+    handler.setFormatter(logging.Formatter(
+        "[%(asctime)s] %(levelname)s — %(name)s — %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    ))
+    return handler
+
+
+def _emit_request(loggers, i: int, events: int):
+    api, agent, upstream = loggers
+    for turn in range(events):
+        agent.debug("llm turn %s", turn, extra={"model": "bench", "duration_ms": 12.5,
+                                                "prompt_tokens": 900, "completion_tokens": 120})
+        agent.debug("tool %s finished", "search_places", extra={"tool": "search_places", "duration_ms": 40.1})
+        upstream.debug("%s %s %s", "overpass", "POST", 200, extra={"upstream": "overpass", "duration_ms": 38.0})
+    api.info("%s %s %s", "POST", "/query", 200, extra={"status": 200, "duration_ms": 812.3 + i % 7})
+
+
+def run_setup(name: str, args, log_dir: str) -> dict:
+    from logger.logging import build_pipeline, parse_sample_rates
+
+    base = logging.getLogger(f"bench.{name}")
+    base.handlers.clear()
+    base.propagate = False
+    base.setLevel(logging.DEBUG)
+    loggers = tuple(logging.getLogger(f"bench.{name}.{part}") for part in ("api", "agent", "upstream"))
+    listener = None
+    latency = args.disk_latency_ms / 1000
+    gap = args.request_gap_ms / 1000
+
+    if name == "disabled":
+        base.setLevel(logging.CRITICAL + 1)
+    elif name == "sync_file":
+        base.addHandler(_SlowDisk(_legacy_handler(log_dir), latency))
+    else:
+        rates = parse_sample_rates(args.sample_rates) if name == "queue_sampled" else {}
+        rates = {f"bench.{name}.{k}": v for k, v in rates.items()}
+        handler, listener = build_pipeline(log_dir, rates, console=False)
+        listener.handlers = tuple(_SlowDisk(h, latency) for h in listener.handlers)
+        base.addHandler(handler)
+
+    per_request = []
+    started = time.perf_counter()
+    for i in range(args.requests):
+        t0 = time.perf_counter()
+        _emit_request(loggers, i, args.events)
+        per_request.append((time.perf_counter() - t0) * 1e6)
+        if gap:
+            time.sleep(gap)  # the rest of the request: LLM and upstream waits
+    caller_wall = time.perf_counter() - started
+    if listener is not None:
+        listener.stop()
+    drained_wall = time.perf_counter() - started
+
+    dropped = getattr(base.handlers[0], "dropped", 0) if base.handlers else 0
+    for handler in base.handlers:
+        handler.close()
+    base.handlers.clear()
+
+    per_request.sort()
+    return {
+        "setup": name,
+        "mean_us": round(statistics.fmean(per_request), 1),
+        "p50_us": round(per_request[len(per_request) // 2], 1),
+        "p99_us": round(per_request[min(len(per_request) - 1, int(len(per_request) * 0.99))], 1),
+        "caller_wall_s": round(caller_wall, 3),
+        "drained_wall_s": round(drained_wall, 3),
+        "dropped": dropped,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-request logging overhead.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=4, help="LLM turns (each logs 3 DEBUG records)")
+    parser.add_argument("--disk-latency-ms", type=float, default=0.0,
+                        help="Extra latency per written record, to model slow storage")
+    parser.add_argument("--request-gap-ms", type=float, default=1.0,
+                        help="Idle time between requests (0 = back-to-back, CPU-bound)")
+    parser.add_argument("--sample-rates", default="agent=0.1,upstream=0.1")
+    parser.add_argument("--setups", default="disabled,sync_file,queue,queue_sampled")
+    args = parser.parse_args(argv)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    log_dir = tempfile.mkdtemp(prefix="trip-bench-logs-")
+    try:
+        results = [run_setup(name, args, log_dir) for name in args.setups.split(",") if name]
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+    print(json.dumps({
+        "requests": args.requests,
+        "records_per_request": 1 + 3 * args.events,
+        "disk_latency_ms": args.disk_latency_ms,
+        "request_gap_ms": args.request_gap_ms,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Itinerary routing benchmark: time and route length of the local day-clustering + 2-opt engine.
+
+Points are drawn around a city centre in a few neighbourhoods (Gaussian blobs), in
+random order, which is roughly what a place search returns. The baseline is the
+input order split into equal consecutive days, i.e. what an unassisted plan tends
+to look like.
+
+Usage:
+    python -m benchmarks.bench_route_planner --sizes 15x3,50x4,100x5,300x7,300x1,1000x10
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _points(n: int, seed: int):
+    import numpy as np
+
+    from tools.route_planner import RoutePoint
+
+    rng = np.random.default_rng(seed)
+    blobs = rng.normal(0, [0.04, 0.06], size=(6, 2))
+    members = rng.integers(0, len(blobs), n)
+    coords = blobs[members] + rng.normal(0, [0.008, 0.012], size=(n, 2)) + [41.9, 12.49]
+    return [RoutePoint(name=f"Place {i}", lat=lat, lon=lon) for i, (lat, lon) in enumerate(coords)]
+
+
+def _baseline_km(points, num_days: int) -> float:
+    import numpy as np
+
+    from tools.route_planner import DETOUR_FACTOR, distance_matrix
+
+    dist = distance_matrix([p.lat for p in points], [p.lon for p in points]) * DETOUR_FACTOR
+    chunks = np.array_split(np.arange(len(points)), min(num_days, len(points)))
+    return float(sum(dist[chunk[:-1], chunk[1:]].sum() for chunk in chunks))
+
+
+def _best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Route planner benchmark.")
+    parser.add_argument("--sizes", default="15x3,50x4,100x5,300x7,300x1,1000x10",
+                        help="Comma-separated POINTSxDAYS cases")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+
+    import numpy as np
+
+    from tools.route_planner import cluster_days, distance_matrix, plan_route
+
+    results = []
+    for case in args.sizes.split(","):
+        n, days = (int(x) for x in case.lower().split("x"))
+        points = _points(n, args.seed)
+        lats = np.array([p.lat for p in points])
+        lons = np.array([p.lon for p in points])
+
+        matrix_s, _ = _best_of(lambda: distance_matrix(lats, lons), args.repeat)
+        cluster_s, _ = _best_of(lambda: cluster_days(lats, lons, days), args.repeat)
+        total_s, route = _best_of(lambda: plan_route(points, days), args.repeat)
+        baseline = _baseline_km(points, days)
+        results.append({
+            "points": n,
+            "days": days,
+            "total_ms": round(total_s * 1000, 2),
+            "distance_matrix_ms": round(matrix_s * 1000, 2),
+            "clustering_ms": round(cluster_s * 1000, 2),
+            "route_km": route["total_km"],
+            "input_order_km": round(baseline, 2),
+            "reduction": f"{1 - route['total_km'] / baseline:.0%}" if baseline else None,
+            "stops_per_day": [len(d["stops"]) for d in route["days"]],
+        })
+
+    print(json.dumps({"seed": args.seed, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compare two benchmark JSON reports (from run_e2e or the micro-benchmarks).
+
+Usage:
+    python -m benchmarks.compare base.json head.json
+"""
+
+import argparse
+import json
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "peak_rss_mb")
+# For these, bigger is better
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+
+def _rows(report: dict) -> dict:
+    return {level.get("concurrency", level.get("name")): level for level in report.get("levels", [])}
+
+
+def compare(base: dict, head: dict) -> str:
+    base_rows, head_rows = _rows(base), _rows(head)
+    lines = [
+        f"base {base.get('meta', {}).get('commit', '?')}  →  head {head.get('meta', {}).get('commit', '?')}",
+        f"{'level':>8} {'metric':<16} {'base':>12} {'head':>12} {'change':>9}",
+    ]
+    for key in sorted(set(base_rows) & set(head_rows), key=str):
+        for metric in METRICS:
+            if metric not in base_rows[key] or metric not in head_rows[key]:
+                continue
+            old, new = base_rows[key][metric], head_rows[key][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            better = change > 0 if metric in HIGHER_IS_BETTER else change < 0
+            marker = "" if abs(change) < 5 else (" ✓" if better else " ✗")
+            lines.append(f"{key!s:>8} {metric:<16} {old:>12.2f} {new:>12.2f} {change:>+8.1f}%{marker}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two benchmark reports.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    args = parser.parse_args(argv)
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+    print(compare(base, head))
+
+
+if __name__ == "__main__":
+    main()
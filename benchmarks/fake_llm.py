@@ -0,0 +1,102 @@
+"""Deterministic scripted chat model — stands in for Gemini/Groq in offline benchmarks."""
+
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_CITY_PATTERN = re.compile(r"\b(?:to|in|for|visit)\s+([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)?)")
+_DAYS_PATTERN = re.compile(r"(\d+)[- ]day")
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Replays the tool-calling pattern a real model produces for a trip request.
+
+    Turn 1 fetches weather, attractions and food costs in parallel, turn 2
+    hotels and an exchange rate, turn 3 the budget, and turn 4 writes a
+    Markdown plan of `plan_chars` characters. `latency` seconds are slept per
+    call to mimic model time-to-response.
+    """
+
+    latency: float = 0.0
+    plan_chars: int = 4000
+    model_name: str = "scripted"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: List[Any], **kwargs):
+        return self
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        question = messages[last_human].content
+        turn = sum(1 for m in messages[last_human:] if isinstance(m, AIMessage))
+        city_match = _CITY_PATTERN.search(question)
+        city = city_match.group(1) if city_match else "Paris"
+        days_match = _DAYS_PATTERN.search(question)
+        days = int(days_match.group(1)) if days_match else 3
+
+        calls = self._script(turn, city, days)
+        if calls:
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": args, "id": f"call_{turn}_{i}"} for i, (name, args) in enumerate(calls)
+            ])
+        else:
+            message = AIMessage(content=self._plan(city, days))
+
+        prompt_text = "".join(str(m.content) for m in messages)
+        completion_tokens = _estimate_tokens(str(message.content)) + 20 * len(calls)
+        message.usage_metadata = {
+            "input_tokens": _estimate_tokens(prompt_text),
+            "output_tokens": completion_tokens,
+            "total_tokens": _estimate_tokens(prompt_text) + completion_tokens,
+        }
+        message.response_metadata = {"model_name": self.model_name}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _script(turn: int, city: str, days: int) -> list:
+        if turn == 0:
+            return [
+                ("get_weather_forecast", {"city": city}),
+                ("search_places", {"query": "top attractions", "city": city, "category": "tourism.attraction"}),
+                ("estimate_daily_food_cost", {"city": city, "budget_level": "mid-range"}),
+            ]
+        if turn == 1:
+            return [
+                ("search_hotels", {"city": city, "budget_level": "mid-range"}),
+                ("get_exchange_rate", {"from_currency": "USD", "to_currency": "EUR"}),
+            ]
+        if turn == 2:
+            return [
+                ("calculate_trip_budget", {
+                    "num_days": days, "accommodation_per_night": 120.0, "food_per_day": 45.0,
+                    "transport_per_day": 15.0, "activities_per_day": 30.0, "num_travelers": 2,
+                }),
+            ]
+        return []
+
+    def _plan(self, city: str, days: int) -> str:
+        header = f"# {days}-Day Trip to {city}\n\n## Overview\n"
+        body = "".join(
+            f"\n### Day {d}\n- Morning: explore the old town of {city}\n"
+            f"- Afternoon: museum visit and local lunch\n- Evening: dinner by the river\n"
+            for d in range(1, days + 1)
+        )
+        text = header + body
+        filler = "\nEnjoy your trip! " * max(0, (self.plan_chars - len(text)) // 17)
+        return (text + filler)[: max(self.plan_chars, len(text))]
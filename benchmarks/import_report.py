@@ -0,0 +1,120 @@
+"""Startup-time report: where `import main` spends its time.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter, parses
+the per-module timings and writes a report with the slowest modules by
+cumulative time (a module plus everything it pulled in) and the total self
+time per top-level package. Each run is saved as text and JSON, so reports
+from two commits can be compared side by side.
+
+Usage:
+    python -m benchmarks.import_report                    # report on `import main`
+    python -m benchmarks.import_report --module agent.workflow --top 30
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPORT_DIR = os.getenv("STARTUP_REPORT_DIR", "state/startup")
+
+# "import time:       412 |       1024 |   package.module" — indentation marks nesting
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> list:
+    """[{module, self_us, cumulative_us, depth}] in the order the interpreter reported them."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append({
+                "module": module,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(indent) - 1) // 2,
+            })
+    return entries
+
+
+def measure(module: str, python: str = sys.executable, cwd: str = REPO_ROOT) -> list:
+    env = dict(os.environ, TRACE_EXPORTER=os.getenv("TRACE_EXPORTER", "none"))
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"`import {module}` failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def build_report(module: str, entries: list, top: int) -> dict:
+    packages = defaultdict(int)
+    for entry in entries:
+        packages[entry["module"].split(".")[0]] += entry["self_us"]
+    # The requested module is the last top-level entry; its cumulative time is the total
+    root = next((e for e in reversed(entries) if e["module"] == module), None)
+    total_us = root["cumulative_us"] if root else sum(e["self_us"] for e in entries)
+    slowest = sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top]
+    return {
+        "module": module,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "total_ms": round(total_us / 1000, 1),
+        "modules_imported": len(entries),
+        "slowest_cumulative": [
+            {"module": e["module"], "cumulative_ms": round(e["cumulative_us"] / 1000, 1),
+             "self_ms": round(e["self_us"] / 1000, 1)}
+            for e in slowest
+        ],
+        "by_package": [
+            {"package": name, "self_ms": round(us / 1000, 1), "share": round(us / total_us, 3) if total_us else 0.0}
+            for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+    }
+
+
+def render_text(report: dict) -> str:
+    lines = [
+        f"import {report['module']}: {report['total_ms']} ms, {report['modules_imported']} modules "
+        f"(python {report['python']}, {report['created']})",
+        "",
+        f"{'cumulative ms':>14}  {'self ms':>8}  module",
+    ]
+    lines += [f"{e['cumulative_ms']:>14}  {e['self_ms']:>8}  {e['module']}" for e in report["slowest_cumulative"]]
+    lines += ["", f"{'self ms':>14}  {'share':>8}  package"]
+    lines += [f"{p['self_ms']:>14}  {p['share']:>8.1%}  {p['package']}" for p in report["by_package"]]
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time breakdown of the API's startup.")
+    parser.add_argument("--module", default="main", help="Module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    parser.add_argument("--output-dir", default=REPORT_DIR, help="Where the .txt and .json reports go")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to measure")
+    parser.add_argument("--repo", default=REPO_ROOT, help="Checkout to import from (e.g. a worktree of another commit)")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.module, measure(args.module, args.python, args.repo), args.top)
+    text = render_text(report)
+    print(text, end="")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(args.output_dir, f"importtime-{args.module}-{stamp}")
+    with open(base + ".txt", "w", encoding="utf-8") as f:
+        f.write(text)
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {base}.txt and {base}.json")
+
+
+if __name__ == "__main__":
+    main()
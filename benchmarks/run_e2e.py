@@ -0,0 +1,225 @@
+"""Offline end-to-end benchmark of the API.
+
+Runs `main.app` in-process through an ASGI transport with a scripted chat
+model and local upstream stubs, at several concurrency levels, and prints a
+JSON report (latency percentiles, throughput, peak memory, upstream calls)
+that can be diffed between commits with `python -m benchmarks.compare`.
+
+Each concurrency level runs in a fresh process (with its own warm-up), because
+peak RSS is a process-lifetime high-water mark: measured in one process, every
+level after the heaviest would report the same peak. `--in-process` runs all
+levels in this process instead; `peak_rss_mb` is then cumulative.
+
+Usage:
+    python -m benchmarks.run_e2e --concurrency 1,4,16 --requests 48 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CITIES = ["Paris", "Tokyo", "Lisbon", "Goa", "Kyoto", "Prague", "Cairo", "Sydney",
+          "Bangkok", "Istanbul", "Rome", "Hanoi", "Dubai", "Seoul", "Berlin", "Cancun"]
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def prepare_environment(args):
+    """Isolate state in a temp dir, start the stubs and swap in the scripted model."""
+    from benchmarks.stubs import StubConfig, UpstreamStubs
+
+    workdir = tempfile.mkdtemp(prefix="trip-bench-")
+    os.chdir(workdir)
+    stubs = UpstreamStubs(StubConfig(
+        latency=args.upstream_latency,
+        overpass_latency=args.overpass_latency,
+        overpass_elements=args.overpass_elements,
+    )).start()
+    os.environ.update(stubs.env())
+    os.environ.setdefault("TRACE_EXPORTER", "none")
+
+    from benchmarks.fake_llm import ScriptedChatModel
+    from utils.model_loader import ModelLoader
+
+    def load_scripted(self, *a, **kw):
+        return ScriptedChatModel(latency=args.llm_latency, plan_chars=args.plan_chars)
+
+    ModelLoader.load_google_model = load_scripted
+    ModelLoader.load_groq_model = load_scripted
+
+    # Graph diagrams are rendered through mermaid.ink — keep the benchmark offline
+    from langchain_core.runnables.graph import Graph
+
+    def _offline(*a, **kw):
+        raise RuntimeError("diagram rendering disabled in benchmarks")
+
+    Graph.draw_mermaid_png = _offline
+    return stubs, workdir
+
+
+async def run_level(client, endpoint: str, concurrency: int, total: int, city_count: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        city = CITIES[i % city_count]
+        payload = {"question": f"Plan a {2 + i % 5}-day trip to {city}", "model_provider": "google"}
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(endpoint, json=payload)
+            if endpoint.endswith("/stream"):
+                await response.aread()
+            elapsed = time.perf_counter() - started
+        if response.status_code != 200 or ('"type": "error"' in response.text):
+            errors += 1
+        latencies.append(elapsed * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    wall = time.perf_counter() - started
+    return latencies, errors, wall
+
+
+async def main_async(args):
+    import httpx
+
+    stubs, workdir = prepare_environment(args)
+    import main  # imported after the environment points at the stubs
+
+    levels = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        # Warm-up: imports, graph compilation, first cache fills
+        await run_level(client, args.endpoint, 1, 2, args.cities)
+        for concurrency in args.concurrency:
+            stubs.reset_counts()
+            latencies, errors, wall = await run_level(
+                client, args.endpoint, concurrency, args.requests, args.cities
+            )
+            levels.append({
+                "concurrency": concurrency,
+                "requests": args.requests,
+                "errors": errors,
+                "p50_ms": round(_percentile(latencies, 50), 2),
+                "p95_ms": round(_percentile(latencies, 95), 2),
+                "p99_ms": round(_percentile(latencies, 99), 2),
+                "mean_ms": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+                "throughput_rps": round(args.requests / wall, 3) if wall else 0.0,
+                "wall_s": round(wall, 3),
+                "peak_rss_mb": _peak_rss_mb(),
+                "upstream_calls": dict(stubs.calls),
+            })
+    stubs.stop()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "endpoint": args.endpoint,
+            "llm_latency_s": args.llm_latency,
+            "upstream_latency_s": args.upstream_latency,
+            "overpass_latency_s": args.overpass_latency,
+            "overpass_elements": args.overpass_elements,
+            "cities": args.cities,
+            "workdir": workdir,
+        },
+        "levels": levels,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end API benchmark.")
+    parser.add_argument("--endpoint", default="/query", choices=["/query", "/query/stream"])
+    parser.add_argument("--concurrency", default="1,4,16",
+                        type=lambda s: [int(x) for x in s.split(",") if x])
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument("--cities", type=int, default=8, help="Distinct destinations (cache diversity)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per scripted LLM call")
+    parser.add_argument("--plan-chars", type=int, default=4000, help="Length of the final plan")
+    parser.add_argument("--upstream-latency", type=float, default=0.02)
+    parser.add_argument("--overpass-latency", type=float, default=0.15)
+    parser.add_argument("--overpass-elements", type=int, default=200)
+    parser.add_argument("--output", help="Write the JSON report here as well as stdout")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run every level in this process (cumulative peak_rss_mb)")
+    args = parser.parse_args(argv)
+    args.cities = max(1, min(args.cities, len(CITIES)))
+    return args
+
+
+def _run_levels_in_subprocesses(argv, args) -> dict:
+    """One child process per level, so each level's peak RSS is its own."""
+    report, workdirs = None, {}
+    with tempfile.TemporaryDirectory(prefix="trip-bench-levels-") as tmp:
+        for concurrency in args.concurrency:
+            output = os.path.join(tmp, f"level-{concurrency}.json")
+            # argparse keeps the last occurrence, so these override the caller's values
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.run_e2e", *argv, "--in-process",
+                 "--concurrency", str(concurrency), "--output", output],
+                cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL,
+            )
+            with open(output, encoding="utf-8") as f:
+                level_report = json.load(f)
+            workdirs[concurrency] = level_report["meta"].pop("workdir")
+            if report is None:
+                report = level_report
+            else:
+                report["levels"].extend(level_report["levels"])
+    report["meta"]["workdirs"] = workdirs
+    return report
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
+    if args.output:
+        args.output = os.path.abspath(args.output)  # resolve before we chdir away
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    if args.in_process or len(args.concurrency) == 1:
+        report = asyncio.run(main_async(args))
+    else:
+        report = _run_levels_in_subprocesses(argv, args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Local stub servers for the upstream APIs (Open-Meteo, Overpass, ER-API).
+
+Each stub answers with a realistic payload shape, sleeps a configurable latency
+and counts calls, so benchmarks exercise the real tool code without network.
+"""
+
+import datetime
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CURRENCIES = [
+    "USD", "EUR", "GBP", "INR", "JPY", "AUD", "CAD", "CHF", "CNY", "SGD", "THB", "AED",
+    "IDR", "VND", "KRW", "TRY", "EGP", "ZAR", "BRL", "ARS", "MXN", "NZD", "CZK", "SEK",
+    "NOK", "DKK", "PLN", "HUF", "MYR", "PHP", "HKD", "TWD", "SAR", "QAR", "ILS", "CLP",
+    "COP", "PEN", "MAD", "KES", "NGN", "PKR", "BDT", "LKR", "NPR", "ISK", "RON", "BGN",
+]
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+
+class StubConfig:
+    """Latency (seconds) and payload size knobs for the stubs."""
+
+    def __init__(self, latency: float = 0.02, overpass_latency: float = 0.15,
+                 overpass_elements: int = 200, forecast_days: int = 7, tags_per_element: int = 12):
+        self.latency = latency
+        self.overpass_latency = overpass_latency
+        self.overpass_elements = overpass_elements
+        self.forecast_days = forecast_days
+        self.tags_per_element = tags_per_element
+
+
+class UpstreamStubs:
+    """Runs one threaded HTTP server hosting all four upstream stubs."""
+
+    def __init__(self, config: StubConfig = None):
+        self.config = config or StubConfig()
+        self.calls = {"geocoding": 0, "forecast": 0, "overpass": 0, "exchange_rates": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def env(self) -> dict:
+        """Environment variables that point utils.http_client at the stubs."""
+        return {
+            "GEOCODING_URL": f"{self.base_url}/v1/search",
+            "FORECAST_URL": f"{self.base_url}/v1/forecast",
+            "OVERPASS_URL": f"{self.base_url}/api/interpreter",
+            "EXCHANGE_RATES_URL": f"{self.base_url}/v6/latest",
+        }
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_counts(self):
+        with self._lock:
+            for key in self.calls:
+                self.calls[key] = 0
+
+    def _count(self, name: str):
+        with self._lock:
+            self.calls[name] += 1
+
+    # ── Payloads ────────────────────────────────────────────────
+    def geocoding(self, params: dict) -> dict:
+        name = params.get("name", ["Paris"])[0]
+        seed = _seed(name.lower())
+        return {"results": [{
+            "id": seed, "name": name.title(), "country": "Stubland",
+            "latitude": round((seed % 12000) / 100 - 60, 4),
+            "longitude": round((seed // 7 % 36000) / 100 - 180, 4),
+            "population": seed % 5_000_000, "timezone": "UTC",
+        }]}
+
+    def forecast(self, params: dict) -> dict:
+        days = self.config.forecast_days
+        first = datetime.date(2026, 1, 1)
+        if "forecast_days" in params:
+            days = min(days, int(params["forecast_days"][0]))
+        if "start_date" in params:
+            first = datetime.date.fromisoformat(params["start_date"][0])
+            last = datetime.date.fromisoformat(params.get("end_date", params["start_date"])[0])
+            days = (last - first).days + 1
+        return {"daily": {
+            "time": [(first + datetime.timedelta(days=d)).isoformat() for d in range(days)],
+            "temperature_2m_max": [20.0 + d % 5 for d in range(days)],
+            "temperature_2m_min": [11.0 + d % 3 for d in range(days)],
+            "precipitation_sum": [round(0.4 * (d % 4), 1) for d in range(days)],
+            "windspeed_10m_max": [12.0 + d for d in range(days)],
+            "weathercode": [(0, 2, 3, 61, 80)[d % 5] for d in range(days)],
+        }}
+
+    def overpass(self, body: str) -> dict:
+        """
+        Elements spread evenly around the queried point: `overpass_elements` within
+        10 km, fewer for smaller radii. Honours the `out ... N` cap and, for
+        `convert` queries, returns only the requested tags.
+        """
+        query = parse_qs(body).get("data", [body])[0]
+        around = re.search(r"around:(\d+),(-?[\d.]+),(-?[\d.]+)", query)
+        radius, lat, lon = (float(v) for v in around.groups()) if around else (10000.0, 48.8566, 2.3522)
+        count = int(self.config.overpass_elements * min(1.0, (radius / 10000) ** 2))
+        cap = re.search(r"out[a-z ]*?(\d+)\s*;", query)
+        if cap:
+            count = min(count, int(cap.group(1)))
+        wanted = re.findall(r't\["([^"]+)"\]', query) if "convert" in query else None
+
+        elements = []
+        for i in range(count):
+            tags = {
+                "name": f"Place {i}", "tourism": "attraction", "addr:street": f"{i} Main Street",
+                "addr:city": "Stub City", "opening_hours": "Mo-Su 09:00-18:00",
+                "website": f"https://example.org/{i}", "phone": f"+1 555 {i:04d}",
+            }
+            for t in range(max(0, self.config.tags_per_element - len(tags))):
+                tags[f"extra:{t}"] = "x" * 24
+            # Golden-angle spiral: uniform density inside the radius
+            r = radius * math.sqrt((i + 0.5) / max(count, 1)) / 111_320
+            theta = i * 2.39996
+            el_lat, el_lon = lat + r * math.cos(theta), lon + r * math.sin(theta)
+            if wanted is None:
+                elements.append({"type": "node", "id": 1000 + i, "lat": el_lat, "lon": el_lon, "tags": tags})
+            else:
+                elements.append({
+                    "type": "place", "id": 1000 + i,
+                    "geometry": {"type": "Point", "coordinates": [el_lon, el_lat]},
+                    "tags": {k: tags[k] for k in wanted if k in tags},
+                })
+        return {"version": 0.6, "elements": elements}
+
+    def exchange_rates(self, base: str) -> dict:
+        rates = {code: round(1 + (_seed(base + code) % 20000) / 100, 4) for code in CURRENCIES}
+        rates[base] = 1.0
+        return {"result": "success", "base_code": base, "time_last_update_utc": "Mon, 01 Jan 2026 00:00:01 +0000",
+                "rates": rates}
+
+    # ── HTTP plumbing ───────────────────────────────────────────
+    def _handler(self):
+        stubs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, payload: dict, latency: float):
+                time.sleep(latency)
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = parse_qs(url.query)
+                if url.path == "/v1/search":
+                    stubs._count("geocoding")
+                    self._reply(stubs.geocoding(params), stubs.config.latency)
+                elif url.path == "/v1/forecast":
+                    stubs._count("forecast")
+                    self._reply(stubs.forecast(params), stubs.config.latency)
+                elif url.path.startswith("/v6/latest"):
+                    stubs._count("exchange_rates")
+                    base = url.path.rsplit("/", 1)[-1].upper() or "USD"
+                    self._reply(stubs.exchange_rates(base), stubs.config.latency)
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode()
+                if urlparse(self.path).path == "/api/interpreter":
+                    stubs._count("overpass")
+                    self._reply(stubs.overpass(body), stubs.config.overpass_latency)
+                else:
+                    self.send_error(404)
+
+        return Handler
@@ -0,0 +1,237 @@
+"""Runtime-tunable settings — pool sizes, timeouts, caches, concurrency limits, models and routing.
+
+One validated `Settings` object is built from, in increasing precedence:
+
+  1. the defaults below,
+  2. environment variables: the field name upper-cased (`LLM_TEMPERATURE`,
+     `MAX_CONCURRENT_RUNS`, ...), or `<UPSTREAM>_<FIELD>` for upstream tuning
+     (`OVERPASS_TIMEOUT`, `GEOCODING_CACHE_SIZE`, ...),
+  3. the JSON file at SETTINGS_FILE (default `config/settings.json`, optional),
+     e.g. {"max_concurrent_runs": 4, "upstreams": {"overpass": {"timeout": 30}}}.
+
+Code reads `get_settings()` at the point of use, so `reload_settings()` (wired to
+`POST /admin/settings/reload` and SIGHUP) applies new values without a restart.
+The file wins over the environment because it's the part that can change while
+a worker runs. An invalid file is rejected as a whole and the current settings stay.
+
+The admin endpoints and per-request profiling are guarded by ADMIN_TOKEN
+(environment only). It isn't a setting, so `GET /admin/settings` can't reveal it
+and the settings file can't change it. Unset means both are disabled.
+"""
+
+import hmac
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+
+from exception.excep_handling import ConfigurationError
+from logger.logging import get_logger
+
+logger = get_logger("ai_trip_planner.settings")
+
+SETTINGS_FILE = os.getenv("SETTINGS_FILE", "config/settings.json")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+class UpstreamTuning(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    timeout: float = Field(10.0, gt=0)             # seconds per attempt
+    max_attempts: int = Field(3, ge=1, le=10)
+    backoff_base: float = Field(0.5, ge=0)         # seconds; doubled per attempt, full jitter
+    backoff_cap: float = Field(4.0, ge=0)
+    failure_threshold: int = Field(5, ge=1)        # consecutive failures before the breaker opens
+    reset_timeout: float = Field(30.0, gt=0)       # seconds the breaker stays open before a probe
+    cache_ttl: float = Field(3600.0, ge=0)         # seconds a cached response is fresh
+    max_stale: float = Field(86400.0, ge=0)        # seconds an expired response may still be served
+    cache_size: int = Field(256, ge=1)
+
+
+def _default_upstreams() -> Dict[str, UpstreamTuning]:
+    return {
+        "geocoding": UpstreamTuning(cache_ttl=7 * 86400, max_stale=30 * 86400, cache_size=1024),
+        "forecast": UpstreamTuning(cache_ttl=1800, max_stale=6 * 3600),
+        "overpass": UpstreamTuning(timeout=20.0, cache_ttl=86400, max_stale=7 * 86400),
+        "exchange_rates": UpstreamTuning(cache_ttl=3600, max_stale=2 * 86400),
+    }
+
+
+UPSTREAM_NAMES = tuple(_default_upstreams())
+
+
+class Settings(BaseModel):
+    # Unknown keys are typos, not silently ignored tuning
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    # ── Models ──
+    google_model: str = "gemini-2.5-flash"                # strong tier: itineraries, multi-part questions
+    google_fast_model: str = "gemini-2.5-flash-lite"      # fast tier: single lookups
+    groq_model: str = "llama-3.3-70b-versatile"
+    groq_fast_model: str = "llama-3.1-8b-instant"
+    llm_temperature: float = Field(0.0, ge=0.0, le=2.0)
+
+    # ── Model routing (agent.router) ──
+    model_routing: bool = True                            # off: every request uses the strong tier
+    routing_downshift: bool = True                        # let runs drop to the fast tier after lookups
+    routing_fast_max_words: int = Field(25, ge=1)         # longer questions go to the strong tier
+
+    # ── Concurrency ──
+    max_concurrent_runs: int = Field(8, ge=1, le=256)     # agent graph runs per worker; more wait in line
+    tool_threadpool_size: int = Field(40, ge=1, le=1000)  # threads serving the sync /tools/* endpoints
+
+    # ── Upstream HTTP ──
+    http_pool_maxsize: int = Field(20, ge=1, le=1000)     # pooled connections per upstream host
+    upstreams: Dict[str, UpstreamTuning] = Field(default_factory=_default_upstreams)
+
+    # ── Place search (Overpass) ──
+    place_max_results: int = Field(15, ge=1, le=100)
+    place_min_radius_m: int = Field(1000, ge=100)
+    place_max_radius_m: int = Field(25000, ge=100)
+    place_radius_growth: float = Field(2.5, gt=1.0)       # radius multiplier when results are sparse
+    place_max_expansions: int = Field(2, ge=0, le=5)
+    place_oversample: int = Field(4, ge=1, le=20)         # candidates fetched per result for ranking
+
+    # ── Responses ──
+    sse_heartbeat_seconds: float = Field(15.0, gt=0)
+    sse_retry_ms: int = Field(3000, ge=0)
+    max_scenario_rows: int = Field(100000, ge=1)
+    max_batch_conversions: int = Field(100000, ge=1)      # amounts × targets per /tools/convert/batch call
+
+    # ── Streamlit client ──
+    api_base_url: str = "http://localhost:8000"
+    ui_health_timeout: float = Field(3.0, gt=0)
+    ui_request_timeout: float = Field(120.0, gt=0)
+    ui_health_ttl: float = Field(10.0, ge=0)               # seconds a health probe result is reused
+    ui_stream_idle_timeout: float = Field(45.0, gt=0)      # silence (no event or heartbeat) before reconnecting
+    ui_stream_reconnects: int = Field(5, ge=0, le=50)      # consecutive resume attempts per stream
+    ui_history_max_turns: int = Field(50, ge=1, le=1000)   # turns kept in a browser session
+    ui_history_visible_turns: int = Field(5, ge=1, le=100) # newest turns rendered; older ones on demand
+
+    @model_validator(mode="after")
+    def _check(self):
+        unknown = set(self.upstreams) - set(UPSTREAM_NAMES)
+        if unknown:
+            raise ValueError(f"unknown upstream(s): {', '.join(sorted(unknown))}")
+        if self.place_min_radius_m > self.place_max_radius_m:
+            raise ValueError("place_min_radius_m must not exceed place_max_radius_m")
+        return self
+
+
+def is_admin(token: Optional[str]) -> bool:
+    """True when the admin endpoints are enabled and `token` matches ADMIN_TOKEN."""
+    if not ADMIN_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _merge(base: dict, override: dict) -> dict:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _from_environment() -> dict:
+    values = {}
+    for name in Settings.model_fields:
+        if name != "upstreams" and os.getenv(name.upper()) is not None:
+            values[name] = os.environ[name.upper()]
+    upstreams = {}
+    for upstream in UPSTREAM_NAMES:
+        for field in UpstreamTuning.model_fields:
+            value = os.getenv(f"{upstream.upper()}_{field.upper()}")
+            if value is not None:
+                upstreams.setdefault(upstream, {})[field] = value
+    if upstreams:
+        values["upstreams"] = upstreams
+    return values
+
+
+def _from_file(path: str) -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            values = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigurationError(f"Cannot read settings file {path}", e)
+    if not isinstance(values, dict):
+        raise ConfigurationError(f"Settings file {path} must hold a JSON object")
+    return values
+
+
+def load_settings(path: str = SETTINGS_FILE) -> Settings:
+    """Build and validate settings from defaults, environment and file (no side effects)."""
+    values = Settings().model_dump()
+    values = _merge(values, _from_environment())
+    values = _merge(values, _from_file(path))
+    try:
+        return Settings.model_validate(values)
+    except ValidationError as e:
+        raise ConfigurationError("Invalid settings", e)
+
+
+_settings = None
+_settings_lock = threading.Lock()
+_listeners: List[Callable[[Settings, Settings], None]] = []
+
+
+def get_settings() -> Settings:
+    """The current settings, loaded on first use. Don't cache the result across requests."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+    return _settings
+
+
+def on_reload(listener: Callable[[Settings, Settings], None]):
+    """Call `listener(old, new)` after every reload that changed something."""
+    _listeners.append(listener)
+
+
+def diff(old: Settings, new: Settings) -> Dict[str, Tuple]:
+    """{dotted field: (old, new)} for every changed value."""
+    changes = {}
+
+    def walk(prefix, a, b):
+        for key in sorted(set(a) | set(b)):
+            x, y = a.get(key), b.get(key)
+            if isinstance(x, dict) and isinstance(y, dict):
+                walk(f"{prefix}{key}.", x, y)
+            elif x != y:
+                changes[f"{prefix}{key}"] = (x, y)
+
+    walk("", old.model_dump(), new.model_dump())
+    return changes
+
+
+def reload_settings() -> Dict[str, Tuple]:
+    """
+    Re-read environment and file, swap in the new settings and notify listeners.
+
+    Returns the changed fields. Raises ConfigurationError (keeping the current
+    settings) when the new values don't validate.
+    """
+    global _settings
+    # Held through the listeners so concurrent reloads apply in order
+    with _settings_lock:
+        new = load_settings()
+        old = _settings if _settings is not None else new
+        _settings = new
+        changes = diff(old, new)
+        if changes:
+            logger.info("settings reloaded: %s", ", ".join(changes))
+            for listener in list(_listeners):
+                try:
+                    listener(old, new)
+                except Exception:
+                    logger.exception("settings listener %s failed", getattr(listener, "__qualname__", listener))
+    return changes
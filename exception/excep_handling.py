@@ -28,11 +28,21 @@ class ToolExecutionError(TripPlannerException):
     pass
 
 
+class LocationNotFoundError(ToolExecutionError):
+    """Raised when a city or place name cannot be geocoded."""
+    pass
+
+
 class APIConnectionError(TripPlannerException):
     """Raised when an external API call fails."""
     pass
 
 
+class RunInProgressError(TripPlannerException):
+    """Raised when a request reuses the idempotency key of a run that is still executing."""
+    pass
+
+
 class ConfigurationError(TripPlannerException):
     """Raised when configuration/environment variables are missing or invalid."""
     pass
@@ -1,51 +1,227 @@
-"""Custom logging configuration for AI Trip Planner."""
+"""Custom logging configuration for AI Trip Planner.
 
+Log calls never touch the disk on the caller's thread: records are put on an
+in-memory queue and a single background listener formats them as JSON lines
+and writes them to a file that rotates at midnight.
+
+    LOG_DIR=logs
+    LOG_FILE_LEVEL=DEBUG
+    LOG_CONSOLE_LEVEL=INFO
+    LOG_BACKUP_DAYS=14
+    LOG_SAMPLE_RATES=ai_trip_planner.upstream=0.1,ai_trip_planner.agent=0.5
+
+Sampling only applies to DEBUG records; a rate is matched on the logger name
+and its parents, so `ai_trip_planner.upstream=0.1` also covers
+`ai_trip_planner.upstream.overpass`.
+"""
+
+import atexit
+import contextvars
+import datetime
+import json
 import logging
+import logging.handlers
 import os
-import datetime
+import queue
+import random
+import threading
+from typing import Dict, Optional, Tuple
 
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_FILE_LEVEL = os.getenv("LOG_FILE_LEVEL", "DEBUG").upper()
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", "INFO").upper()
+LOG_BACKUP_DAYS = int(os.getenv("LOG_BACKUP_DAYS", "14"))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
 
-def get_logger(name: str = "ai_trip_planner", log_dir: str = "logs") -> logging.Logger:
-    """
-    Create and return a configured logger instance.
+ROOT_LOGGER = "ai_trip_planner"
 
-    Args:
-        name: Logger name (module identifier).
-        log_dir: Directory to store log files.
+# Correlates every record logged while serving one API request
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
 
-    Returns:
-        A configured logging.Logger instance.
+# Attributes every LogRecord has — anything else was passed via `extra=`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "taskName"}
+
+
+def set_request_id(request_id: Optional[str]) -> contextvars.Token:
+    """Bind a request id to the current context; pass the token to `reset_request_id`."""
+    return request_id_var.set(request_id)
+
+
+def reset_request_id(token: contextvars.Token):
+    request_id_var.reset(token)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse `name=rate,name=rate` into a dict, ignoring malformed entries."""
+    rates = {}
+    for part in spec.split(","):
+        name, _, rate = part.partition("=")
+        try:
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the current request id on the record before it leaves the caller's thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of DEBUG records per logger; higher levels always pass."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, probe = 1.0, name
+            while probe:
+                if probe in self.rates:
+                    rate = self.rates[probe]
+                    break
+                probe = probe.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, request id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Drops records instead of blocking the caller when the listener falls behind."""
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now (args may be mutated later),
+        # but leave formatting to the listener thread.
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_pipeline_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def build_pipeline(log_dir: str, sample_rates: Optional[Dict[str, float]] = None,
+                   console: bool = True) -> Tuple[logging.Handler, logging.handlers.QueueListener]:
+    """
+    Create the queue handler and a started listener that feeds the rotating
+    JSON file (and the console). Callers own the listener and must stop it.
     """
     os.makedirs(log_dir, exist_ok=True)
 
-    logger = logging.getLogger(name)
+    file_handler = logging.handlers.TimedRotatingFileHandler(
+        os.path.join(log_dir, "trip_planner.log"),
+        when="midnight", backupCount=LOG_BACKUP_DAYS, encoding="utf-8", delay=True,
+    )
+    file_handler.setLevel(LOG_FILE_LEVEL)
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler]
 
-    # Avoid adding duplicate handlers
-    if logger.handlers:
-        return logger
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(LOG_CONSOLE_LEVEL)
+        console_handler.setFormatter(logging.Formatter(
+            "[%(asctime)s] %(levelname)s — %(name)s — %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        ))
+        handlers.append(console_handler)
 
-    logger.setLevel(logging.DEBUG)
+    records = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = _NonBlockingQueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rates or {}))
+    handler.addFilter(RequestContextFilter())
 
-    # File handler — rotating daily
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    file_handler = logging.FileHandler(
-        os.path.join(log_dir, f"{today}.log"), encoding="utf-8"
-    )
-    file_handler.setLevel(logging.DEBUG)
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    return handler, listener
 
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
 
-    # Formatter
-    formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)s — %(name)s — %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _pipeline_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(name: str = ROOT_LOGGER, log_dir: str = LOG_DIR) -> logging.Logger:
+    """
+    Create and return a configured logger instance.
+
+    Loggers named `ai_trip_planner.<module>` share the root app logger's
+    queue pipeline; other names get the same pipeline attached directly.
+
+    Args:
+        name: Logger name (module identifier).
+        log_dir: Directory to store log files.
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    Returns:
+        A configured logging.Logger instance.
+    """
+    global _queue_handler, _listener
+    with _pipeline_lock:
+        if _queue_handler is None:
+            _queue_handler, _listener = build_pipeline(log_dir, parse_sample_rates(LOG_SAMPLE_RATES))
+            atexit.register(shutdown_logging)
+            root = logging.getLogger(ROOT_LOGGER)
+            root.setLevel(logging.DEBUG)
+            root.propagate = False
+            root.addHandler(_queue_handler)
 
+    logger = logging.getLogger(name)
+    if name != ROOT_LOGGER and not name.startswith(ROOT_LOGGER + ".") and _queue_handler not in logger.handlers:
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(_queue_handler)
     return logger
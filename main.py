@@ -1,25 +1,146 @@
-"""FastAPI backend for the AI Trip Planner agent."""
+"""FastAPI backend for the AI Trip Planner agent.
 
-from fastapi import FastAPI
+Startup imports only what serving `/health` needs. The agent graph, the LLM
+provider SDKs and the tool modules are imported on first use (and warmed in the
+background after startup, see PRELOAD_AGENT); `python -m benchmarks.import_report`
+shows what an import costs.
+"""
+
+from dotenv import load_dotenv
+
+# Before any project import: module-level settings read the environment when imported
+load_dotenv(override=True)
+
+from fastapi import FastAPI, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from starlette.responses import JSONResponse
-from pydantic import BaseModel
-from dotenv import load_dotenv
+from pydantic import BaseModel, Field
 
-from agent.workflow import GraphBuilder
-from utils.save_to_document import save_document
+from exception.excep_handling import (
+    APIConnectionError, ConfigurationError, LocationNotFoundError, RunInProgressError, ToolExecutionError,
+)
+from config.settings import get_settings, is_admin, reload_settings
+from logger.logging import get_logger, reset_request_id, set_request_id
+from utils.checkpointer import get_checkpointer, prune_thread, thread_config
+from utils.event_log import event_logs
+from utils.http_client import upstream_stats
+from utils.profiling import capture_profile, profile_path
+from utils.metrics import MetricsCallbackHandler, observe_settings_reload, record_http_request, render_latest
+from utils.tracing import TracingCallbackHandler, current_span, tracer
+from utils.run_pool import get_run_pool
+from utils.run_registry import get_run_registry, COMPLETED, FAILED, RUNNING
+from utils.plan_archive import PLAN_REUSE_ENABLED, get_plan_archive
 
+from contextlib import asynccontextmanager, nullcontext
+from typing import Annotated, List, Literal, Optional, Union
 import os
 import json
+import asyncio
 import datetime
+import signal
+import threading
+import time
+
+import anyio.to_thread
+
+# SSE heartbeat/retry, scenario size limit, pool sizes and models are runtime
+# settings (config.settings), read per request so a reload applies immediately.
+# Import the agent graph, tools and configured provider SDKs in the background after
+# startup, so the first query doesn't pay for them (false: import on first use only)
+PRELOAD_AGENT = os.getenv("PRELOAD_AGENT", "true").lower() in ("1", "true", "yes")
+# Write the agent graph diagram here once per process; rendered via mermaid.ink (empty: off)
+AGENT_GRAPH_PNG = os.getenv("AGENT_GRAPH_PNG", "")
+
+logger = get_logger("ai_trip_planner.api")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs left unfinished by a killed worker become resumable on retry
+    try:
+        recovered = get_run_registry().recover_unfinished()
+        if recovered:
+            logger.info("Recovered %d interrupted run(s): %s",
+                        len(recovered), ", ".join(r.idempotency_key for r in recovered))
+    except Exception:
+        logger.exception("run recovery failed")
+    _apply_runtime_settings()
+    if hasattr(signal, "SIGHUP"):
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(_reload_on_signal()))
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Not the main thread (e.g. an embedded test server): reload via the endpoint only
+            logger.debug("SIGHUP settings reload unavailable in this process")
+    if PRELOAD_AGENT:
+        threading.Thread(target=_preload_agent, name="agent-preload", daemon=True).start()
+    yield
+
+
+def _apply_runtime_settings():
+    """Apply settings owned by the event loop (call from a coroutine)."""
+    settings = get_settings()
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.tool_threadpool_size
+
+
+def _reload(trigger: str) -> dict:
+    try:
+        changes = reload_settings()
+    except Exception:
+        observe_settings_reload(trigger, "invalid")
+        raise
+    _apply_runtime_settings()
+    observe_settings_reload(trigger, "changed" if changes else "unchanged")
+    return {name: {"old": old, "new": new} for name, (old, new) in changes.items()}
+
+
+async def _reload_on_signal():
+    try:
+        _reload("signal")
+    except Exception:
+        logger.exception("settings reload on SIGHUP failed; keeping current settings")
+
+
+def _preload_agent():
+    """Import the agent graph, its tools and the configured provider SDKs (best-effort)."""
+    started = time.perf_counter()
+    try:
+        import agent.workflow  # noqa: F401 — pulls in every tool module
+        from utils.model_loader import preload_providers
+
+        providers = preload_providers()
+        logger.info("agent preloaded in %.2fs (providers: %s)",
+                    time.perf_counter() - started, ", ".join(providers) or "none")
+    except Exception:
+        logger.exception("agent preload failed")
+
+
+_graph_diagram_saved = threading.Event()
+
+
+def _save_graph_diagram(react_app):
+    """Render the graph diagram to AGENT_GRAPH_PNG once per process, off the request path."""
+    if not AGENT_GRAPH_PNG or _graph_diagram_saved.is_set():
+        return
+    _graph_diagram_saved.set()
+
+    def render():
+        try:
+            png_graph = react_app.get_graph().draw_mermaid_png()
+            with open(AGENT_GRAPH_PNG, "wb") as f:
+                f.write(png_graph)
+        except Exception:
+            logger.warning("agent graph diagram could not be rendered", exc_info=True)
+
+    threading.Thread(target=render, name="graph-diagram", daemon=True).start()
 
-load_dotenv(override=True)
 
 app = FastAPI(
     title="AI Trip Planner API",
     description="An agentic AI travel planner powered by LangGraph",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -31,9 +152,187 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count, time, trace and log requests per route template.
+
+    The request id (`X-Request-ID` if the client sent one, else the trace id)
+    is attached to every log record written while serving the request.
+    """
+    started = time.perf_counter()
+    status = 500
+    with tracer.span(f"{request.method} {request.url.path}", kind="server") as span:
+        request_id = request.headers.get("x-request-id") or span.trace_id
+        token = set_request_id(request_id)
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Request-ID"] = request_id
+            return response
+        finally:
+            route = request.scope.get("route")
+            endpoint = getattr(route, "path", "unmatched")
+            elapsed = time.perf_counter() - started
+            span.name = f"{request.method} {endpoint}"
+            span.set_attribute("http.status", status)
+            record_http_request(endpoint, request.method, status, elapsed)
+            logger.info("%s %s %s", request.method, endpoint, status,
+                        extra={"status": status, "duration_ms": round(elapsed * 1000, 1)})
+            reset_request_id(token)
+
+
 class QueryRequest(BaseModel):
     question: str
-    model_provider: str = "google"  # "google" or "groq"
+    model_provider: Literal["google", "groq"] = "google"
+    thread_id: Optional[str] = None  # reuse earlier turns of this conversation
+    reuse_plans: Optional[bool] = None  # answer from a near-identical archived plan (default: PLAN_REUSE_ENABLED)
+    model_tier: Optional[Literal["fast", "strong"]] = None  # skip routing and use this tier
+
+
+class RouteStop(BaseModel):
+    # Same fields as tools.route_planner.RoutePoint, which isn't imported at startup
+    name: str
+    lat: float = Field(ge=-90, le=90)
+    lon: float = Field(ge=-180, le=180)
+
+
+class BatchConversionRequest(BaseModel):
+    amounts: List[float]
+    from_currency: Union[str, List[str]]  # one code for all amounts, or one per amount
+    to_currencies: List[str]
+
+
+class RouteRequest(BaseModel):
+    places: List[RouteStop]
+    num_days: int = Field(default=1, ge=1)   # at most len(places); more is a 400
+    start: Optional[RouteStop] = None  # hotel: each day becomes a round trip from it
+
+
+def _build_agent(query: QueryRequest, thread_id: Optional[str] = None):
+    """
+    Route the request to a model tier and return its cached graph, with a
+    checkpointer when a thread is given.
+
+    The run config's metadata carries the tier, so callbacks (metrics, tracing)
+    can report latency per tier.
+    """
+    from agent.router import get_graph, route
+
+    thread_id = thread_id or query.thread_id
+    decision = route(query.question, query.model_provider, follow_up=bool(query.thread_id), tier=query.model_tier)
+    metadata = {"model_tier": decision.tier, "route_reason": decision.reason}
+    if thread_id:
+        graph = get_graph(query.model_provider, decision, get_checkpointer())
+        return graph, {**thread_config(thread_id), "metadata": metadata}
+    return get_graph(query.model_provider, decision), {"metadata": metadata}
+
+
+def _with_callbacks(config: Optional[dict], *handlers) -> dict:
+    """Attach per-request callback handlers (metrics, tracing) to a run config."""
+    merged = dict(config or {})
+    merged["callbacks"] = list(merged.get("callbacks", [])) + list(handlers)
+    return merged
+
+
+def _final_answer_in_state(state, question: str) -> Optional[str]:
+    """Return the answer if a checkpointed run already reached its final message."""
+    messages = state.values.get("messages", []) if state.values else []
+    if state.next or not messages:
+        return None
+    last_question = next((m.content for m in reversed(messages) if m.type == "human"), None)
+    last = messages[-1]
+    if last_question == question and last.type == "ai" and not getattr(last, "tool_calls", None):
+        return last.content
+    return None
+
+
+def _plan_run(query: QueryRequest, idempotency_key: Optional[str]):
+    """
+    Decide how to execute a request.
+
+    Without an idempotency key the graph simply runs. With one, the run is
+    checkpointed after every step: a retry of a completed run returns the
+    stored answer, and a retry of an interrupted run resumes from the last
+    completed step instead of re-invoking finished LLM turns and tools.
+
+    Returns (react_app, config, inputs, resumed, stored_answer).
+    """
+    if not idempotency_key:
+        react_app, config = _build_agent(query)
+        return react_app, config, {"messages": [query.question]}, False, None
+
+    registry = get_run_registry()
+    record = registry.get(idempotency_key)
+    if record and record.status == COMPLETED:
+        return None, thread_config(record.thread_id), None, False, record.answer
+    if record and registry.is_active_elsewhere(record):
+        raise RunInProgressError(f"Run '{idempotency_key}' is still in progress")
+
+    # Claim before touching the thread: of concurrent requests with one key, only one executes
+    thread_id = record.thread_id if record else (query.thread_id or f"run-{idempotency_key}")
+    stale = record if record and record.status == RUNNING else None
+    if registry.claim(idempotency_key, thread_id, query.question, stale) is None:
+        current = registry.get(idempotency_key)
+        if current and current.status == COMPLETED:
+            return None, thread_config(current.thread_id), None, False, current.answer
+        raise RunInProgressError(f"Run '{idempotency_key}' is still in progress")
+
+    try:
+        react_app, config = _build_agent(query, thread_id)
+        inputs = {"messages": [query.question]}
+        resumed = False
+        if record:
+            state = react_app.get_state(config)
+            answer = _final_answer_in_state(state, record.question)
+            if answer is not None:
+                registry.finish(idempotency_key, COMPLETED, answer)
+                return None, config, None, False, answer
+            if state.next:
+                inputs, resumed = None, True  # continue from the last checkpoint
+    except Exception:
+        _finish_run(idempotency_key, None, failed=True)
+        raise
+
+    return react_app, config, inputs, resumed, None
+
+
+def _finish_run(idempotency_key: Optional[str], answer: Optional[str], failed: bool = False):
+    if not idempotency_key:
+        return
+    try:
+        get_run_registry().finish(idempotency_key, FAILED if failed else COMPLETED, answer)
+    except Exception:
+        logger.exception("failed to record run %s", idempotency_key)
+
+
+def _prune_thread_state(thread_id: Optional[str]):
+    """Cap stored checkpoints for a thread after a run (best-effort)."""
+    if not thread_id:
+        return
+    try:
+        prune_thread(thread_id)
+    except Exception:
+        logger.exception("failed to prune thread %s", thread_id)
+
+
+def _find_reusable_plan(query: QueryRequest):
+    """An archived plan for a near-identical stateless question, if reuse is on."""
+    enabled = PLAN_REUSE_ENABLED if query.reuse_plans is None else query.reuse_plans
+    if not enabled or query.thread_id:
+        return None
+    try:
+        return get_plan_archive().find_similar(query.question)
+    except Exception:
+        logger.exception("plan reuse lookup failed")
+        return None
+
+
+def _archive_plan(answer: Optional[str], query: QueryRequest):
+    """Hand the plan to the background archive writer (best-effort, never blocks)."""
+    try:
+        get_plan_archive().submit(answer, query.question, query.model_provider)
+    except Exception:
+        logger.exception("failed to queue plan for archiving")
 
 
 @app.get("/health")
@@ -41,89 +340,484 @@ async def health_check():
     return {"status": "ok", "timestamp": datetime.datetime.now().isoformat()}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/profiles/{name}")
+async def download_profile(
+    name: str,
+    x_profile: Optional[str] = Header(default=None),
+    token: Optional[str] = None,
+):
+    """Download a stored profile (`.pstats`, `.txt` or `.alloc.txt`). Admin only."""
+    if not is_admin(x_profile or token):
+        return JSONResponse(status_code=403, content={"error": "Profiling is not enabled for this caller"})
+    path = profile_path(name)
+    if path is None:
+        return JSONResponse(status_code=404, content={"error": f"Profile '{name}' not found"})
+    media_type = "application/octet-stream" if name.endswith(".pstats") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@app.get("/admin/settings")
+async def read_settings(x_admin_token: Optional[str] = Header(default=None)):
+    """Current runtime settings and agent run-pool load. Admin only."""
+    if not is_admin(x_admin_token):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    return {"settings": get_settings().model_dump(), "run_pool": get_run_pool().stats()}
+
+
+@app.post("/admin/settings/reload")
+async def reload_runtime_settings(x_admin_token: Optional[str] = Header(default=None)):
+    """Re-read settings (environment + SETTINGS_FILE) in this worker and apply them. Admin only.
+
+    Invalid settings are rejected with 400 and the current ones stay in force.
+    """
+    if not is_admin(x_admin_token):
+        return JSONResponse(status_code=403, content={"error": "Admin token required"})
+    try:
+        changed = _reload("endpoint")
+    except ConfigurationError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    return {"changed": changed, "pid": os.getpid()}
+
+
+@app.get("/health/upstreams")
+async def upstream_health():
+    """Circuit-breaker state, retry counts and cache counters per upstream host."""
+    return upstream_stats()
+
+
+# ── Direct tool endpoints (no LLM) ──────────────────────────────
+# Plain `def` handlers run in FastAPI's threadpool; they share the tools'
+# upstream caches and connection pool. Tool modules are imported on first call.
+
+def _tool_result(func, *args):
+    try:
+        return func(*args)
+    except LocationNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": str(e)})
+    except ToolExecutionError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except APIConnectionError as e:
+        return JSONResponse(status_code=502, content={"error": str(e)})
+    except Exception as e:
+        logger.exception("tool endpoint failed")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/tools/cities")
+def tool_cities(q: str, limit: int = 10):
+    """City name suggestions from the offline gazetteer, most populous first."""
+    from utils.gazetteer import suggest
+
+    return {"cities": [p.model_dump() for p in suggest(q, max(1, min(limit, 50)))]}
+
+
+@app.get("/tools/weather")
+def tool_weather(city: str, start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """Forecast for a city over a trip window (default: next 7 days); climate normals beyond 16 days."""
+    from tools.weather_search import fetch_forecast
+
+    return _tool_result(fetch_forecast, city, start_date, end_date)
+
+
+@app.get("/tools/places")
+def tool_places(city: str, category: Optional[str] = None, limit: Optional[int] = None,
+                budget_level: Optional[str] = None):
+    """Attractions, restaurants or hotels around a city (see `CATEGORY_TAGS` for categories)."""
+    from tools.place_search import CATEGORY_TAGS, DEFAULT_CATEGORY, HOTEL_BUDGET_FILTERS, find_places
+
+    max_results = get_settings().place_max_results
+    category = category or DEFAULT_CATEGORY
+    limit = max_results if limit is None else limit
+    if category not in CATEGORY_TAGS:
+        return JSONResponse(status_code=400, content={
+            "error": f"Unknown category '{category}'", "categories": list(CATEGORY_TAGS),
+        })
+    if budget_level is not None and budget_level not in HOTEL_BUDGET_FILTERS:
+        return JSONResponse(status_code=400, content={
+            "error": f"Unknown budget level '{budget_level}'", "budget_levels": list(HOTEL_BUDGET_FILTERS),
+        })
+    return _tool_result(find_places, city, category, max(1, min(limit, max_results)), budget_level)
+
+
+@app.get("/tools/convert")
+def tool_convert(from_currency: str, to_currency: str, amount: float = 1.0):
+    """Convert an amount between currencies at the live rate."""
+    from tools.currency_converter import convert
+
+    return _tool_result(convert, amount, from_currency, to_currency)
+
+
+@app.post("/tools/convert/batch")
+def tool_convert_batch(request: BatchConversionRequest):
+    """Convert every amount into every target currency with cross rates from one cached table.
+
+    Batches above the `max_batch_conversions` setting are rejected with 400.
+    """
+    from tools.currency_converter import convert_batch
+
+    return _tool_result(convert_batch, request.amounts, request.from_currency, request.to_currencies)
+
+
+@app.get("/tools/budget")
+def tool_budget(
+    num_days: Annotated[int, Query(gt=0)],
+    accommodation_per_night: float,
+    transport_per_day: float,
+    food_per_day: Optional[float] = None,
+    activities_per_day: float = 0.0,
+    num_travelers: Annotated[int, Query(gt=0)] = 1,
+    miscellaneous_total: float = 0.0,
+    currency: str = "USD",
+    city: Optional[str] = None,
+    budget_level: str = "mid-range",
+):
+    """Trip budget breakdown. Without `food_per_day`, the food estimate for `city` is used."""
+    from tools.expense_calculator import budget_breakdown, food_cost_estimate
+
+    food_estimate = None
+    if food_per_day is None:
+        if not city:
+            return JSONResponse(status_code=400, content={"error": "Pass food_per_day or city"})
+        food_estimate = food_cost_estimate(city, budget_level)
+        food_per_day = food_estimate["average"] * num_travelers
+    result = _tool_result(
+        budget_breakdown, num_days, accommodation_per_night, food_per_day, transport_per_day,
+        activities_per_day, num_travelers, miscellaneous_total, currency,
+    )
+    if food_estimate is not None and isinstance(result, dict):
+        result["food_estimate"] = food_estimate
+    return result
+
+
+@app.get("/tools/budget/scenarios")
+def tool_budget_scenarios(
+    durations: str,
+    accommodation_per_night: float,
+    transport_per_day: float,
+    travelers: str = "1",
+    levels: Optional[str] = None,
+    food_per_day: Optional[float] = None,
+    activities_per_day: float = 0.0,
+    miscellaneous_total: float = 0.0,
+    city: Optional[str] = None,
+    pivot: Optional[str] = None,
+):
+    """Cost matrix over ranges of durations and group sizes (e.g. `durations=3-10&travelers=1,2,4`).
+
+    Rates are mid-range: accommodation per room-night, food and activities per
+    person per day, transport per vehicle per day. Without `food_per_day`, the
+    city's food estimate is used. `pivot=total|per_person|per_person_per_day`
+    returns one row per (days, travelers) with a column per budget level.
+    All levels are included unless `levels` lists some.
+    """
+    from tools.expense_calculator import (
+        LEVEL_RATE_MULTIPLIERS, budget_scenarios, food_cost_estimate, parse_int_list, scenario_table,
+    )
+
+    max_rows = get_settings().max_scenario_rows
+    level_list = levels.split(",") if levels else list(LEVEL_RATE_MULTIPLIERS)
+    try:
+        # Ranges are bounded before they're expanded (a public "1-3000000" would cost ~270 MB)
+        duration_list = parse_int_list(durations, max_rows)
+        traveler_list = parse_int_list(travelers, max_rows)
+        count = len(duration_list) * len(traveler_list) * len(level_list)
+        if count > max_rows:
+            return JSONResponse(status_code=400, content={
+                "error": f"{count:,} scenarios exceed the response limit of {max_rows:,}; narrow the ranges",
+            })
+        if food_per_day is None:
+            if not city:
+                return JSONResponse(status_code=400, content={"error": "Pass food_per_day or city"})
+            food_per_day = food_cost_estimate(city, "mid-range")["average"]
+        scenarios = budget_scenarios(
+            duration_list, traveler_list, level_list,
+            accommodation_per_night, food_per_day, transport_per_day, activities_per_day, miscellaneous_total,
+        )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    if pivot:
+        if pivot not in ("total", "per_person", "per_person_per_day"):
+            return JSONResponse(status_code=400, content={"error": f"Unknown pivot '{pivot}'"})
+        table = scenario_table(scenarios, pivot).reset_index()
+        table.columns = [str(c) for c in table.columns]
+        return {"count": len(scenarios), "value": pivot, **table.to_dict(orient="split", index=False)}
+    scenarios = scenarios.round(2)
+    scenarios["budget_level"] = scenarios["budget_level"].astype(str)
+    return {"count": len(scenarios), **scenarios.to_dict(orient="split", index=False)}
+
+
+@app.post("/tools/route")
+def tool_route(request: RouteRequest):
+    """Split places into days and order each day by estimated travel distance."""
+    from tools.route_planner import RoutePoint, plan_route
+
+    places = [RoutePoint(**p.model_dump()) for p in request.places]
+    start = RoutePoint(**request.start.model_dump()) if request.start else None
+    return _tool_result(plan_route, places, request.num_days, start)
+
+
+@app.get("/plans/archive")
+async def list_archived_plans(limit: int = 20, before_id: Optional[int] = None):
+    """Archived plans, newest first. Pass `next_before_id` back as `before_id` for the next page."""
+    limit = max(1, min(limit, 100))
+    archive = get_plan_archive()
+    plans = await asyncio.to_thread(archive.list, limit, before_id)
+    return {
+        "plans": [p.model_dump() for p in plans],
+        "total": await asyncio.to_thread(archive.count),
+        "next_before_id": plans[-1].id if len(plans) == limit else None,
+    }
+
+
+@app.get("/plans/search")
+async def search_plans(q: str, limit: int = 10, destination: Optional[str] = None,
+                       days: Optional[int] = None):
+    """Full-text search over archived plans (question, destination and plan text)."""
+    limit = max(1, min(limit, 50))
+    matches = await asyncio.to_thread(get_plan_archive().search, q, limit, destination, days)
+    return {"query": q, "results": [{**m.plan.model_dump(), "score": m.score} for m in matches]}
+
+
+@app.get("/plans/archive/{plan_id}")
+async def get_archived_plan(plan_id: int):
+    """One archived plan with its full text."""
+    plan = await asyncio.to_thread(get_plan_archive().get, plan_id)
+    if plan is None:
+        return JSONResponse(status_code=404, content={"error": f"Plan {plan_id} not found"})
+    return plan
+
+
+def _invoke_graph(react_app, inputs, config, durability, profiling: bool):
+    """Run the graph to completion on a run-pool thread; returns (output, profile capture)."""
+    with capture_profile("query") if profiling else nullcontext() as capture:
+        output = react_app.invoke(inputs, config=config, durability=durability)
+    return output, capture
+
+
 @app.post("/query")
-async def query_travel_agent(query: QueryRequest):
-    """Invoke the travel-planning agent and return the final answer."""
+async def query_travel_agent(
+    query: QueryRequest,
+    idempotency_key: Optional[str] = Header(default=None),
+    x_profile: Optional[str] = Header(default=None),
+    profile: Optional[str] = None,
+):
+    """Invoke the travel-planning agent and return the final answer.
+
+    With plan reuse on (`reuse_plans` or PLAN_REUSE_ENABLED), a near-identical
+    earlier question is answered from the plan archive, marked by a notice
+    and a `reused_plan` block, without running the agent.
+
+    Send an `Idempotency-Key` header to make the run crash-safe and retryable.
+    Send `X-Profile: <admin token>` (or `?profile=<admin token>`) to capture a
+    CPU and allocation profile of this one request.
+    """
+    profiling = is_admin(x_profile or profile)
     try:
-        graph = GraphBuilder(model_provider=query.model_provider)
-        react_app = graph()
+        if not idempotency_key and not profiling:
+            match = await asyncio.to_thread(_find_reusable_plan, query)
+            if match is not None:
+                plan = await asyncio.to_thread(get_plan_archive().get, match.plan.id)
+                if plan is not None:
+                    logger.info("reused archived plan %s (score %.2f)", match.plan.id, match.score)
+                    notice = (f"> ♻️ Reused plan from an earlier, similar request: \"{match.plan.question}\". "
+                              f"Send `reuse_plans: false` for a freshly generated plan.\n\n")
+                    return {
+                        "answer": notice + plan["plan"],
+                        "reused_plan": {**match.plan.model_dump(), "score": match.score},
+                    }
+
+        # Registry SQLite, graph build and checkpoint reads all block
+        react_app, config, inputs, resumed, stored_answer = await asyncio.to_thread(
+            _plan_run, query, idempotency_key)
+        thread_id = config.get("configurable", {}).get("thread_id")
+        request_span = current_span()
+        if request_span is not None:
+            request_span.set_attribute("model_provider", query.model_provider)
+            request_span.set_attribute("question_chars", len(query.question))
+            request_span.set_attribute("resumed", resumed)
+            if "metadata" in config:
+                request_span.set_attribute("model_tier", config["metadata"]["model_tier"])
+        if stored_answer is not None:
+            return {"answer": stored_answer, "thread_id": thread_id, "replayed": True}
+
+        _save_graph_diagram(react_app)
 
-        # Save graph visualisation (best-effort)
         try:
-            png_graph = react_app.get_graph().draw_mermaid_png()
-            with open("agent_graph.png", "wb") as f:
-                f.write(png_graph)
+            output, capture = await asyncio.wrap_future(get_run_pool().submit(
+                _invoke_graph, react_app, inputs,
+                _with_callbacks(config, MetricsCallbackHandler(), TracingCallbackHandler(request_span)),
+                "sync" if idempotency_key else None, profiling,
+            ))
         except Exception:
-            pass  # diagram generation is non-critical
-
-        messages = {"messages": [query.question]}
-        output = react_app.invoke(messages)
+            _finish_run(idempotency_key, None, failed=True)
+            raise
+        _prune_thread_state(thread_id)
 
         # Extract the last AI message
         if isinstance(output, dict) and "messages" in output:
             final_output = output["messages"][-1].content
         else:
             final_output = str(output)
+        _finish_run(idempotency_key, final_output)
+        _archive_plan(final_output, query)
 
-        # Save to file (best-effort)
-        try:
-            save_document(final_output)
-        except Exception:
-            pass
-
-        return {"answer": final_output}
+        response = {"answer": final_output}
+        if thread_id:
+            response["thread_id"] = thread_id
+        if resumed:
+            response["resumed"] = True
+        if capture is not None:
+            response["profile"] = capture.links()
+        return response
 
+    except RunInProgressError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
     except Exception as e:
-        print(f"ERROR: {e}")
+        logger.exception("query failed")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+def _stream_payloads(react_app, messages, config=None, durability=None):
+    """Run the graph and yield one JSON-serialisable payload per SSE event."""
+    for event in react_app.stream(messages, config=config, stream_mode="updates", durability=durability):
+        for node_name, node_output in event.items():
+            if "messages" in node_output:
+                last_msg = node_output["messages"][-1]
+                # Check if it has tool calls (intermediate step)
+                if hasattr(last_msg, "tool_calls") and last_msg.tool_calls:
+                    for tc in last_msg.tool_calls:
+                        yield {
+                            "type": "tool_call",
+                            "tool": tc["name"],
+                            "args": str(tc["args"])[:200],
+                        }
+                # Check if it's a tool response
+                elif hasattr(last_msg, "type") and last_msg.type == "tool":
+                    yield {
+                        "type": "tool_result",
+                        "tool": last_msg.name if hasattr(last_msg, "name") else "tool",
+                        "content": last_msg.content[:500] if last_msg.content else "",
+                    }
+                else:
+                    # Final AI response
+                    yield {
+                        "type": "response",
+                        "content": last_msg.content if hasattr(last_msg, "content") else str(last_msg),
+                    }
+
+
+def _run_into_event_log(react_app, messages, log, config=None, thread_id=None,
+                        idempotency_key=None, parent_span=None, query=None):
+    """Producer thread — records every event so disconnected clients can replay it."""
+    answer = None
+    with tracer.span("stream run", parent=parent_span, run_id=log.run_id) as span:
+        try:
+            durability = "sync" if idempotency_key else None
+            run_config = _with_callbacks(config, MetricsCallbackHandler(), TracingCallbackHandler(span))
+            for payload in _stream_payloads(react_app, messages, run_config, durability):
+                if payload["type"] == "response":
+                    answer = payload["content"]
+                log.append(json.dumps(payload))
+            _finish_run(idempotency_key, answer)
+            if query is not None:
+                _archive_plan(answer, query)
+            log.append(json.dumps({"type": "done"}))
+        except Exception as e:
+            span.set_error(e)
+            logger.exception("stream run %s failed", log.run_id)
+            _finish_run(idempotency_key, None, failed=True)
+            log.append(json.dumps({"type": "error", "content": str(e)}))
+        finally:
+            log.close()
+            _prune_thread_state(thread_id)
+
+
+async def _sse_from_event_log(log, last_event_id: int = 0):
+    """Replay events after `last_event_id`, then follow the run live with heartbeats."""
+    if last_event_id == 0:
+        yield f"retry: {get_settings().sse_retry_ms}\n\n"
+    while not log.is_drained(last_event_id):
+        # Waits on the event loop: an idle stream holds no threadpool thread
+        events = await log.wait_for_events_async(last_event_id, get_settings().sse_heartbeat_seconds)
+        if not events:
+            # Comment line — keeps proxies from closing an idle connection
+            yield ": heartbeat\n\n"
+            continue
+        for event_id, data in events:
+            yield f"id: {event_id}\ndata: {data}\n\n"
+            last_event_id = event_id
+
+
+def _parse_last_event_id(value: Optional[str]) -> int:
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
+
+
 @app.post("/query/stream")
-async def query_travel_agent_stream(query: QueryRequest):
-    """Stream the agent's token-by-token response via Server-Sent Events."""
+async def query_travel_agent_stream(query: QueryRequest, idempotency_key: Optional[str] = Header(default=None)):
+    """Stream the agent's response via Server-Sent Events.
+
+    The first event carries a `run_id`; a client that loses the connection can
+    resume with `GET /query/stream/{run_id}` and a `Last-Event-ID` header.
+    An `Idempotency-Key` header makes the run resumable after a worker crash.
+    """
     try:
-        graph = GraphBuilder(model_provider=query.model_provider)
-        react_app = graph()
-
-        messages = {"messages": [query.question]}
-
-        async def event_generator():
-            try:
-                for event in react_app.stream(messages, stream_mode="updates"):
-                    for node_name, node_output in event.items():
-                        if "messages" in node_output:
-                            last_msg = node_output["messages"][-1]
-                            # Check if it has tool calls (intermediate step)
-                            if hasattr(last_msg, "tool_calls") and last_msg.tool_calls:
-                                for tc in last_msg.tool_calls:
-                                    data = json.dumps({
-                                        "type": "tool_call",
-                                        "tool": tc["name"],
-                                        "args": str(tc["args"])[:200],
-                                    })
-                                    yield f"data: {data}\n\n"
-                            # Check if it's a tool response
-                            elif hasattr(last_msg, "type") and last_msg.type == "tool":
-                                data = json.dumps({
-                                    "type": "tool_result",
-                                    "tool": last_msg.name if hasattr(last_msg, "name") else "tool",
-                                    "content": last_msg.content[:500] if last_msg.content else "",
-                                })
-                                yield f"data: {data}\n\n"
-                            else:
-                                # Final AI response
-                                data = json.dumps({
-                                    "type": "response",
-                                    "content": last_msg.content if hasattr(last_msg, "content") else str(last_msg),
-                                })
-                                yield f"data: {data}\n\n"
-
-                yield f"data: {json.dumps({'type': 'done'})}\n\n"
-            except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
-
-        return StreamingResponse(event_generator(), media_type="text/event-stream")
+        react_app, config, inputs, resumed, stored_answer = await asyncio.to_thread(
+            _plan_run, query, idempotency_key)
+        thread_id = config.get("configurable", {}).get("thread_id")
+
+        log = event_logs.create()
+        log.append(json.dumps({
+            "type": "run", "run_id": log.run_id, "thread_id": thread_id, "resumed": resumed,
+        }))
+        if stored_answer is not None:
+            log.append(json.dumps({"type": "response", "content": stored_answer, "replayed": True}))
+            log.append(json.dumps({"type": "done"}))
+            log.close()
+        else:
+            # The pool carries the request id into the producer's logs
+            get_run_pool().submit(
+                _run_into_event_log, react_app, inputs, log, config, thread_id, idempotency_key,
+                current_span(), query,
+            )
+
+        return StreamingResponse(
+            _sse_from_event_log(log),
+            media_type="text/event-stream",
+            headers={"X-Run-Id": log.run_id, "Cache-Control": "no-cache"},
+        )
 
+    except RunInProgressError as e:
+        return JSONResponse(status_code=409, content={"error": str(e)})
     except Exception as e:
-        print(f"ERROR: {e}")
-        return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
+        logger.exception("stream setup failed")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/query/stream/{run_id}")
+async def resume_travel_agent_stream(
+    run_id: str,
+    last_event_id: Optional[str] = Header(default=None),
+    from_id: Optional[str] = None,
+):
+    """Reconnect to a running (or recently finished) stream and replay missed events."""
+    log = event_logs.get(run_id)
+    if log is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown or expired run '{run_id}'"})
+
+    resume_from = _parse_last_event_id(last_event_id or from_id)
+    return StreamingResponse(
+        _sse_from_event_log(log, resume_from),
+        media_type="text/event-stream",
+        headers={"X-Run-Id": run_id, "Cache-Control": "no-cache"},
+    )
@@ -5,6 +5,9 @@ SYSTEM_PROMPT = SystemMessage(
 
 ### 🛠️ TOOL CALLING
 - Use tools to get real data (weather, places, costs).
+- If the user gives travel dates, pass them to the weather tool as YYYY-MM-DD.
+- Use the route planner to group and order itinerary stops by day instead of ordering them yourself.
+- Convert several amounts or currencies with one batch conversion call, not one call per amount.
 - DO NOT type tool calls manually (e.g., function=...).
 - Let the system handle the tool execution.
 
@@ -6,9 +6,13 @@ chat history, and real-time tool-call visibility.
 
 import streamlit as st
 import requests
-import json
 import datetime
-import sseclient  # for SSE streaming
+import uuid
+
+from config.settings import get_settings
+from exception.excep_handling import APIConnectionError
+from utils.api_client import TripPlannerClient
+from utils.chat_history import ChatHistory, ChatTurn
 
 # ── Page Config ─────────────────────────────────────────────────
 st.set_page_config(
@@ -296,25 +300,30 @@ header {visibility: hidden;}
 
 
 # ── Backend Config ──────────────────────────────────────────────
-BASE_URL = "http://localhost:8000"
+# API_BASE_URL and the ui_* timeouts come from config.settings (env or SETTINGS_FILE)
+
+@st.cache_resource
+def get_api_client() -> TripPlannerClient:
+    """One keep-alive client per Streamlit process, shared by every session and rerun."""
+    return TripPlannerClient.from_settings(get_settings())
+
+
+api = get_api_client()
 
 
 def check_backend_health() -> bool:
-    """Check if the FastAPI backend is alive."""
-    try:
-        r = requests.get(f"{BASE_URL}/health", timeout=3)
-        return r.status_code == 200
-    except Exception:
-        return False
+    """Check if the FastAPI backend is alive (cached; no request on most reruns)."""
+    return api.is_healthy()
 
 
 # ── Session State Initialization ────────────────────────────────
-if "messages" not in st.session_state:
-    st.session_state.messages = []    # list of {"role": ..., "content": ...}
-if "tool_calls" not in st.session_state:
-    st.session_state.tool_calls = []  # list of tool call dicts for display
-if "trip_count" not in st.session_state:
-    st.session_state.trip_count = 0
+ui_settings = get_settings()
+if "history" not in st.session_state:
+    # Capped per-turn store; the backend thread keeps the full conversation for the agent
+    st.session_state.history = ChatHistory(max_turns=ui_settings.ui_history_max_turns)
+history: ChatHistory = st.session_state.history
+if "thread_id" not in st.session_state:
+    st.session_state.thread_id = uuid.uuid4().hex  # backend conversation thread
 
 
 # ── Sidebar ─────────────────────────────────────────────────────
@@ -353,14 +362,16 @@ with st.sidebar:
 
     st.markdown("---")
     st.markdown(f"### 📊 Session Stats")
-    st.markdown(f"**Trips Planned:** {st.session_state.trip_count}")
-    st.markdown(f"**Messages:** {len(st.session_state.messages)}")
+    st.markdown(f"**Trips Planned:** {history.plan_count}")
+    st.markdown(f"**Turns:** {history.total_turns}")
+    if history.evicted:
+        st.caption(f"Oldest {history.evicted} turn(s) dropped from this view")
 
     st.markdown("---")
     if st.button("🗑️ Clear Chat", use_container_width=True):
-        st.session_state.messages = []
-        st.session_state.tool_calls = []
-        st.session_state.trip_count = 0
+        st.session_state.history = ChatHistory(max_turns=ui_settings.ui_history_max_turns)
+        st.session_state.show_older_turns = False
+        st.session_state.thread_id = uuid.uuid4().hex
         st.rerun()
 
     st.markdown("---")
@@ -381,7 +392,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Show feature cards only when chat is empty
-if not st.session_state.messages:
+if not len(history):
     st.markdown("""
     <div class="feature-grid">
         <div class="feature-card">
@@ -418,164 +429,138 @@ if not st.session_state.messages:
     for i, suggestion in enumerate(suggestions):
         with suggestion_cols[i]:
             if st.button(f"🔹 {suggestion}", key=f"suggestion_{i}", use_container_width=True):
-                st.session_state.messages.append({"role": "user", "content": suggestion})
+                history.start_turn(suggestion)
                 st.rerun()
 
 
 # ── Chat History Display ────────────────────────────────────────
-for msg in st.session_state.messages:
-    if msg["role"] == "user":
-        st.markdown(f'<div class="user-bubble">{msg["content"]}</div>', unsafe_allow_html=True)
-    elif msg["role"] == "assistant":
-        st.markdown(f'<div class="assistant-bubble">', unsafe_allow_html=True)
-        st.markdown(msg["content"])
-        st.markdown('</div>', unsafe_allow_html=True)
-    elif msg["role"] == "tool":
-        icon_map = {
-            "get_weather_forecast": "🌤️",
-            "search_places": "📍",
-            "search_hotels": "🏨",
-            "convert_currency": "💱",
-            "get_exchange_rate": "💱",
-            "calculate_trip_budget": "💰",
-            "estimate_daily_food_cost": "🍽️",
-        }
-        icon = icon_map.get(msg.get("tool", ""), "🔧")
+TOOL_ICONS = {
+    "get_weather_forecast": "🌤️",
+    "search_places": "📍",
+    "search_hotels": "🏨",
+    "convert_currency": "💱",
+    "get_exchange_rate": "💱",
+    "convert_currency_batch": "💱",
+    "calculate_trip_budget": "💰",
+    "estimate_daily_food_cost": "🍽️",
+}
+
+
+def render_turn(turn: ChatTurn):
+    st.markdown(f'<div class="user-bubble">{turn.question}</div>', unsafe_allow_html=True)
+    if turn.tool_counts:
+        # One summary card per turn instead of a card per tool call
+        calls = " · ".join(
+            f"{TOOL_ICONS.get(tool, '🔧')} {tool}" + (f" ×{count}" if count > 1 else "")
+            for tool, count in turn.tool_counts.items()
+        )
         st.markdown(
             f'<div class="tool-card">'
-            f'<span class="tool-icon">{icon}</span>'
-            f'<span class="tool-name">{msg.get("tool", "Tool")}</span>'
-            f'<span style="color:#7a7aab">→ {msg.get("preview", "")}</span>'
+            f'<span class="tool-icon">🔧</span>'
+            f'<span class="tool-name">{turn.tool_calls} tool call(s)</span>'
+            f'<span style="color:#7a7aab">→ {calls}</span>'
             f'</div>',
             unsafe_allow_html=True,
         )
+    if turn.answer is not None:
+        st.markdown(f'<div class="assistant-bubble">', unsafe_allow_html=True)
+        st.markdown(turn.answer)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+
+# Only the newest turns are rendered on every rerun; older ones only on request
+older_turns, recent_turns = history.split(ui_settings.ui_history_visible_turns)
+if older_turns:
+    if st.toggle(f"🕘 Show {len(older_turns)} earlier turn(s)", key="show_older_turns"):
+        with st.container(border=True):
+            for turn in older_turns:
+                render_turn(turn)
+for turn in recent_turns:
+    render_turn(turn)
 
 # ── Chat Input ──────────────────────────────────────────────────
 user_input = st.chat_input("Where would you like to travel? ✈️")
 
 if user_input and user_input.strip():
-    # Append user message
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    history.start_turn(user_input)
     st.markdown(f'<div class="user-bubble">{user_input}</div>', unsafe_allow_html=True)
 
     if not is_online:
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": "⚠️ The backend server is offline. Please start it with:\n\n```bash\nuvicorn main:app --reload\n```"
-        })
+        history.finish_turn(
+            "⚠️ The backend server is offline. Please start it with:\n\n```bash\nuvicorn main:app --reload\n```",
+            error=True,
+        )
         st.rerun()
     else:
         # ── Streaming Mode ──
         if use_streaming:
             try:
                 with st.spinner("🧠 Agent is researching your trip..."):
-                    response = requests.post(
-                        f"{BASE_URL}/query/stream",
-                        json={"question": user_input, "model_provider": model_provider},
-                        stream=True,
-                        timeout=120,
-                    )
-
-                    if response.status_code == 200:
-                        client = sseclient.SSEClient(response)
-                        final_content = ""
-                        tool_placeholder = st.empty()
-                        tool_log = []
-
-                        for event in client.events():
-                            try:
-                                data = json.loads(event.data)
-                                etype = data.get("type", "")
-
-                                if etype == "tool_call":
-                                    tool_name = data.get("tool", "unknown")
-                                    args_preview = data.get("args", "")[:100]
-                                    tool_log.append(f"🔧 Calling **{tool_name}**({args_preview})")
-                                    tool_placeholder.markdown("\n\n".join(tool_log))
-                                    st.session_state.messages.append({
-                                        "role": "tool",
-                                        "tool": tool_name,
-                                        "preview": args_preview,
-                                    })
-
-                                elif etype == "tool_result":
-                                    tool_name = data.get("tool", "tool")
-                                    preview = data.get("content", "")[:80]
-                                    tool_log.append(f"✅ **{tool_name}** returned results")
-                                    tool_placeholder.markdown("\n\n".join(tool_log))
-
-                                elif etype == "response":
-                                    final_content = data.get("content", "")
-
-                                elif etype == "error":
-                                    final_content = f"⚠️ Error: {data.get('content', 'Unknown error')}"
-
-                                elif etype == "done":
-                                    break
-
-                            except json.JSONDecodeError:
-                                continue
-
-                        if final_content:
-                            st.session_state.messages.append({"role": "assistant", "content": final_content})
-                            st.session_state.trip_count += 1
-
-                    else:
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": f"⚠️ Server returned status {response.status_code}: {response.text[:300]}"
-                        })
-
+                    final_content = ""
+                    stream_failed = False
+                    tool_placeholder = st.empty()
+                    tool_log = []
+
+                    # Dropped connections are resumed by the client without losing events
+                    for data in api.stream(user_input, model_provider, st.session_state.thread_id):
+                        etype = data.get("type", "")
+
+                        if etype == "tool_call":
+                            tool_name = data.get("tool", "unknown")
+                            args_preview = data.get("args", "")[:100]
+                            tool_log.append(f"🔧 Calling **{tool_name}**({args_preview})")
+                            tool_placeholder.markdown("\n\n".join(tool_log))
+                            history.add_tool_call(tool_name)
+
+                        elif etype == "tool_result":
+                            tool_name = data.get("tool", "tool")
+                            tool_log.append(f"✅ **{tool_name}** returned results")
+                            tool_placeholder.markdown("\n\n".join(tool_log))
+
+                        elif etype == "response":
+                            final_content = data.get("content", "")
+
+                        elif etype == "error":
+                            final_content = f"⚠️ Error: {data.get('content', 'Unknown error')}"
+                            stream_failed = True
+
+                    if final_content:
+                        history.finish_turn(final_content, error=stream_failed)
+
+            except APIConnectionError as e:
+                history.finish_turn(f"⚠️ {e}", error=True)
             except Exception as e:
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": f"⚠️ Connection error: {str(e)}"
-                })
+                history.finish_turn(f"⚠️ Connection error: {str(e)}", error=True)
 
         # ── Non-Streaming Mode ──
         else:
             try:
                 with st.spinner("🧠 Agent is researching your trip..."):
-                    response = requests.post(
-                        f"{BASE_URL}/query",
-                        json={"question": user_input, "model_provider": model_provider},
-                        timeout=120,
-                    )
-
-                if response.status_code == 200:
-                    answer = response.json().get("answer", "No answer returned.")
-                    st.session_state.messages.append({"role": "assistant", "content": answer})
-                    st.session_state.trip_count += 1
-                else:
-                    error_text = response.text[:300]
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": f"⚠️ Server error ({response.status_code}): {error_text}",
-                    })
+                    result = api.query(user_input, model_provider, st.session_state.thread_id)
+
+                answer = result.get("answer", "No answer returned.")
+                history.finish_turn(answer)
 
+            except APIConnectionError as e:
+                history.finish_turn(f"⚠️ {e}", error=True)
             except requests.Timeout:
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": "⏱️ Request timed out. The trip plan may be too complex. Try simplifying your request."
-                })
+                history.finish_turn(
+                    "⏱️ Request timed out. The trip plan may be too complex. Try simplifying your request.",
+                    error=True,
+                )
             except Exception as e:
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": f"⚠️ Error: {str(e)}"
-                })
+                history.finish_turn(f"⚠️ Error: {str(e)}", error=True)
 
-        # Rerun to display the new messages
+        # Rerun to display the new turn
         st.rerun()
 
 
 # ── Download Last Trip Plan ─────────────────────────────────────
-# Show download button for the last assistant message
-assistant_msgs = [m for m in st.session_state.messages if m["role"] == "assistant"]
-if assistant_msgs:
-    last_plan = assistant_msgs[-1]["content"]
-    if len(last_plan) > 100:  # only show download for actual plans
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
-        md_content = f"""# ✈️ AI Trip Plan
+# The store keeps a pointer to the latest plan (long, non-error answer)
+last_plan = history.last_plan
+if last_plan:
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M")
+    md_content = f"""# ✈️ AI Trip Plan
 
 **Generated:** {datetime.datetime.now().strftime('%B %d, %Y at %H:%M')}  
 **Powered by:** AI Trip Planner
@@ -588,10 +573,10 @@ if assistant_msgs:
 
 *This travel plan was generated by AI. Please verify all information before your trip.*
 """
-        st.download_button(
-            label="📥 Download Trip Plan (.md)",
-            data=md_content,
-            file_name=f"Trip_Plan_{timestamp}.md",
-            mime="text/markdown",
-            use_container_width=True,
-        )
\ No newline at end of file
+    st.download_button(
+        label="📥 Download Trip Plan (.md)",
+        data=md_content,
+        file_name=f"Trip_Plan_{timestamp}.md",
+        mime="text/markdown",
+        use_container_width=True,
+    )
\ No newline at end of file
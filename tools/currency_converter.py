@@ -1,8 +1,158 @@
-"""Currency Converter Tool — uses the free ExchangeRate-API for live rates."""
+"""Currency Converter Tool — uses the free ExchangeRate-API for live rates.
 
-import requests
+Batch conversions (`convert_batch`) don't fetch a table per source currency:
+they derive every cross rate from one cached USD table. `RateMatrix` holds
+those rates as a matrix, so converting n amounts into m currencies is a single
+NumPy gather and multiply.
+"""
+
+import threading
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
 from langchain_core.tools import tool
 
+from config.settings import get_settings
+from exception.excep_handling import APIConnectionError, ToolExecutionError
+from utils.http_client import request_json
+
+
+def convert(amount: float, from_currency: str, to_currency: str) -> dict:
+    """
+    Convert an amount at the live rate and return structured data.
+
+    Raises ToolExecutionError for unknown currencies and APIConnectionError
+    when the rates API is unreachable.
+    """
+    from_currency = from_currency.upper().strip()
+    to_currency = to_currency.upper().strip()
+
+    # Free API: https://open.er-api.com/v6/latest/{base}
+    data = request_json("exchange_rates", path=f"/{from_currency}")
+
+    if data.get("result") != "success":
+        raise ToolExecutionError(f"Failed to fetch exchange rates for {from_currency}.")
+
+    rates = data.get("rates", {})
+    if to_currency not in rates:
+        raise ToolExecutionError(
+            f"Currency '{to_currency}' not found. Available currencies include: {', '.join(list(rates.keys())[:20])}..."
+        )
+
+    rate = rates[to_currency]
+    return {
+        "amount": amount,
+        "from_currency": from_currency,
+        "to_currency": to_currency,
+        "rate": rate,
+        "converted": round(amount * rate, 2),
+        "last_updated": data.get("time_last_update_utc", "N/A"),
+    }
+
+
+# ── Batch engine ──
+
+# Every cross rate is derived from this base's table
+RATE_TABLE_BASE = "USD"
+
+
+class RateMatrix:
+    """Cross rates for every currency pair of one rates table: `matrix[i, j]` = 1 codes[i] in codes[j]."""
+
+    def __init__(self, rates: dict, last_updated: str = "N/A"):
+        self.codes = sorted(rates)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        per_base = np.array([rates[code] for code in self.codes], dtype=np.float64)
+        self.matrix = per_base[np.newaxis, :] / per_base[:, np.newaxis]
+        self.last_updated = last_updated
+
+    def indices(self, codes: Sequence[str]) -> np.ndarray:
+        """Matrix indices of `codes`; raises ToolExecutionError naming any unknown code."""
+        unknown = sorted({code for code in codes if code not in self.index})
+        if unknown:
+            raise ToolExecutionError(f"Unknown currency code(s): {', '.join(unknown)}")
+        return np.fromiter((self.index[code] for code in codes), dtype=np.intp, count=len(codes))
+
+    def convert(self, amounts: np.ndarray, from_idx: np.ndarray, to_idx: np.ndarray) -> np.ndarray:
+        """(n, m) array: amount i (in currency from_idx[i]) in each of the m target currencies."""
+        return amounts[:, np.newaxis] * self.matrix[from_idx[:, np.newaxis], to_idx[np.newaxis, :]]
+
+
+_matrix: Optional[RateMatrix] = None
+_matrix_key = None
+_matrix_lock = threading.Lock()
+
+
+def get_rate_matrix() -> RateMatrix:
+    """
+    The cross-rate matrix for the current rates table.
+
+    The table comes through the upstream cache, so this is an HTTP fetch at most
+    once per `exchange_rates` cache TTL. The matrix is rebuilt only when the
+    table changes.
+    """
+    global _matrix, _matrix_key
+    data = request_json("exchange_rates", path=f"/{RATE_TABLE_BASE}")
+    if data.get("result") != "success" or not data.get("rates"):
+        raise ToolExecutionError(f"Failed to fetch exchange rates for {RATE_TABLE_BASE}.")
+    key = (data.get("time_last_update_unix"), data.get("time_last_update_utc"), len(data["rates"]))
+    with _matrix_lock:
+        if _matrix is None or key != _matrix_key:
+            _matrix = RateMatrix(data["rates"], data.get("time_last_update_utc", "N/A"))
+            _matrix_key = key
+        return _matrix
+
+
+def _codes(codes: Union[str, Sequence[str]], count: int) -> List[str]:
+    if isinstance(codes, str):
+        return [codes.upper().strip()] * count
+    if len(codes) != count:
+        raise ToolExecutionError(f"Got {len(codes)} source currencies for {count} amounts")
+    return [code.upper().strip() for code in codes]
+
+
+def convert_batch(amounts: Sequence[float], from_currency: Union[str, Sequence[str]],
+                  to_currencies: Sequence[str]) -> dict:
+    """
+    Convert every amount into every target currency in one pass.
+
+    `from_currency` is one code for all amounts or one code per amount (line
+    items priced in different currencies). Returns the converted values as rows
+    (one per amount, one column per distinct target), the column totals and the rates
+    used. Raises ToolExecutionError for unknown currencies or batches above the
+    `max_batch_conversions` setting, and APIConnectionError when the rates API
+    is unreachable.
+    """
+    # Repeated targets would add duplicate columns while totals and rates (keyed by code) hold one
+    targets = list(dict.fromkeys(code.upper().strip() for code in to_currencies))
+    if not len(amounts) or not targets:
+        raise ToolExecutionError("Pass at least one amount and one target currency")
+    max_conversions = get_settings().max_batch_conversions
+    if len(amounts) * len(targets) > max_conversions:
+        raise ToolExecutionError(
+            f"{len(amounts) * len(targets):,} conversions exceed the limit of {max_conversions:,}; split the batch"
+        )
+    sources = _codes(from_currency, len(amounts))
+
+    rates = get_rate_matrix()
+    from_idx = rates.indices(sources)
+    to_idx = rates.indices(targets)
+    values = np.asarray(amounts, dtype=np.float64)
+    converted = rates.convert(values, from_idx, to_idx)
+
+    pairs = np.unique(from_idx)
+    return {
+        "from_currency": sources,
+        "to_currencies": targets,
+        "amounts": values.tolist(),
+        "converted": np.round(converted, 2).tolist(),
+        "totals": dict(zip(targets, np.round(converted.sum(axis=0), 2).tolist())),
+        "rates": {
+            rates.codes[i]: dict(zip(targets, rates.matrix[i, to_idx].tolist())) for i in pairs
+        },
+        "last_updated": rates.last_updated,
+    }
+
 
 @tool
 def convert_currency(amount: float, from_currency: str, to_currency: str) -> str:
@@ -17,34 +167,18 @@ def convert_currency(amount: float, from_currency: str, to_currency: str) -> str
     Returns:
         A formatted string showing the converted amount and exchange rate.
     """
-    from_currency = from_currency.upper().strip()
-    to_currency = to_currency.upper().strip()
-
     try:
-        # Free API: https://open.er-api.com/v6/latest/{base}
-        url = f"https://open.er-api.com/v6/latest/{from_currency}"
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-
-        if data.get("result") != "success":
-            return f"Failed to fetch exchange rates for {from_currency}."
-
-        rates = data.get("rates", {})
-        if to_currency not in rates:
-            return f"Currency '{to_currency}' not found. Available currencies include: {', '.join(list(rates.keys())[:20])}..."
-
-        rate = rates[to_currency]
-        converted = round(amount * rate, 2)
-
+        result = convert(amount, from_currency, to_currency)
         return (
             f"💱 Currency Conversion:\n"
-            f"  {amount:,.2f} {from_currency} = {converted:,.2f} {to_currency}\n"
-            f"  Exchange Rate: 1 {from_currency} = {rate} {to_currency}\n"
-            f"  Last Updated: {data.get('time_last_update_utc', 'N/A')}"
+            f"  {result['amount']:,.2f} {result['from_currency']} = {result['converted']:,.2f} {result['to_currency']}\n"
+            f"  Exchange Rate: 1 {result['from_currency']} = {result['rate']} {result['to_currency']}\n"
+            f"  Last Updated: {result['last_updated']}"
         )
 
-    except requests.RequestException as e:
+    except ToolExecutionError as e:
+        return str(e)
+    except APIConnectionError as e:
         return f"Error fetching exchange rates: {e}"
     except Exception as e:
         return f"Unexpected error in currency converter: {e}"
@@ -69,5 +203,50 @@ def get_exchange_rate(from_currency: str, to_currency: str) -> str:
     })
 
 
+@tool
+def convert_currency_batch(amounts: List[float], from_currency: str, to_currencies: List[str],
+                           labels: Optional[List[str]] = None) -> str:
+    """
+    Convert many amounts into several currencies at once — use this instead of
+    repeated convert_currency calls, e.g. for every line item of a budget.
+
+    Args:
+        amounts: The amounts to convert, e.g. [1200.0, 350.5, 80.0].
+        from_currency: Currency code the amounts are in, e.g. 'EUR'.
+        to_currencies: Target currency codes, e.g. ['USD', 'INR', 'JPY'].
+        labels: Optional name per amount (e.g. ['Hotel', 'Food', 'Transport']).
+
+    Returns:
+        A table with each amount in every target currency, plus totals.
+    """
+    try:
+        result = convert_batch(amounts, from_currency, to_currencies)
+        targets = result["to_currencies"]
+        source = result["from_currency"][0] if result["from_currency"] else from_currency.upper()
+        if not labels or len(labels) != len(amounts):
+            labels = [f"Item {i + 1}" for i in range(len(amounts))]
+
+        lines = [
+            f"💱 Batch Conversion from {source}:",
+            f"  | Item | {source} | " + " | ".join(targets) + " |",
+            "  " + "|---" * (len(targets) + 2) + "|",
+        ]
+        for label, amount, row in zip(labels, result["amounts"], result["converted"]):
+            lines.append(f"  | {label} | {amount:,.2f} | " + " | ".join(f"{v:,.2f}" for v in row) + " |")
+        lines.append(f"  | **Total** | {sum(result['amounts']):,.2f} | "
+                     + " | ".join(f"{result['totals'][code]:,.2f}" for code in targets) + " |")
+        rates = result["rates"][source]
+        lines.append("  Rates: " + ", ".join(f"1 {source} = {rates[code]:.6g} {code}" for code in targets))
+        lines.append(f"  Last Updated: {result['last_updated']}")
+        return "\n".join(lines)
+
+    except ToolExecutionError as e:
+        return str(e)
+    except APIConnectionError as e:
+        return f"Error fetching exchange rates: {e}"
+    except Exception as e:
+        return f"Unexpected error in currency converter: {e}"
+
+
 # Export tool list for the agent
-currency_tools = [convert_currency, get_exchange_rate]
+currency_tools = [convert_currency, get_exchange_rate, convert_currency_batch]
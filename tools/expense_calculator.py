@@ -1,7 +1,63 @@
 """Expense Calculator Tool — helps estimate trip budgets and per-day costs."""
 
+import re
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+
+import numpy as np
 from langchain_core.tools import tool
 
+from exception.excep_handling import ToolExecutionError, TripPlannerException
+from utils.city_costs import CityCost, lookup_city_cost
+from utils.geocoding import geocode
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def budget_breakdown(
+    num_days: int,
+    accommodation_per_night: float,
+    food_per_day: float,
+    transport_per_day: float,
+    activities_per_day: float = 0.0,
+    num_travelers: int = 1,
+    miscellaneous_total: float = 0.0,
+    currency: str = "USD",
+) -> dict:
+    """Budget totals per category, overall, per person and per person per day."""
+    if num_days <= 0 or num_travelers <= 0:
+        raise ToolExecutionError(
+            f"num_days and num_travelers must be positive (got {num_days} and {num_travelers})"
+        )
+    accommodation_total = accommodation_per_night * num_days
+    food_total = food_per_day * num_days
+    transport_total = transport_per_day * num_days
+    activities_total = activities_per_day * num_days
+    grand_total = accommodation_total + food_total + transport_total + activities_total + miscellaneous_total
+    per_person = grand_total / num_travelers
+    per_person_per_day = per_person / num_days
+    return {
+        "num_days": num_days,
+        "num_travelers": num_travelers,
+        "currency": currency,
+        "daily_rates": {
+            "accommodation": accommodation_per_night,
+            "food": food_per_day,
+            "transport": transport_per_day,
+            "activities": activities_per_day,
+        },
+        "totals": {
+            "accommodation": accommodation_total,
+            "food": food_total,
+            "transport": transport_total,
+            "activities": activities_total,
+            "miscellaneous": miscellaneous_total,
+        },
+        "grand_total": grand_total,
+        "per_person": per_person,
+        "per_person_per_day": per_person_per_day,
+    }
+
 
 @tool
 def calculate_trip_budget(
@@ -31,31 +87,71 @@ def calculate_trip_budget(
         A detailed budget breakdown as a formatted string.
     """
     try:
-        accommodation_total = accommodation_per_night * num_days
-        food_total = food_per_day * num_days
-        transport_total = transport_per_day * num_days
-        activities_total = activities_per_day * num_days
-        grand_total = accommodation_total + food_total + transport_total + activities_total + miscellaneous_total
-        per_person = grand_total / num_travelers if num_travelers > 0 else grand_total
-        per_person_per_day = per_person / num_days if num_days > 0 else per_person
+        b = budget_breakdown(
+            num_days, accommodation_per_night, food_per_day, transport_per_day,
+            activities_per_day, num_travelers, miscellaneous_total, currency,
+        )
+        totals = b["totals"]
 
         return (
             f"💰 Trip Budget Estimate ({num_days} days, {num_travelers} traveler{'s' if num_travelers > 1 else ''})\n"
             f"{'='*50}\n\n"
-            f"  🏨 Accommodation: {accommodation_per_night:,.2f} × {num_days} nights = {accommodation_total:,.2f} {currency}\n"
-            f"  🍽  Food & Dining:  {food_per_day:,.2f} × {num_days} days  = {food_total:,.2f} {currency}\n"
-            f"  🚕 Transport:      {transport_per_day:,.2f} × {num_days} days  = {transport_total:,.2f} {currency}\n"
-            f"  🎭 Activities:     {activities_per_day:,.2f} × {num_days} days  = {activities_total:,.2f} {currency}\n"
+            f"  🏨 Accommodation: {accommodation_per_night:,.2f} × {num_days} nights = {totals['accommodation']:,.2f} {currency}\n"
+            f"  🍽  Food & Dining:  {food_per_day:,.2f} × {num_days} days  = {totals['food']:,.2f} {currency}\n"
+            f"  🚕 Transport:      {transport_per_day:,.2f} × {num_days} days  = {totals['transport']:,.2f} {currency}\n"
+            f"  🎭 Activities:     {activities_per_day:,.2f} × {num_days} days  = {totals['activities']:,.2f} {currency}\n"
             f"  🛍  Miscellaneous:  {miscellaneous_total:,.2f} {currency}\n\n"
             f"{'='*50}\n"
-            f"  📊 GRAND TOTAL:          {grand_total:,.2f} {currency}\n"
-            f"  👤 Per Person:           {per_person:,.2f} {currency}\n"
-            f"  📅 Per Person Per Day:   {per_person_per_day:,.2f} {currency}\n"
+            f"  📊 GRAND TOTAL:          {b['grand_total']:,.2f} {currency}\n"
+            f"  👤 Per Person:           {b['per_person']:,.2f} {currency}\n"
+            f"  📅 Per Person Per Day:   {b['per_person_per_day']:,.2f} {currency}\n"
         )
     except Exception as e:
         return f"Error calculating budget: {e}"
 
 
+# Approximate multipliers based on cost-of-living indices
+BUDGET_MULTIPLIERS = {
+    "budget": (0.6, "street food, local eateries, markets"),
+    "mid-range": (1.0, "casual restaurants, cafés, occasional fine dining"),
+    "luxury": (2.0, "upscale restaurants, fine dining, premium experiences"),
+}
+
+# Used when a city is neither in data/city_costs.csv nor near a city that is
+DEFAULT_FOOD_COST = 30
+
+
+def _resolve_city_cost(city: str) -> Optional[CityCost]:
+    """Dataset entry for a city; unknown towns fall back to the nearest listed city."""
+    cost = lookup_city_cost(city)
+    if cost is not None:
+        return cost
+    try:
+        location = geocode(city)
+    except TripPlannerException:
+        return None
+    return lookup_city_cost(city, location.latitude, location.longitude)
+
+
+def food_cost_estimate(city: str, budget_level: str = "mid-range") -> dict:
+    """Daily food cost (USD per person) for a city and budget level."""
+    cost = _resolve_city_cost(city)
+    base_cost = cost.food_per_day if cost is not None else DEFAULT_FOOD_COST
+    multiplier, description = BUDGET_MULTIPLIERS.get(budget_level.lower().strip(), (1.0, "mixed dining"))
+
+    estimated = round(base_cost * multiplier, 2)
+    return {
+        "city": city,
+        "budget_level": budget_level,
+        "currency": "USD",
+        "average": estimated,
+        "low": round(estimated * 0.8, 2),
+        "high": round(estimated * 1.3, 2),
+        "includes": description,
+        "based_on": cost.model_dump() if cost is not None else None,
+    }
+
+
 @tool
 def estimate_daily_food_cost(city: str, budget_level: str = "mid-range") -> str:
     """
@@ -68,49 +164,185 @@ def estimate_daily_food_cost(city: str, budget_level: str = "mid-range") -> str:
     Returns:
         An estimated daily food cost range.
     """
-    # Approximate multipliers based on cost-of-living indices
-    budget_multipliers = {
-        "budget": (0.6, "street food, local eateries, markets"),
-        "mid-range": (1.0, "casual restaurants, cafés, occasional fine dining"),
-        "luxury": (2.0, "upscale restaurants, fine dining, premium experiences"),
-    }
+    estimate = food_cost_estimate(city, budget_level)
+    based_on = estimate["based_on"]
+    if based_on is None:
+        source = "No city data — using a global average"
+    elif based_on["match"] == "nearest":
+        source = f"Based on {based_on['city']}, {based_on['country']} ({based_on['distance_km']:.0f} km away)"
+    else:
+        source = f"Based on {based_on['city']}, {based_on['country']}"
+    return (
+        f"🍽 Estimated Daily Food Cost in {city} ({budget_level}):\n"
+        f"  Range: ${estimate['low']} – ${estimate['high']} USD per person per day\n"
+        f"  Average: ~${estimate['average']} USD\n"
+        f"  Includes: {estimate['includes']}\n"
+        f"  Source: {source}\n\n"
+        f"  💡 Note: These are estimates. Actual costs may vary based on restaurants chosen."
+    )
 
-    # Base daily food costs by region (USD estimates)
-    region_costs = {
-        # South/Southeast Asia
-        "goa": 15, "mumbai": 18, "delhi": 16, "bangalore": 17, "jaipur": 14,
-        "bangkok": 15, "bali": 14, "hanoi": 12, "singapore": 35,
-        "tokyo": 40, "kyoto": 35, "seoul": 30, "osaka": 35,
-        # Europe
-        "paris": 45, "london": 50, "rome": 35, "barcelona": 35,
-        "amsterdam": 40, "berlin": 30, "prague": 25, "lisbon": 28,
-        # Americas
-        "new york": 50, "los angeles": 45, "miami": 40,
-        "cancun": 25, "rio de janeiro": 22, "buenos aires": 20,
-        # Middle East / Africa
-        "dubai": 40, "istanbul": 20, "cairo": 12, "cape town": 22,
-        # Oceania
-        "sydney": 45, "melbourne": 42, "auckland": 38,
-    }
 
-    city_lower = city.lower().strip()
-    base_cost = region_costs.get(city_lower, 30)  # default ~$30/day
+# ── Scenario engine ─────────────────────────────────────────────
+# Daily-rate multipliers per budget level, relative to the mid-range rates
+# passed in: (accommodation, food, transport, activities)
+LEVEL_RATE_MULTIPLIERS = {
+    "budget": (0.5, 0.6, 0.6, 0.5),
+    "mid-range": (1.0, 1.0, 1.0, 1.0),
+    "luxury": (2.5, 2.0, 1.8, 2.0),
+}
+TRAVELERS_PER_ROOM = 2
+TRAVELERS_PER_VEHICLE = 4
+MAX_SCENARIOS = 2_000_000
 
-    level = budget_level.lower().strip()
-    multiplier, description = budget_multipliers.get(level, (1.0, "mixed dining"))
 
-    estimated = round(base_cost * multiplier, 2)
-    low = round(estimated * 0.8, 2)
-    high = round(estimated * 1.3, 2)
+def parse_int_list(spec: Union[str, Iterable[int]], max_values: int = MAX_SCENARIOS) -> List[int]:
+    """
+    Expand '3-7,10' (or an iterable of ints) into a sorted list of unique positive ints.
 
-    return (
-        f"🍽 Estimated Daily Food Cost in {city} ({budget_level}):\n"
-        f"  Range: ${low} – ${high} USD per person per day\n"
-        f"  Average: ~${estimated} USD\n"
-        f"  Includes: {description}\n\n"
-        f"  💡 Note: These are estimates. Actual costs may vary based on restaurants chosen."
+    Raises ValueError before expanding a range once the values would exceed
+    `max_values`, so a huge range can't allocate its whole set.
+    """
+    if not isinstance(spec, str):
+        values = {int(v) for v in spec if int(v) > 0}
+        if len(values) > max_values:
+            raise ValueError(f"Too many values (max {max_values:,})")
+        return sorted(values)
+    values = set()
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        match = re.fullmatch(r"(\d+)\s*-\s*(\d+)", part)
+        if match:
+            lo, hi = sorted((int(match.group(1)), int(match.group(2))))
+            if len(values) + hi - lo + 1 > max_values:
+                raise ValueError(f"Range '{part}' has too many values (max {max_values:,})")
+            values.update(range(lo, hi + 1))
+        else:
+            if len(values) + 1 > max_values:
+                raise ValueError(f"Too many values (max {max_values:,})")
+            values.add(int(part))
+    return sorted(v for v in values if v > 0)
+
+
+def budget_scenarios(
+    durations: Iterable[int],
+    travelers: Iterable[int],
+    budget_levels: Iterable[str],
+    accommodation_per_night: float,
+    food_per_day: float,
+    transport_per_day: float,
+    activities_per_day: float = 0.0,
+    miscellaneous_total: float = 0.0,
+) -> "pd.DataFrame":
+    """
+    Cost of every (duration, travelers, budget level) combination in one pass.
+
+    Rates are mid-range figures: accommodation per room-night (two travelers
+    per room), food and activities per person per day, transport per vehicle
+    per day (four travelers per vehicle). Other levels scale them by
+    LEVEL_RATE_MULTIPLIERS.
+    """
+    durations = np.asarray(list(durations), dtype=np.int64)
+    travelers = np.asarray(list(travelers), dtype=np.int64)
+    levels = [level.lower().strip() for level in budget_levels]
+    unknown = [level for level in levels if level not in LEVEL_RATE_MULTIPLIERS]
+    if unknown:
+        raise ValueError(f"Unknown budget level(s): {', '.join(unknown)}")
+    if durations.size * travelers.size * len(levels) > MAX_SCENARIOS:
+        raise ValueError(f"Scenario grid too large (max {MAX_SCENARIOS:,} combinations)")
+
+    # Index grid, flattened: every combination is one row
+    d_idx, t_idx, l_idx = (
+        a.ravel() for a in np.meshgrid(
+            np.arange(durations.size), np.arange(travelers.size), np.arange(len(levels)), indexing="ij"
+        )
     )
+    days = durations[d_idx]
+    people = travelers[t_idx]
+    multipliers = np.array([LEVEL_RATE_MULTIPLIERS[level] for level in levels])[l_idx]
+
+    rooms = -(-people // TRAVELERS_PER_ROOM)
+    vehicles = -(-people // TRAVELERS_PER_VEHICLE)
+    accommodation = accommodation_per_night * multipliers[:, 0] * rooms * days
+    food = food_per_day * multipliers[:, 1] * people * days
+    transport = transport_per_day * multipliers[:, 2] * vehicles * days
+    activities = activities_per_day * multipliers[:, 3] * people * days
+    total = accommodation + food + transport + activities + miscellaneous_total
+    per_person = total / people
+
+    import pandas as pd  # on first use: pandas costs ~0.4 s of import time
+
+    return pd.DataFrame({
+        "num_days": days,
+        "num_travelers": people,
+        "budget_level": pd.Categorical.from_codes(l_idx, categories=levels),
+        "accommodation": accommodation,
+        "food": food,
+        "transport": transport,
+        "activities": activities,
+        "total": total,
+        "per_person": per_person,
+        "per_person_per_day": per_person / days,
+    })
+
+
+def scenario_table(scenarios: "pd.DataFrame", value: str = "total") -> "pd.DataFrame":
+    """Pivot scenarios into rows of (days, travelers) and one column per budget level."""
+    return scenarios.pivot_table(
+        index=["num_days", "num_travelers"], columns="budget_level", values=value, observed=True
+    ).round(2)
+
+
+@tool
+def compare_trip_budgets(
+    durations: List[int],
+    travelers: List[int],
+    accommodation_per_night: float,
+    food_per_day: float,
+    transport_per_day: float,
+    activities_per_day: float = 0.0,
+    budget_levels: Optional[List[str]] = None,
+    currency: str = "USD",
+) -> str:
+    """
+    Compare trip costs across several durations, group sizes and budget levels at once.
+    Prefer this over calling calculate_trip_budget repeatedly.
+
+    Args:
+        durations: Trip lengths in days to compare (e.g. [3, 5, 7]).
+        travelers: Group sizes to compare (e.g. [1, 2, 4]).
+        accommodation_per_night: Mid-range cost per room per night (2 travelers per room).
+        food_per_day: Mid-range food cost per person per day.
+        transport_per_day: Mid-range local transport cost per day (per 4 travelers).
+        activities_per_day: Mid-range activities cost per person per day. Default 0.
+        budget_levels: Any of 'budget', 'mid-range', 'luxury'. Default: all three.
+        currency: Currency code for the estimates. Default 'USD'.
+
+    Returns:
+        A Markdown table of total and per-person cost for every combination.
+    """
+    try:
+        levels = budget_levels or list(LEVEL_RATE_MULTIPLIERS)
+        scenarios = budget_scenarios(
+            parse_int_list(durations), parse_int_list(travelers), levels,
+            accommodation_per_night, food_per_day, transport_per_day, activities_per_day,
+        )
+        if len(scenarios) > 90:
+            return "Error: too many combinations for a table (max 90); narrow the ranges."
+        totals = scenario_table(scenarios, "total")
+        per_person = scenario_table(scenarios, "per_person")
+
+        header = "| Days | Travelers | " + " | ".join(f"{level} total (per person)" for level in totals.columns) + " |"
+        lines = [
+            f"💰 Budget Comparison ({currency})",
+            header,
+            "|" + "---|" * (len(totals.columns) + 2),
+        ]
+        for (days, people), row in totals.iterrows():
+            cells = [f"{row[level]:,.0f} ({per_person.loc[(days, people), level]:,.0f})" for level in totals.columns]
+            lines.append(f"| {days} | {people} | " + " | ".join(cells) + " |")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error comparing budgets: {e}"
 
 
 # Export tool list for the agent
-expense_tools = [calculate_trip_budget, estimate_daily_food_cost]
+expense_tools = [calculate_trip_budget, compare_trip_budgets, estimate_daily_food_cost]
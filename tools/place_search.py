@@ -1,8 +1,240 @@
 """Place Search Tool — search for attractions, restaurants, hotels via free APIs."""
 
-import requests
+import heapq
+import json
+import math
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
 from langchain_core.tools import tool
 
+from config.settings import get_settings
+from exception.excep_handling import APIConnectionError, LocationNotFoundError
+from utils.geocoding import Location, geocode
+from utils.http_client import request_json
+
+# Map category to OSM tags
+CATEGORY_TAGS = {
+    "tourism.attraction": '["tourism"="attraction"]',
+    "tourism.sights": '["tourism"~"attraction|museum|viewpoint|artwork"]',
+    "catering.restaurant": '["amenity"="restaurant"]',
+    "accommodation.hotel": '["tourism"~"hotel|motel|hostel|guest_house"]',
+}
+DEFAULT_CATEGORY = "tourism.attraction"
+
+# Hotel selectors per budget level, evaluated by Overpass rather than after download
+HOTEL_BUDGET_FILTERS = {
+    "budget": ['["tourism"~"hostel|motel"]', '["tourism"="hotel"]["stars"~"^[12]"]'],
+    "mid-range": ['["tourism"="guest_house"]', '["tourism"="hotel"]["stars"~"^3"]', '["tourism"="hotel"][!"stars"]'],
+    "luxury": ['["tourism"="hotel"]["stars"~"^[45]"]'],
+}
+
+# The only tags format_places renders — Overpass drops everything else server-side
+RENDERED_TAGS = ("name", "name:en", "addr:street", "addr:city", "cuisine", "stars",
+                 "opening_hours", "phone", "website")
+
+# Search radius (metres) starts from city size, widens when sparse and narrows when
+# saturated; bounds, growth and oversampling are the `place_*` settings.
+
+# Score = distance as a fraction of the radius, minus this much per filled tag share
+RICHNESS_WEIGHT = 0.5
+
+_radius_hints: "OrderedDict[tuple, int]" = OrderedDict()
+_radius_lock = threading.Lock()
+_RADIUS_HINTS_MAX = 2048
+
+
+def _initial_radius(location: Location, category: str) -> int:
+    with _radius_lock:
+        hint = _radius_hints.get((location.latitude, location.longitude, category))
+    if hint is not None:
+        return hint
+    population = location.population or 0
+    if population >= 1_000_000:
+        return 3000
+    if population >= 200_000:
+        return 5000
+    return 8000
+
+
+def _remember_radius(location: Location, category: str, radius: int):
+    with _radius_lock:
+        key = (location.latitude, location.longitude, category)
+        _radius_hints[key] = radius
+        _radius_hints.move_to_end(key)
+        while len(_radius_hints) > _RADIUS_HINTS_MAX:
+            _radius_hints.popitem(last=False)
+
+
+def build_query(selectors: List[str], lat: float, lon: float, radius: int, cap: int) -> str:
+    """Overpass QL for named places matching any selector, returning only RENDERED_TAGS and a centre point."""
+    clauses = "\n".join(
+        f'  {kind}{selector}["name"](around:{radius},{lat},{lon});'
+        for selector in selectors for kind in ("node", "way")
+    )
+    fields = ", ".join(f'{json.dumps(tag)}=t[{json.dumps(tag)}]' for tag in RENDERED_TAGS)
+    return (
+        "[out:json][timeout:15];\n"
+        f"(\n{clauses}\n);\n"
+        f"convert place ::id=id(), ::geom=center(geom()), {fields};\n"
+        f"out geom {cap};"
+    )
+
+
+def iter_elements(text: str) -> Iterator[dict]:
+    """Decode the `elements` array of an Overpass response one element at a time."""
+    decoder = json.JSONDecoder()
+    start = text.find('"elements"')
+    if start < 0:
+        raise ValueError("Overpass response has no 'elements' array")
+    pos = text.index("[", start) + 1
+    length = len(text)
+    while True:
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length:
+            raise ValueError("Overpass response ended inside 'elements'")
+        if text[pos] == "]":
+            return
+        element, pos = decoder.raw_decode(text, pos)
+        yield element
+
+
+def _coordinates(element: dict) -> tuple:
+    if "lat" in element:
+        return element["lat"], element["lon"]
+    if "center" in element:
+        return element["center"].get("lat"), element["center"].get("lon")
+    geometry = element.get("geometry")
+    if isinstance(geometry, dict) and geometry.get("type") == "Point":
+        lon, lat = geometry["coordinates"]
+        return lat, lon
+    return None, None
+
+
+def _distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 6371.0088 * 2 * math.asin(math.sqrt(min(1.0, a)))
+
+
+def rank_places(text: str, lat: float, lon: float, radius: int, limit: int) -> dict:
+    """
+    Stream-parse an Overpass response and keep the `limit` best places.
+
+    Nearer places with more filled-in details rank first; only the running
+    top-N is held in memory. Returns {"matched": n, "places": [...]}.
+    """
+    matched = 0
+    best = []
+    radius_km = radius / 1000
+    for element in iter_elements(text):
+        tags = element.get("tags", {})
+        name = tags.get("name") or tags.get("name:en")
+        if not name:
+            continue
+        matched += 1
+        el_lat, el_lon = _coordinates(element)
+        distance = _distance_km(lat, lon, el_lat, el_lon) if el_lat is not None else None
+        richness = sum(1 for tag in RENDERED_TAGS[2:] if tags.get(tag)) / (len(RENDERED_TAGS) - 2)
+        score = (distance / radius_km if distance is not None else 1.0) - RICHNESS_WEIGHT * richness
+        entry = (-score, element.get("id", 0), name, tags, el_lat, el_lon, distance)
+        if len(best) < limit:
+            heapq.heappush(best, entry)
+        elif entry > best[0]:
+            heapq.heapreplace(best, entry)
+
+    places = []
+    for _, _, name, tags, el_lat, el_lon, distance in sorted(best, reverse=True):
+        places.append({
+            "name": name,
+            "street": tags.get("addr:street", ""),
+            "city": tags.get("addr:city", ""),
+            "cuisine": tags.get("cuisine", ""),
+            "stars": tags.get("stars", ""),
+            "opening_hours": tags.get("opening_hours", ""),
+            "phone": tags.get("phone", ""),
+            "website": tags.get("website", ""),
+            "lat": el_lat,
+            "lon": el_lon,
+            "distance_km": round(distance, 2) if distance is not None else None,
+        })
+    return {"matched": matched, "places": places}
+
+
+def find_places(city: str, category: str = DEFAULT_CATEGORY, limit: Optional[int] = None,
+                budget_level: Optional[str] = None) -> dict:
+    """
+    Places of a category around a city as structured data, nearest and most detailed first.
+
+    `budget_level` ('budget', 'mid-range', 'luxury') narrows hotel searches by type
+    and star rating. `limit` defaults to the `place_max_results` setting. Raises
+    LocationNotFoundError for unknown cities and APIConnectionError when an
+    upstream is unreachable.
+    """
+    settings = get_settings()
+    limit = limit or settings.place_max_results
+    location = geocode(city)
+    if category == "accommodation.hotel" and budget_level in HOTEL_BUDGET_FILTERS:
+        selectors = HOTEL_BUDGET_FILTERS[budget_level]
+    else:
+        selectors = [CATEGORY_TAGS.get(category, CATEGORY_TAGS[DEFAULT_CATEGORY])]
+    lat, lon = location.latitude, location.longitude
+    hint_key = f"{category}:{budget_level or ''}"
+    cap = max(limit * settings.place_oversample, 40)
+    max_radius = settings.place_max_radius_m
+
+    radius = min(max(_initial_radius(location, hint_key), settings.place_min_radius_m), max_radius)
+    for expansion in range(settings.place_max_expansions + 1):
+        # Search OpenStreetMap via the Overpass API. The cache key is the query, which
+        # only carries `cap`: keep every ranked candidate and apply `limit` afterwards
+        query = build_query(selectors, lat, lon, radius, cap)
+        result = request_json(
+            "overpass", data={"data": query}, method="POST",
+            parser=lambda resp, r=radius: rank_places(resp.text, lat, lon, r, cap),
+        )
+        if result["matched"] >= limit or radius >= max_radius or expansion == settings.place_max_expansions:
+            break
+        radius = min(max_radius, int(radius * settings.place_radius_growth))
+
+    # A saturated answer means the radius could be tighter (nearer, cheaper) next time
+    next_radius = max(settings.place_min_radius_m, int(radius * 0.6)) if result["matched"] >= cap else radius
+    _remember_radius(location, hint_key, next_radius)
+
+    places = [dict(place, city=place["city"] or city) for place in result["places"][:limit]]
+    return {"location": location.model_dump(), "category": category, "budget_level": budget_level,
+            "radius_m": radius, "places": places}
+
+
+def format_places(query: str, city: str, result: dict) -> str:
+    places = result["places"]
+    if not places:
+        return f"No results found for '{query}' in {city} (category: {result['category']})."
+
+    lines = [f"📍 Results for '{query}' in {city} (top {len(places)} within {result['radius_m'] / 1000:g} km):\n"]
+    for i, place in enumerate(places, 1):
+        details = []
+        if place["street"]:
+            details.append(f"📌 {place['street']}, {place['city']}")
+        if place["distance_km"] is not None:
+            details.append(f"🚶 {place['distance_km']} km from centre")
+        if place["cuisine"]:
+            details.append(f"🍽 Cuisine: {place['cuisine']}")
+        if place["stars"]:
+            details.append(f"⭐ Stars: {place['stars']}")
+        if place["opening_hours"]:
+            details.append(f"🕐 Hours: {place['opening_hours']}")
+        if place["phone"]:
+            details.append(f"📞 {place['phone']}")
+        if place["website"]:
+            details.append(f"🔗 {place['website']}")
+
+        detail_str = " | ".join(details) if details else "No additional details available"
+        lines.append(f"  {i}. **{place['name']}** — {detail_str}")
+
+    return "\n".join(lines)
+
 
 @tool
 def search_places(query: str, city: str, category: str = "tourism.attraction") -> str:
@@ -19,81 +251,10 @@ def search_places(query: str, city: str, category: str = "tourism.attraction") -
         A formatted list of places with names, addresses, and ratings.
     """
     try:
-        # Step 1: Geocode the city
-        geo_url = "https://geocoding-api.open-meteo.com/v1/search"
-        geo_resp = requests.get(geo_url, params={"name": city, "count": 1}, timeout=10)
-        geo_resp.raise_for_status()
-        geo_data = geo_resp.json()
-
-        if not geo_data.get("results"):
-            return f"Could not find location data for '{city}'."
-
-        location = geo_data["results"][0]
-        lat = location["latitude"]
-        lon = location["longitude"]
-
-        # Step 2: Search using Geoapify Places API (free tier: 3000 req/day)
-        # Using the free Nominatim/Overpass approach as fallback
-        overpass_url = "https://overpass-api.de/api/interpreter"
-
-        # Map category to OSM tags
-        category_map = {
-            "tourism.attraction": '["tourism"="attraction"]',
-            "tourism.sights": '["tourism"~"attraction|museum|viewpoint|artwork"]',
-            "catering.restaurant": '["amenity"="restaurant"]',
-            "accommodation.hotel": '["tourism"~"hotel|motel|hostel|guest_house"]',
-        }
-        osm_tag = category_map.get(category, '["tourism"="attraction"]')
-
-        overpass_query = f"""
-        [out:json][timeout:15];
-        (
-          node{osm_tag}(around:10000,{lat},{lon});
-          way{osm_tag}(around:10000,{lat},{lon});
-        );
-        out center 15;
-        """
-
-        resp = requests.post(overpass_url, data={"data": overpass_query}, timeout=20)
-        resp.raise_for_status()
-        data = resp.json()
-
-        elements = data.get("elements", [])
-        if not elements:
-            return f"No results found for '{query}' in {city} (category: {category})."
-
-        lines = [f"📍 Results for '{query}' in {city} (showing top 15):\n"]
-        for i, el in enumerate(elements[:15], 1):
-            tags = el.get("tags", {})
-            name = tags.get("name", tags.get("name:en", "Unnamed"))
-            addr_street = tags.get("addr:street", "")
-            addr_city = tags.get("addr:city", city)
-            cuisine = tags.get("cuisine", "")
-            stars = tags.get("stars", "")
-            website = tags.get("website", "")
-            phone = tags.get("phone", "")
-            opening = tags.get("opening_hours", "")
-
-            details = []
-            if addr_street:
-                details.append(f"📌 {addr_street}, {addr_city}")
-            if cuisine:
-                details.append(f"🍽 Cuisine: {cuisine}")
-            if stars:
-                details.append(f"⭐ Stars: {stars}")
-            if opening:
-                details.append(f"🕐 Hours: {opening}")
-            if phone:
-                details.append(f"📞 {phone}")
-            if website:
-                details.append(f"🔗 {website}")
-
-            detail_str = " | ".join(details) if details else "No additional details available"
-            lines.append(f"  {i}. **{name}** — {detail_str}")
-
-        return "\n".join(lines)
-
-    except requests.RequestException as e:
+        return format_places(query, city, find_places(city, category))
+    except LocationNotFoundError as e:
+        return str(e)
+    except APIConnectionError as e:
         return f"Error searching for places: {e}"
     except Exception as e:
         return f"Unexpected error in place search tool: {e}"
@@ -111,11 +272,15 @@ def search_hotels(city: str, budget_level: str = "mid-range") -> str:
     Returns:
         A formatted list of hotel options.
     """
-    return search_places.invoke({
-        "query": f"{budget_level} hotels",
-        "city": city,
-        "category": "accommodation.hotel"
-    })
+    try:
+        result = find_places(city, "accommodation.hotel", budget_level=budget_level)
+        return format_places(f"{budget_level} hotels", city, result)
+    except LocationNotFoundError as e:
+        return str(e)
+    except APIConnectionError as e:
+        return f"Error searching for places: {e}"
+    except Exception as e:
+        return f"Unexpected error in place search tool: {e}"
 
 
 # Export tool list for the agent
@@ -0,0 +1,278 @@
+"""Route Planner Tool — split places into days and order each day by travel distance (local, no API)."""
+
+import math
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.tools import tool
+from pydantic import BaseModel, Field
+
+from exception.excep_handling import APIConnectionError, LocationNotFoundError, ToolExecutionError
+from tools.place_search import DEFAULT_CATEGORY, find_places
+
+EARTH_RADIUS_KM = 6371.0088
+# Straight-line distance times this approximates the street distance
+DETOUR_FACTOR = 1.3
+MAX_ROUTE_POINTS = 1000
+KMEANS_ITERATIONS = 25
+MAX_2OPT_MOVES = 5000
+
+
+class RoutePoint(BaseModel):
+    name: str
+    lat: float = Field(ge=-90, le=90)
+    lon: float = Field(ge=-180, le=180)
+
+
+def _unit_vectors(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    # 3-D points on the unit sphere: Euclidean k-means without antimeridian artefacts
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def distance_matrix(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    Pairwise great-circle distances (km) between all points.
+
+    Uses chord lengths between unit vectors: one matrix product and one arcsin per
+    pair instead of the per-pair trigonometry of the haversine form (same result,
+    well under a metre apart at city scale).
+    """
+    points = _unit_vectors(lats, lons)
+    chord_sq = np.clip(2.0 - 2.0 * (points @ points.T), 0.0, 4.0)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(chord_sq) / 2)
+
+
+def cluster_days(lats: np.ndarray, lons: np.ndarray, num_days: int) -> np.ndarray:
+    """
+    Day index per point: k-means on the sphere with days capped at ceil(n / num_days)
+    stops, so no day is empty or overloaded. Deterministic for a given input.
+    """
+    n = len(lats)
+    k = min(num_days, n)
+    if k <= 1:
+        return np.zeros(n, dtype=np.int64)
+    points = _unit_vectors(lats, lons)
+    capacity = math.ceil(n / k)
+
+    # k-means++ seeding with a fixed generator
+    rng = np.random.default_rng(0)
+    centres = [points[int(np.argmax(np.linalg.norm(points - points.mean(axis=0), axis=1)))]]
+    for _ in range(1, k):
+        d2 = np.clip(np.min(2.0 - 2.0 * (points @ np.array(centres).T), axis=1), 0.0, None)
+        centres.append(points[rng.choice(n, p=d2 / d2.sum()) if d2.sum() > 0 else len(centres)])
+    centres = np.array(centres)
+
+    labels = np.full(n, -1, dtype=np.int64)
+    for _ in range(KMEANS_ITERATIONS):
+        # |p - c|² for unit p; |p|² is constant per row and doesn't change the ranking
+        d2 = (centres ** 2).sum(axis=1)[None, :] - 2.0 * (points @ centres.T)
+        preferences = np.argsort(d2, axis=1, kind="stable")
+        new_labels = preferences[:, 0].copy()
+        if np.bincount(new_labels, minlength=k).max() > capacity:
+            # Balanced assignment: points with the most to lose pick their day first
+            ranked = np.take_along_axis(d2, preferences[:, :2], axis=1)
+            regret = (ranked[:, 1] - ranked[:, 0]).tolist()
+            load = [0] * k
+            rows = preferences.tolist()
+            for i in sorted(range(n), key=lambda i: -regret[i]):
+                for day in rows[i]:
+                    if load[day] < capacity:
+                        new_labels[i] = day
+                        load[day] += 1
+                        break
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for day in range(k):
+            members = points[labels == day]
+            if len(members):
+                centres[day] = members.mean(axis=0)
+    return labels
+
+
+def order_stops(dist: np.ndarray, anchor: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Visiting order for the points of `dist` (an m×m matrix): nearest neighbour, then 2-opt.
+
+    `anchor` holds distances from a fixed start/end point (e.g. the hotel) for a
+    round trip; without it the route is an open path.
+    """
+    m = len(dist)
+    if m <= 2:
+        return list(range(m))
+    # Node m is the anchor; an open path uses a virtual anchor zero distance from everything
+    full = np.zeros((m + 1, m + 1))
+    full[:m, :m] = dist
+    if anchor is not None:
+        full[m, :m] = full[:m, m] = anchor
+        first = int(np.argmin(anchor))
+    else:
+        first = int(np.argmax(dist.sum(axis=1)))   # start at an extremity
+
+    order = [first]
+    unvisited = np.ones(m, dtype=bool)
+    unvisited[first] = False
+    for _ in range(m - 1):
+        row = np.where(unvisited, dist[order[-1]], np.inf)
+        nxt = int(np.argmin(row))
+        order.append(nxt)
+        unvisited[nxt] = False
+
+    # 2-opt on anchor + order + anchor: reversing tour[i..j] replaces edges (i-1, i) and
+    # (j, j+1) with (i-1, j) and (i, j+1). All O(m²) moves are scored in one broadcast per
+    # round, and every improving move that doesn't touch another's edges is applied.
+    tour = np.array([m] + order + [m])
+    upper = np.triu(np.ones((m, m), dtype=bool), k=1)
+    moves = 0
+    while moves < MAX_2OPT_MOVES:
+        prev, cur, nxt = tour[:-2], tour[1:-1], tour[2:]
+        edge_in = full[prev, cur]        # edge ending at position i
+        edge_out = full[cur, nxt]        # edge leaving position j
+        delta = full[prev[:, None], cur[None, :]] + full[cur[:, None], nxt[None, :]] \
+            - edge_in[:, None] - edge_out[None, :]
+        delta = np.where(upper, delta, 0.0)
+        best_j = np.argmin(delta, axis=1)
+        gains = delta[np.arange(m), best_j]
+        candidates = np.flatnonzero(gains < -1e-9)
+        if not len(candidates):
+            break
+        taken = []
+        for i in candidates[np.argsort(gains[candidates])].tolist():
+            j = int(best_j[i])
+            # Segments must be separated by at least one untouched edge
+            if all(j + 1 < a or b + 1 < i for a, b in taken):
+                taken.append((i, j))
+        for i, j in taken:
+            tour[i + 1:j + 2] = tour[i + 1:j + 2][::-1]
+        moves += len(taken)
+    return tour[1:-1].tolist()
+
+
+def plan_route(points: List[RoutePoint], num_days: int, start: Optional[RoutePoint] = None) -> dict:
+    """
+    Cluster points into days and order each day; distances are estimated street km.
+
+    With `start` (e.g. the hotel), every day is a round trip from it. Raises
+    ToolExecutionError for invalid input.
+    """
+    if num_days < 1:
+        raise ToolExecutionError("num_days must be at least 1.")
+    if not points:
+        raise ToolExecutionError("No places to route.")
+    if len(points) > MAX_ROUTE_POINTS:
+        raise ToolExecutionError(f"At most {MAX_ROUTE_POINTS} places can be routed at once.")
+    if num_days > len(points):
+        raise ToolExecutionError(f"num_days ({num_days}) can't exceed the number of places ({len(points)}).")
+
+    lats = np.array([p.lat for p in points], dtype=np.float64)
+    lons = np.array([p.lon for p in points], dtype=np.float64)
+    dist = distance_matrix(lats, lons) * DETOUR_FACTOR
+    from_start = None
+    if start is not None:
+        from_start = distance_matrix(np.append(lats, start.lat), np.append(lons, start.lon))[-1, :-1] * DETOUR_FACTOR
+    labels = cluster_days(lats, lons, num_days)
+
+    days = []
+    for day in range(labels.max() + 1):
+        members = np.flatnonzero(labels == day)
+        if not len(members):
+            continue
+        sub = dist[np.ix_(members, members)]
+        anchor = from_start[members] if from_start is not None else None
+        visit = members[order_stops(sub, anchor)]
+        stops, total, previous = [], 0.0, None
+        for i in visit.tolist():
+            if previous is None:
+                leg = float(from_start[i]) if from_start is not None else 0.0
+            else:
+                leg = float(dist[previous, i])
+            total += leg
+            stops.append({"name": points[i].name, "lat": points[i].lat, "lon": points[i].lon, "leg_km": round(leg, 2)})
+            previous = i
+        entry = {"stops": stops, "centre": (float(lats[members].mean()), float(lons[members].mean()))}
+        if from_start is not None:
+            entry["return_km"] = round(float(from_start[previous]), 2)
+            total += float(from_start[previous])
+        entry["distance_km"] = round(total, 2)
+        days.append(entry)
+
+    # Visit day clusters in a nearest-neighbour chain so consecutive days are close
+    centres = np.array([d["centre"] for d in days])
+    centre_dist = distance_matrix(centres[:, 0], centres[:, 1])
+    chain = [0 if start is None else int(np.argmin(distance_matrix(
+        np.append(centres[:, 0], start.lat), np.append(centres[:, 1], start.lon))[-1, :-1]))]
+    while len(chain) < len(days):
+        row = centre_dist[chain[-1]].copy()
+        row[chain] = np.inf
+        chain.append(int(np.argmin(row)))
+
+    ordered = []
+    for number, index in enumerate(chain, 1):
+        day = days[index]
+        day.pop("centre")
+        ordered.append({"day": number, **day})
+    return {
+        "num_days": len(ordered),
+        "num_stops": len(points),
+        "start": start.model_dump() if start else None,
+        "total_km": round(sum(d["distance_km"] for d in ordered), 2),
+        "days": ordered,
+    }
+
+
+def format_route(city: str, route: dict) -> str:
+    start = route["start"]
+    lines = [f"🗺️ Route for {city}: {route['num_stops']} stops over {route['num_days']} day(s), "
+             f"≈ {route['total_km']} km in total"
+             + (f" (round trips from {start['name']})" if start else "") + "\n"]
+    for day in route["days"]:
+        stops = day["stops"]
+        if start:
+            legs = [start["name"]] + [f"{s['name']} ({s['leg_km']} km)" for s in stops]
+            legs.append(f"{start['name']} ({day['return_km']} km)")
+        else:
+            legs = [stops[0]["name"]] + [f"{s['name']} ({s['leg_km']} km)" for s in stops[1:]]
+        lines.append(f"  Day {day['day']} (≈ {day['distance_km']} km): " + " → ".join(legs))
+    lines.append("\nDistances are straight-line estimates × "
+                 f"{DETOUR_FACTOR} for streets; check transit for legs over 3 km.")
+    return "\n".join(lines)
+
+
+@tool
+def plan_itinerary_route(city: str, num_days: int, places: Optional[List[RoutePoint]] = None,
+                         category: str = DEFAULT_CATEGORY, start: Optional[RoutePoint] = None) -> str:
+    """
+    Group places into days and order each day to minimise travel distance.
+
+    Args:
+        city: City the itinerary is for (e.g. 'Rome').
+        num_days: Number of sightseeing days.
+        places: Places to visit as {name, lat, lon}. If omitted, top places of
+                `category` in the city are fetched and routed.
+        category: Place category used when `places` is omitted. Default 'tourism.attraction'.
+        start: Optional hotel {name, lat, lon}; each day then starts and ends there.
+
+    Returns:
+        A day-by-day visiting order with estimated distances between stops.
+    """
+    try:
+        if not places:
+            found = find_places(city, category)["places"]
+            places = [RoutePoint(name=p["name"], lat=p["lat"], lon=p["lon"]) for p in found if p["lat"] is not None]
+        points = [p if isinstance(p, RoutePoint) else RoutePoint(**p) for p in places]
+        if start is not None and not isinstance(start, RoutePoint):
+            start = RoutePoint(**start)
+        # A longer trip than there are places just gets one place per day
+        return format_route(city, plan_route(points, max(1, min(num_days, len(points))), start))
+    except (LocationNotFoundError, ToolExecutionError) as e:
+        return str(e)
+    except APIConnectionError as e:
+        return f"Error fetching places to route: {e}"
+    except Exception as e:
+        return f"Unexpected error in route planner tool: {e}"
+
+
+# Export tool list for the agent
+route_tools = [plan_itinerary_route]
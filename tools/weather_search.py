@@ -1,50 +1,90 @@
-"""Weather Search Tool — fetches a 7-day forecast via Open-Meteo (free, no API key)."""
+"""Weather Search Tool — trip-window forecasts via Open-Meteo (free, no API key), climate normals beyond."""
+
+import calendar
+import datetime
+from typing import List, Optional, Tuple
 
-import requests
 from langchain_core.tools import tool
 
+from exception.excep_handling import APIConnectionError, LocationNotFoundError, ToolExecutionError
+from utils.climate import CLIMATE_MAX_KM, monthly_normals
+from utils.geocoding import geocode
+from utils.http_client import request_json
 
-@tool
-def get_weather_forecast(city: str) -> str:
-    """
-    Get a 7-day weather forecast for a given city.
+# Open-Meteo forecasts at most 16 days ahead (today included)
+FORECAST_HORIZON_DAYS = 16
+DEFAULT_DAYS = 7
+MAX_TRIP_DAYS = 60
 
-    Args:
-        city: Name of the city (e.g. 'Paris', 'Goa', 'Tokyo').
+# Weather code descriptions (WMO standard)
+WMO_DESCRIPTIONS = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+    71: "Slight snowfall", 73: "Moderate snowfall", 75: "Heavy snowfall",
+    80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail",
+}
 
-    Returns:
-        A formatted string with daily temperature, precipitation, and wind speed.
-    """
+
+def _parse_date(value: str) -> datetime.date:
     try:
-        # Step 1: Geocode the city name to lat/lon
-        geo_url = "https://geocoding-api.open-meteo.com/v1/search"
-        geo_resp = requests.get(geo_url, params={"name": city, "count": 1}, timeout=10)
-        geo_resp.raise_for_status()
-        geo_data = geo_resp.json()
-
-        if not geo_data.get("results"):
-            return f"Could not find location data for '{city}'."
-
-        location = geo_data["results"][0]
-        lat = location["latitude"]
-        lon = location["longitude"]
-        resolved_name = location.get("name", city)
-        country = location.get("country", "")
-
-        # Step 2: Fetch 7-day forecast
-        weather_url = "https://api.open-meteo.com/v1/forecast"
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ToolExecutionError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+def trip_window(start_date: Optional[str], end_date: Optional[str],
+                today: Optional[datetime.date] = None) -> Tuple[datetime.date, datetime.date]:
+    """Resolve optional ISO dates to a (start, end) window that does not begin before today."""
+    today = today or datetime.date.today()
+    start = _parse_date(start_date) if start_date else today
+    end = _parse_date(end_date) if end_date else start + datetime.timedelta(days=DEFAULT_DAYS - 1)
+    if end < start:
+        raise ToolExecutionError("end_date must not be before start_date.")
+    if end < today:
+        raise ToolExecutionError("Trip dates are in the past.")
+    if (end - start).days >= MAX_TRIP_DAYS:
+        raise ToolExecutionError(f"Trip windows are limited to {MAX_TRIP_DAYS} days.")
+    return max(start, today), end
+
+
+def _months_between(start: datetime.date, end: datetime.date) -> List[int]:
+    months, cursor = [], start.replace(day=1)
+    while cursor <= end:
+        months.append(cursor.month)
+        cursor = (cursor + datetime.timedelta(days=32)).replace(day=1)
+    return months
+
+
+def fetch_forecast(city: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+    """
+    Weather for a city and trip window as structured data.
+
+    Days within the forecast horizon come from Open-Meteo (only the requested
+    window is fetched); later days are covered by monthly climate normals from
+    the nearest bundled station. `source` is "forecast", "climate" or
+    "forecast+climate". Without dates, the next 7 days are forecast.
+    Raises LocationNotFoundError for unknown cities, ToolExecutionError for bad
+    dates and APIConnectionError when an upstream is unreachable.
+    """
+    start, end = trip_window(start_date, end_date)
+    location = geocode(city)
+    horizon_end = datetime.date.today() + datetime.timedelta(days=FORECAST_HORIZON_DAYS - 1)
+
+    days = []
+    if start <= horizon_end:
         weather_params = {
-            "latitude": lat,
-            "longitude": lon,
+            "latitude": location.latitude,
+            "longitude": location.longitude,
             "daily": "temperature_2m_max,temperature_2m_min,precipitation_sum,windspeed_10m_max,weathercode",
             "timezone": "auto",
-            "forecast_days": 7,
+            "start_date": start.isoformat(),
+            "end_date": min(end, horizon_end).isoformat(),
         }
-        weather_resp = requests.get(weather_url, params=weather_params, timeout=10)
-        weather_resp.raise_for_status()
-        weather_data = weather_resp.json()
+        daily = request_json("forecast", params=weather_params).get("daily", {})
 
-        daily = weather_data.get("daily", {})
         dates = daily.get("time", [])
         temp_max = daily.get("temperature_2m_max", [])
         temp_min = daily.get("temperature_2m_min", [])
@@ -52,31 +92,85 @@ def get_weather_forecast(city: str) -> str:
         wind = daily.get("windspeed_10m_max", [])
         codes = daily.get("weathercode", [])
 
-        # Weather code descriptions (WMO standard)
-        wmo_descriptions = {
-            0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-            45: "Fog", 48: "Depositing rime fog",
-            51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-            61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-            71: "Slight snowfall", 73: "Moderate snowfall", 75: "Heavy snowfall",
-            80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
-            95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail",
-        }
-
-        lines = [f"📍 7-Day Weather Forecast for {resolved_name}, {country}\n"]
         for i, date in enumerate(dates):
             code = codes[i] if i < len(codes) else 0
-            desc = wmo_descriptions.get(code, "Unknown")
-            lines.append(
-                f"  {date}: {desc} | "
-                f"🌡 {temp_min[i]}°C – {temp_max[i]}°C | "
-                f"🌧 Precip: {precip[i]} mm | "
-                f"💨 Wind: {wind[i]} km/h"
-            )
+            days.append({
+                "date": date,
+                "weathercode": code,
+                "description": WMO_DESCRIPTIONS.get(code, "Unknown"),
+                "temp_min_c": temp_min[i],
+                "temp_max_c": temp_max[i],
+                "precipitation_mm": precip[i],
+                "wind_max_kmh": wind[i],
+            })
+
+    climate = []
+    if end > horizon_end:
+        climate_start = max(start, horizon_end + datetime.timedelta(days=1))
+        normals = monthly_normals(location.latitude, location.longitude, _months_between(climate_start, end))
+        climate = [n.model_dump() for n in normals]
+
+    source = "+".join(name for name, used in (("forecast", start <= horizon_end), ("climate", end > horizon_end)) if used)
+    return {
+        "location": location.model_dump(),
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "source": source,
+        "days": days,
+        "climate": climate,
+    }
+
+
+def format_forecast(forecast: dict) -> str:
+    location = forecast["location"]
+    lines = [f"📍 Weather for {location['name']}, {location['country']} "
+             f"({forecast['start_date']} → {forecast['end_date']})"]
+    if forecast["days"]:
+        lines.append("Source: Open-Meteo daily forecast\n")
+    for day in forecast["days"]:
+        lines.append(
+            f"  {day['date']}: {day['description']} | "
+            f"🌡 {day['temp_min_c']}°C – {day['temp_max_c']}°C | "
+            f"🌧 Precip: {day['precipitation_mm']} mm | "
+            f"💨 Wind: {day['wind_max_kmh']} km/h"
+        )
+    if "climate" in forecast["source"]:
+        climate = forecast["climate"]
+        if not climate:
+            lines.append(f"\nNo forecast exists this far ahead and no climate station lies within "
+                         f"{CLIMATE_MAX_KM:g} km, so typical conditions are unknown.")
+        else:
+            first = climate[0]
+            lines.append(f"\nSource: climate normals (typical conditions, not a forecast) — station "
+                         f"{first['station']}, {first['country']}, {first['distance_km']} km away\n")
+            for month in climate:
+                lines.append(
+                    f"  {calendar.month_name[month['month']]}: "
+                    f"🌡 avg {month['temp_min_c']}°C – {month['temp_max_c']}°C | "
+                    f"🌧 {month['precipitation_mm']} mm/month"
+                )
+    return "\n".join(lines)
+
 
-        return "\n".join(lines)
+@tool
+def get_weather_forecast(city: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
+    """
+    Get the weather for a city over the trip dates.
+
+    Args:
+        city: Name of the city (e.g. 'Paris', 'Goa', 'Tokyo').
+        start_date: First day of the trip as YYYY-MM-DD. Defaults to today.
+        end_date: Last day of the trip as YYYY-MM-DD. Defaults to 7 days from the start.
 
-    except requests.RequestException as e:
+    Returns:
+        Daily forecasts for dates up to 16 days ahead; for later dates, typical
+        monthly temperatures and rainfall. The output states which source was used.
+    """
+    try:
+        return format_forecast(fetch_forecast(city, start_date, end_date))
+    except (LocationNotFoundError, ToolExecutionError) as e:
+        return str(e)
+    except APIConnectionError as e:
         return f"Error fetching weather data: {e}"
     except Exception as e:
         return f"Unexpected error in weather tool: {e}"
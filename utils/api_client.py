@@ -0,0 +1,205 @@
+"""HTTP transport for the Streamlit UI — one keep-alive session, cached health, resumable SSE.
+
+Every Streamlit interaction reruns the whole script, so anything the UI does per
+run has to be cheap. This client is meant to be created once per process
+(`st.cache_resource`) and shared by all sessions:
+
+  * requests go through one pooled `requests.Session` (no TCP/TLS setup per query),
+  * `is_healthy()` probes `/health` at most every `ui_health_ttl` seconds, and any
+    successful API call counts as a probe,
+  * `stream()` parses the SSE stream itself and, when the connection drops before
+    the run finishes, reconnects to `GET /query/stream/{run_id}` with
+    `Last-Event-ID` so no event is lost or repeated.
+"""
+
+import json
+import threading
+import time
+from typing import Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import Settings
+from exception.excep_handling import APIConnectionError
+
+# A failed probe is cached only briefly, so a restarted backend shows up quickly
+HEALTH_FAILURE_TTL = 2.0
+_TERMINAL_EVENTS = ("done", "error")
+_DROPPED = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+class TripPlannerClient:
+    def __init__(self, base_url: str, request_timeout: float = 120.0, health_timeout: float = 3.0,
+                 health_ttl: float = 10.0, stream_idle_timeout: float = 45.0, stream_reconnects: int = 5,
+                 pool_maxsize: int = 10):
+        self.base_url = base_url.rstrip("/")
+        self.request_timeout = request_timeout
+        self.health_timeout = health_timeout
+        self.health_ttl = health_ttl
+        self.stream_idle_timeout = stream_idle_timeout
+        self.stream_reconnects = stream_reconnects
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._health = (False, 0.0)   # (healthy, monotonic time checked)
+        self._health_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "TripPlannerClient":
+        return cls(
+            settings.api_base_url,
+            request_timeout=settings.ui_request_timeout,
+            health_timeout=settings.ui_health_timeout,
+            health_ttl=settings.ui_health_ttl,
+            stream_idle_timeout=settings.ui_stream_idle_timeout,
+            stream_reconnects=settings.ui_stream_reconnects,
+        )
+
+    # ── Health ──
+
+    def _mark(self, healthy: bool):
+        with self._health_lock:
+            self._health = (healthy, time.monotonic())
+
+    def is_healthy(self, force: bool = False) -> bool:
+        """Backend reachable? Cached for `health_ttl` seconds (HEALTH_FAILURE_TTL when down)."""
+        with self._health_lock:
+            healthy, checked = self._health
+        ttl = self.health_ttl if healthy else HEALTH_FAILURE_TTL
+        if not force and checked and time.monotonic() - checked < ttl:
+            return healthy
+        try:
+            healthy = self.session.get(f"{self.base_url}/health", timeout=self.health_timeout).status_code == 200
+        except requests.RequestException:
+            healthy = False
+        self._mark(healthy)
+        return healthy
+
+    # ── Queries ──
+
+    def query(self, question: str, model_provider: str, thread_id: Optional[str] = None) -> dict:
+        """
+        Run the agent and return the JSON response.
+
+        Raises APIConnectionError for error responses and unreachable backends;
+        `requests.Timeout` is passed through so callers can word it separately.
+        """
+        try:
+            response = self.session.post(
+                f"{self.base_url}/query",
+                json={"question": question, "model_provider": model_provider, "thread_id": thread_id},
+                timeout=self.request_timeout,
+            )
+        except requests.Timeout:
+            raise
+        except requests.RequestException as e:
+            self._mark(False)
+            raise APIConnectionError("Backend unreachable", e)
+        self._mark(True)
+        if response.status_code != 200:
+            raise APIConnectionError(f"Server error ({response.status_code}): {response.text[:300]}")
+        return response.json()
+
+    def stream(self, question: str, model_provider: str, thread_id: Optional[str] = None) -> Iterator[dict]:
+        """
+        Yield the run's events (`tool_call`, `tool_result`, `response`, `done`, `error`).
+
+        Dropped connections are resumed from the last received event id, up to
+        `stream_reconnects` times in a row. Raises APIConnectionError when the
+        run can't be started or resumed.
+        """
+        timeout = (self.health_timeout, self.stream_idle_timeout)
+        try:
+            response = self.session.post(
+                f"{self.base_url}/query/stream",
+                json={"question": question, "model_provider": model_provider, "thread_id": thread_id},
+                stream=True, timeout=timeout,
+            )
+        except requests.RequestException as e:
+            self._mark(False)
+            raise APIConnectionError("Backend unreachable", e)
+        self._mark(True)
+        if response.status_code != 200:
+            raise APIConnectionError(f"Server returned status {response.status_code}: {response.text[:300]}")
+
+        run_id = response.headers.get("X-Run-Id")
+        last_event_id = 0
+        retry_seconds = 1.0
+        failures = 0
+        while True:
+            try:
+                for event_id, data, retry_ms in _sse_events(response):
+                    if retry_ms is not None:
+                        retry_seconds = retry_ms / 1000
+                    if event_id is not None:
+                        last_event_id = event_id
+                    if not data:
+                        continue
+                    failures = 0
+                    try:
+                        payload = json.loads(data)
+                    except ValueError:
+                        continue
+                    if payload.get("type") == "run":
+                        run_id = payload.get("run_id") or run_id
+                        continue
+                    yield payload
+                    if payload.get("type") in _TERMINAL_EVENTS:
+                        return
+            except _DROPPED:
+                pass
+            finally:
+                response.close()
+
+            # The stream ended before a terminal event — resume where it stopped
+            response = None
+            while response is None:
+                failures += 1
+                if run_id is None or failures > self.stream_reconnects:
+                    raise APIConnectionError("Stream interrupted and could not be resumed")
+                time.sleep(min(retry_seconds * failures, 10.0))
+                try:
+                    candidate = self.session.get(
+                        f"{self.base_url}/query/stream/{run_id}",
+                        headers={"Last-Event-ID": str(last_event_id)},
+                        stream=True, timeout=timeout,
+                    )
+                except requests.RequestException:
+                    continue
+                if candidate.status_code == 200:
+                    response = candidate
+                    continue
+                candidate.close()
+                if candidate.status_code == 404:
+                    raise APIConnectionError(f"Run {run_id} expired before the stream could be resumed")
+
+
+def _sse_events(response: requests.Response) -> Iterator[tuple]:
+    """(event id, data, retry ms) per SSE event; comments (heartbeats) are skipped."""
+    response.encoding = "utf-8"
+    event_id, data, retry_ms = None, [], None
+    # chunk_size=None: hand over whatever arrived instead of waiting for a full buffer
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if not line:
+            if data or retry_ms is not None:
+                yield event_id, "\n".join(data), retry_ms
+            event_id, data, retry_ms = None, [], None
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if field == "data":
+            data.append(value)
+        elif field == "id":
+            try:
+                event_id = int(value)
+            except ValueError:
+                pass
+        elif field == "retry":
+            try:
+                retry_ms = int(value)
+            except ValueError:
+                pass
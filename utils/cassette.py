@@ -0,0 +1,147 @@
+"""Record/replay cassettes for tool HTTP traffic.
+
+In record mode every upstream request/response pair is appended to a
+gzip-compressed JSONL cassette, keyed by a fingerprint of the request. In
+replay mode responses are served from the cassette — no network — after
+sleeping the original latency times a scale factor:
+
+    HTTP_CASSETTE_MODE=off|record|replay
+    HTTP_CASSETTE_PATH=cassettes/traffic.jsonl.gz
+    HTTP_CASSETTE_LATENCY_SCALE=1.0     # 0 = replay instantly
+"""
+
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CASSETTE_MODE = os.getenv("HTTP_CASSETTE_MODE", "off").lower()
+CASSETTE_PATH = os.getenv("HTTP_CASSETTE_PATH", "cassettes/traffic.jsonl.gz")
+CASSETTE_LATENCY_SCALE = float(os.getenv("HTTP_CASSETTE_LATENCY_SCALE", "1.0"))
+
+# Response headers worth keeping — the rest is noise for replay
+_KEPT_HEADERS = ("content-type", "retry-after", "date")
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Raised in replay mode when the cassette has no entry for a request."""
+
+
+def fingerprint(method: str, url: str, params: Optional[dict] = None, data: Optional[dict] = None) -> str:
+    """Stable hash of the parts of a request that determine its response."""
+    canonical = json.dumps(
+        [method.upper(), url, sorted((params or {}).items()), sorted((data or {}).items())],
+        default=str, separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class Cassette:
+    """A gzip JSONL file of recorded interactions."""
+
+    def __init__(self, path: str, mode: str, latency_scale: float = 1.0):
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._cursor = defaultdict(int)
+        self._writer = None
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["fingerprint"]].append(entry)
+
+    def __len__(self):
+        return sum(len(v) for v in self._entries.values())
+
+    # ── Record ──────────────────────────────────────────────────
+    def record(self, upstream: str, method: str, url: str, params, data,
+               response: requests.Response, elapsed: float):
+        entry = {
+            "fingerprint": fingerprint(method, url, params, data),
+            "upstream": upstream,
+            "method": method.upper(),
+            "url": url,
+            "params": params,
+            "data": data,
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in _KEPT_HEADERS},
+            "body": response.text,
+            "elapsed": round(elapsed, 6),
+            "recorded_at": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._writer is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # Appending adds a new gzip member; readers see one continuous stream
+                self._writer = gzip.open(self.path, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._writer.write(line)
+            self._writer.flush()
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    # ── Replay ──────────────────────────────────────────────────
+    def replay(self, method: str, url: str, params, data) -> requests.Response:
+        """
+        Serve the recorded response for a request.
+
+        Repeated requests walk through their recordings in order, then keep
+        returning the last one.
+        """
+        key = fingerprint(method, url, params, data)
+        with self._lock:
+            recordings = self._entries.get(key)
+            if not recordings:
+                raise CassetteMiss(f"No cassette entry for {method.upper()} {url} ({key})")
+            index = min(self._cursor[key], len(recordings) - 1)
+            self._cursor[key] += 1
+            entry = recordings[index]
+
+        delay = entry.get("elapsed", 0.0) * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response._content = entry["body"].encode("utf-8")
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.url = url
+        return response
+
+
+_cassette = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process-wide cassette, or None when HTTP_CASSETTE_MODE is off."""
+    global _cassette
+    if CASSETTE_MODE not in ("record", "replay"):
+        return None
+    if _cassette is None:
+        _cassette = Cassette(CASSETTE_PATH, CASSETTE_MODE, CASSETTE_LATENCY_SCALE)
+    return _cassette
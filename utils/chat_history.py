@@ -0,0 +1,72 @@
+"""Bounded chat history for the Streamlit UI.
+
+History is stored per turn (question, tools called, answer) rather than per
+message, so a streamed run adds one entry instead of one per tool event. Only the
+newest `max_turns` turns are kept. The backend thread still holds the full
+conversation for the agent. The last plan is tracked on write, so nothing scans
+the history to find it.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+# Answers shorter than this are chit-chat or errors, not downloadable plans
+MIN_PLAN_CHARS = 100
+
+
+class ChatTurn(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    error: bool = False
+    tool_counts: Dict[str, int] = Field(default_factory=dict)   # tool -> calls, in first-call order
+
+    @property
+    def tool_calls(self) -> int:
+        return sum(self.tool_counts.values())
+
+
+class ChatHistory:
+    def __init__(self, max_turns: int = 50):
+        self.turns: "deque[ChatTurn]" = deque(maxlen=max_turns)
+        self.total_turns = 0     # including turns evicted by the cap
+        self.plan_count = 0
+        self.last_plan: Optional[str] = None
+
+    def __len__(self):
+        return len(self.turns)
+
+    @property
+    def evicted(self) -> int:
+        return self.total_turns - len(self.turns)
+
+    def start_turn(self, question: str) -> ChatTurn:
+        turn = ChatTurn(question=question)
+        self.turns.append(turn)
+        self.total_turns += 1
+        return turn
+
+    def add_tool_call(self, tool: str):
+        """Count a tool call against the current turn."""
+        if self.turns:
+            counts = self.turns[-1].tool_counts
+            counts[tool] = counts.get(tool, 0) + 1
+
+    def finish_turn(self, answer: str, error: bool = False):
+        """Record the current turn's answer; successful long answers become the last plan."""
+        if not self.turns:
+            return
+        turn = self.turns[-1]
+        turn.answer = answer
+        turn.error = error
+        if not error and len(answer) > MIN_PLAN_CHARS:
+            self.last_plan = answer
+            self.plan_count += 1
+
+    def split(self, visible: int) -> tuple:
+        """(older turns, newest `visible` turns), both oldest first."""
+        visible = max(0, min(visible, len(self.turns)))
+        turns: List[ChatTurn] = list(self.turns)
+        cut = len(turns) - visible
+        return turns[:cut], turns[cut:]
@@ -0,0 +1,68 @@
+"""Conversation checkpointer — persists graph state per `thread_id` in SQLite."""
+
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+# SQLite file holding every thread's checkpoints
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB", "state/checkpoints.sqlite")
+# Checkpoints retained per thread after each run (older ones are pruned)
+MAX_CHECKPOINTS_PER_THREAD = int(os.getenv("MAX_CHECKPOINTS_PER_THREAD", "10"))
+# Messages retained in a thread's state before the oldest turns are dropped
+MAX_THREAD_MESSAGES = int(os.getenv("MAX_THREAD_MESSAGES", "40"))
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> "SqliteSaver":
+    """Return the process-wide SQLite checkpointer, creating it on first use."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                directory = os.path.dirname(CHECKPOINT_DB_PATH)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                from langgraph.checkpoint.sqlite import SqliteSaver
+
+                conn = sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False)
+                _checkpointer = SqliteSaver(conn)
+                _checkpointer.setup()
+    return _checkpointer
+
+
+def prune_thread(thread_id: str, keep_last: int = MAX_CHECKPOINTS_PER_THREAD) -> int:
+    """
+    Delete all but the newest `keep_last` checkpoints (and their writes) of a thread.
+
+    Checkpoint ids are time-ordered, so ordering by id gives newest first.
+    Returns the number of checkpoints removed.
+    """
+    saver = get_checkpointer()
+    with saver.cursor() as cur:
+        cur.execute(
+            "SELECT checkpoint_ns, checkpoint_id FROM checkpoints WHERE thread_id = ?"
+            " ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+            (thread_id, max(1, keep_last)),
+        )
+        stale = cur.fetchall()
+        for checkpoint_ns, checkpoint_id in stale:
+            cur.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+            cur.execute(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+    return len(stale)
+
+
+def thread_config(thread_id: str) -> dict:
+    """Build the `configurable` block LangGraph needs to address a thread."""
+    return {"configurable": {"thread_id": thread_id}}
@@ -0,0 +1,112 @@
+"""City cost-of-living lookup backed by the packed `data/city_costs.csv` table.
+
+Resolution order for a city name:
+  1. exact match on the normalised name or an alias (hash index, microseconds)
+  2. fuzzy match for typos (difflib over names sharing a first or second letter)
+  3. nearest city in the table, when coordinates are supplied
+Nothing is loaded until the first lookup.
+"""
+
+import difflib
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from utils.packed_table import DATA_DIR, PackedTable, haversine_km, normalize_name
+
+CITY_COSTS_CSV = os.getenv("CITY_COSTS_CSV", os.path.join(DATA_DIR, "city_costs.csv"))
+# Nearest-neighbour matches further away than this are not trusted
+MAX_NEAREST_KM = float(os.getenv("CITY_COSTS_MAX_NEAREST_KM", "300"))
+FUZZY_CUTOFF = 0.82
+
+city_cost_table = PackedTable(
+    "city_costs",
+    CITY_COSTS_CSV,
+    dtype=[
+        ("city", "U48"), ("country", "U40"), ("lat", "<f4"), ("lon", "<f4"),
+        ("food_per_day", "<f4"), ("lodging_per_night", "<f4"), ("transport_per_day", "<f4"),
+        ("aliases", "U96"),
+    ],
+    name_columns=["city"],
+    alias_column="aliases",
+)
+
+
+class CityCost(BaseModel):
+    city: str
+    country: str
+    lat: float
+    lon: float
+    food_per_day: float        # USD per person, mid-range
+    lodging_per_night: float   # USD per room, mid-range
+    transport_per_day: float   # USD, local transport
+    match: str                 # "exact", "fuzzy" or "nearest"
+    distance_km: Optional[float] = None
+
+
+_fuzzy_lock = threading.Lock()
+_fuzzy_names: Optional[List[Tuple[str, int]]] = None
+
+
+def _fuzzy_candidates() -> List[Tuple[str, int]]:
+    """(normalised name or alias, row) pairs, built on the first fuzzy lookup."""
+    global _fuzzy_names
+    with _fuzzy_lock:
+        if _fuzzy_names is None:
+            table = city_cost_table
+            names = []
+            for i, (city, aliases) in enumerate(zip(table.column("city").tolist(), table.column("aliases").tolist())):
+                for value in [city] + aliases.split("|"):
+                    normalized = normalize_name(value)
+                    if normalized:
+                        names.append((normalized, i))
+            _fuzzy_names = names
+        return _fuzzy_names
+
+
+def _to_city_cost(index: int, match: str, distance_km: Optional[float] = None) -> CityCost:
+    record = city_cost_table.record(index)
+    record.pop("aliases")
+    return CityCost(**record, match=match, distance_km=distance_km)
+
+
+def fuzzy_find(name: str) -> Optional[int]:
+    """Row of the closest name or alias above FUZZY_CUTOFF similarity."""
+    normalized = normalize_name(name)
+    if len(normalized) < 3:
+        return None
+    # Typos rarely hit both of the first two letters — cheap pre-filter
+    candidates = {
+        candidate: row for candidate, row in _fuzzy_candidates()
+        if (candidate[0] == normalized[0] or candidate[1:2] == normalized[1:2])
+        and abs(len(candidate) - len(normalized)) <= 3
+    }
+    best = difflib.get_close_matches(normalized, list(candidates), n=1, cutoff=FUZZY_CUTOFF)
+    return candidates[best[0]] if best else None
+
+
+def nearest(lat: float, lon: float, max_km: float = MAX_NEAREST_KM) -> Optional[Tuple[int, float]]:
+    """(row, distance_km) of the closest city within `max_km`."""
+    table = city_cost_table
+    distances = haversine_km(lat, lon, table.column("lat"), table.column("lon"))
+    index = int(np.argmin(distances))
+    distance = float(distances[index])
+    return (index, distance) if distance <= max_km else None
+
+
+def lookup_city_cost(city: str, lat: Optional[float] = None, lon: Optional[float] = None) -> Optional[CityCost]:
+    """Cost indices for a city, or None when nothing exact, close or nearby is known."""
+    index = city_cost_table.find(city)
+    if index is not None:
+        return _to_city_cost(index, "exact")
+    index = fuzzy_find(city)
+    if index is not None:
+        return _to_city_cost(index, "fuzzy")
+    if lat is not None and lon is not None:
+        hit = nearest(lat, lon)
+        if hit is not None:
+            return _to_city_cost(hit[0], "nearest", round(hit[1], 1))
+    return None
@@ -0,0 +1,102 @@
+"""Monthly climate normals for dates beyond the forecast horizon.
+
+`data/climate_normals.csv` holds twelve rows per station (average daily high/low
+and monthly precipitation). Stations are indexed by the 1° grid cell of their rounded
+coordinates, so a lookup only measures distances to stations in the cells that
+can lie within CLIMATE_MAX_KM; no network call is involved.
+"""
+
+import math
+import os
+import threading
+from typing import List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+from utils.packed_table import DATA_DIR, PackedTable, haversine_km
+
+CLIMATE_NORMALS_CSV = os.getenv("CLIMATE_NORMALS_CSV", os.path.join(DATA_DIR, "climate_normals.csv"))
+# Stations further away than this are not representative
+CLIMATE_MAX_KM = float(os.getenv("CLIMATE_MAX_KM", "300"))
+
+climate_table = PackedTable(
+    "climate_normals",
+    CLIMATE_NORMALS_CSV,
+    dtype=[
+        ("station", "U48"), ("country", "U40"), ("lat", "<f4"), ("lon", "<f4"), ("month", "u1"),
+        ("temp_max_c", "<f4"), ("temp_min_c", "<f4"), ("precipitation_mm", "<f4"),
+    ],
+    name_columns=["station"],
+)
+
+
+class MonthlyNormal(BaseModel):
+    station: str
+    country: str
+    distance_km: float
+    month: int
+    temp_max_c: float
+    temp_min_c: float
+    precipitation_mm: float
+
+
+_grid_lock = threading.Lock()
+_grid = None   # (sorted cell ids, first row of each station in cell order)
+
+
+def _cell(lat, lon):
+    return (np.round(lat).astype(np.int64) + 90) * 361 + (np.round(lon).astype(np.int64) + 180)
+
+
+def _station_grid():
+    global _grid
+    with _grid_lock:
+        if _grid is None:
+            table = climate_table
+            firsts = np.flatnonzero(table.column("month") == 1)
+            cells = _cell(table.column("lat")[firsts], table.column("lon")[firsts])
+            order = np.argsort(cells, kind="stable")
+            _grid = (cells[order], firsts[order])
+        return _grid
+
+
+def nearest_station(lat: float, lon: float, max_km: float = CLIMATE_MAX_KM) -> Optional[tuple]:
+    """(first row, distance_km) of the nearest station within `max_km`."""
+    cells, firsts = _station_grid()
+    centre = int(_cell(np.float64(lat), np.float64(lon)))
+    # Cells spanning max_km; a degree of longitude shrinks with latitude
+    span_lat = math.ceil(max_km / 111.0) + 1
+    span_lon = min(180, math.ceil(max_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))) + 1)
+    wanted = np.array([centre + dlat * 361 + dlon
+                       for dlat in range(-span_lat, span_lat + 1) for dlon in range(-span_lon, span_lon + 1)])
+    lo = np.searchsorted(cells, wanted, side="left")
+    hi = np.searchsorted(cells, wanted, side="right")
+    candidates = np.concatenate([firsts[a:b] for a, b in zip(lo, hi)])
+    if not len(candidates):
+        return None
+    table = climate_table
+    distances = haversine_km(lat, lon, table.column("lat")[candidates], table.column("lon")[candidates])
+    best = int(np.argmin(distances))
+    if distances[best] > max_km:
+        return None
+    return int(candidates[best]), float(distances[best])
+
+
+def monthly_normals(lat: float, lon: float, months: Sequence[int]) -> List[MonthlyNormal]:
+    """Normals for the given months (1-12) from the nearest station; empty when none is close enough."""
+    hit = nearest_station(lat, lon)
+    if hit is None:
+        return []
+    first, distance = hit
+    normals = []
+    for month in months:
+        # A station's twelve rows are contiguous and in month order
+        record = climate_table.record(first + month - 1)
+        record.pop("lat")
+        record.pop("lon")
+        normals.append(MonthlyNormal(
+            **{k: round(v, 1) if isinstance(v, float) else v for k, v in record.items()},
+            distance_km=round(distance, 1),
+        ))
+    return normals
@@ -0,0 +1,201 @@
+"""Per-run SSE event log — lets a dropped `/query/stream` client reconnect and replay.
+
+Every event a run emits gets a monotonic id and is kept in a bounded in-memory
+buffer. When the buffer overflows, evicted events can optionally be spilled to
+SQLite so a late reconnect still sees the full history.
+
+Runs write from worker threads; SSE readers wait on the event loop
+(`wait_for_events_async`), woken through an `asyncio.Event` each, so an open
+stream doesn't hold a thread while it waits.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import List, Optional, Tuple
+
+# Max events kept in memory per run before older ones are evicted (or spilled)
+MAX_EVENTS_PER_RUN = int(os.getenv("SSE_MAX_EVENTS_PER_RUN", "500"))
+# How long a finished run stays available for replay
+RUN_RETENTION_SECONDS = int(os.getenv("SSE_RUN_RETENTION_SECONDS", "600"))
+# Optional SQLite file for events evicted from memory (empty = disabled)
+SPILL_DB_PATH = os.getenv("SSE_SPILL_DB", "")
+
+Event = Tuple[int, str]
+
+
+class SqliteEventSpill:
+    """Stores events evicted from the in-memory buffer in a SQLite table."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sse_events ("
+            " run_id TEXT NOT NULL, event_id INTEGER NOT NULL, data TEXT NOT NULL,"
+            " PRIMARY KEY (run_id, event_id))"
+        )
+        self._conn.commit()
+
+    def write(self, run_id: str, event_id: int, data: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sse_events (run_id, event_id, data) VALUES (?, ?, ?)",
+                (run_id, event_id, data),
+            )
+            self._conn.commit()
+
+    def read(self, run_id: str, after_id: int, before_id: int) -> List[Event]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT event_id, data FROM sse_events"
+                " WHERE run_id = ? AND event_id > ? AND event_id < ? ORDER BY event_id",
+                (run_id, after_id, before_id),
+            ).fetchall()
+        return [(row[0], row[1]) for row in rows]
+
+    def delete(self, run_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sse_events WHERE run_id = ?", (run_id,))
+            self._conn.commit()
+
+
+class RunEventLog:
+    """Bounded, thread-safe event log for a single streaming run."""
+
+    def __init__(self, run_id: str, max_events: int = MAX_EVENTS_PER_RUN,
+                 spill: Optional[SqliteEventSpill] = None):
+        self.run_id = run_id
+        self.spill = spill
+        self.finished = False
+        self.finished_at: Optional[float] = None
+        self._events = deque()
+        self._max_events = max(1, max_events)
+        self._next_id = 1
+        self._cond = threading.Condition()
+        self._waiters = set()   # (loop, asyncio.Event) of readers waiting on an event loop
+
+    def append(self, data: str) -> int:
+        """Record an event and wake up any waiting readers. Returns its id."""
+        with self._cond:
+            event_id = self._next_id
+            self._next_id += 1
+            if len(self._events) >= self._max_events:
+                evicted_id, evicted_data = self._events.popleft()
+                if self.spill is not None:
+                    self.spill.write(self.run_id, evicted_id, evicted_data)
+            self._events.append((event_id, data))
+            self._cond.notify_all()
+            self._wake_waiters_locked()
+            return event_id
+
+    def close(self):
+        """Mark the run as finished — readers stop once they have drained the log."""
+        with self._cond:
+            self.finished = True
+            self.finished_at = time.monotonic()
+            self._cond.notify_all()
+            self._wake_waiters_locked()
+
+    def events_after(self, last_id: int) -> List[Event]:
+        """Return every retained event with an id greater than `last_id`."""
+        with self._cond:
+            return self._events_after_locked(last_id)
+
+    def wait_for_events(self, last_id: int, timeout: float) -> List[Event]:
+        """Block up to `timeout` seconds for events newer than `last_id`."""
+        with self._cond:
+            if not self.finished and self._next_id - 1 <= last_id:
+                self._cond.wait(timeout)
+            return self._events_after_locked(last_id)
+
+    async def wait_for_events_async(self, last_id: int, timeout: float) -> List[Event]:
+        """`wait_for_events` for the event loop: waits without occupying a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            ready = self.finished or self._next_id - 1 > last_id
+            if not ready:
+                self._waiters.add(waiter)
+        if not ready:
+            try:
+                await asyncio.wait_for(waiter[1].wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._cond:
+                    self._waiters.discard(waiter)
+        with self._cond:
+            if not self._reads_spill_locked(last_id):
+                return self._events_after_locked(last_id)
+        # Replaying evicted events reads SQLite — keep that off the event loop
+        return await asyncio.to_thread(self.events_after, last_id)
+
+    def _wake_waiters_locked(self):
+        for loop, event in self._waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # the reader's loop has closed
+
+    def is_drained(self, last_id: int) -> bool:
+        with self._cond:
+            return self.finished and self._next_id - 1 <= last_id
+
+    def _oldest_in_memory_locked(self) -> int:
+        return self._events[0][0] if self._events else self._next_id
+
+    def _reads_spill_locked(self, last_id: int) -> bool:
+        return self.spill is not None and last_id + 1 < self._oldest_in_memory_locked()
+
+    def _events_after_locked(self, last_id: int) -> List[Event]:
+        in_memory = [e for e in self._events if e[0] > last_id]
+        if self._reads_spill_locked(last_id):
+            return self.spill.read(self.run_id, last_id, self._oldest_in_memory_locked()) + in_memory
+        return in_memory
+
+
+class EventLogRegistry:
+    """Process-wide registry of run event logs, with expiry of finished runs."""
+
+    def __init__(self, retention_seconds: int = RUN_RETENTION_SECONDS,
+                 spill_path: str = SPILL_DB_PATH):
+        self.retention_seconds = retention_seconds
+        self.spill = SqliteEventSpill(spill_path) if spill_path else None
+        self._logs = {}
+        self._lock = threading.Lock()
+
+    def create(self) -> RunEventLog:
+        self._expire()
+        log = RunEventLog(uuid.uuid4().hex, spill=self.spill)
+        with self._lock:
+            self._logs[log.run_id] = log
+        return log
+
+    def get(self, run_id: str) -> Optional[RunEventLog]:
+        self._expire()
+        with self._lock:
+            return self._logs.get(run_id)
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                run_id for run_id, log in self._logs.items()
+                if log.finished and now - log.finished_at > self.retention_seconds
+            ]
+            for run_id in expired:
+                del self._logs[run_id]
+        if self.spill is not None:
+            for run_id in expired:
+                self.spill.delete(run_id)
+
+
+# Shared registry used by the API
+event_logs = EventLogRegistry()
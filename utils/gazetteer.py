@@ -0,0 +1,74 @@
+"""Offline gazetteer: bundled city coordinates resolved without a network call.
+
+`data/gazetteer.csv` lists large cities (roughly 1M+ inhabitants) plus common
+travel destinations, with ASCII-folded aliases and exonyms. Rows are sorted by
+population so an ambiguous name resolves to the largest place. The table is
+packed and memory-mapped by utils.packed_table: exact names hit the hash index,
+prefixes hit the sorted name index.
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from utils.packed_table import DATA_DIR, PackedTable, normalize_name
+
+GAZETTEER_CSV = os.getenv("GAZETTEER_CSV", os.path.join(DATA_DIR, "gazetteer.csv"))
+
+gazetteer_table = PackedTable(
+    "gazetteer",
+    GAZETTEER_CSV,
+    dtype=[
+        ("name", "U48"), ("country", "U40"), ("lat", "<f4"), ("lon", "<f4"),
+        ("population", "<u4"), ("aliases", "U96"),
+    ],
+    name_columns=["name"],
+    alias_column="aliases",
+    prefix_index=True,
+)
+
+
+class Place(BaseModel):
+    name: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+
+
+def _to_place(index: int) -> Place:
+    record = gazetteer_table.record(index)
+    record.pop("aliases")
+    # float32 storage: drop the noise past the CSV's 4 decimals
+    record["lat"], record["lon"] = round(record["lat"], 4), round(record["lon"], 4)
+    return Place(**record)
+
+
+def resolve(query: str) -> Optional[Place]:
+    """
+    Exact name or alias lookup. Accepts "City, Country" — the country part must
+    match when given, so "Paris, Texas" misses rather than returning France.
+    """
+    index = gazetteer_table.find(query)
+    if index is not None:
+        return _to_place(index)
+    if "," not in query:
+        return None
+    city, _, country = query.partition(",")
+    index = gazetteer_table.find(city)
+    if index is None:
+        return None
+    place = _to_place(index)
+    return place if normalize_name(place.country) == normalize_name(country) else None
+
+
+def suggest(prefix: str, limit: int = 10) -> List[Place]:
+    """Places whose name or alias starts with `prefix`, most populous first."""
+    rows = gazetteer_table.complete(prefix)
+    if not rows:
+        return []
+    population = gazetteer_table.column("population")[rows]
+    ranked = [rows[i] for i in np.argsort(-population.astype(np.int64), kind="stable")[:limit]]
+    return [_to_place(i) for i in ranked]
@@ -0,0 +1,59 @@
+"""City geocoding shared by the weather and place tools.
+
+Common destinations resolve from the bundled offline gazetteer (utils.gazetteer);
+everything else goes to the Open-Meteo geocoding API.
+"""
+
+import os
+from typing import Optional
+
+from pydantic import BaseModel
+
+from exception.excep_handling import LocationNotFoundError
+from logger.logging import get_logger
+from utils.gazetteer import resolve
+from utils.http_client import request_json
+from utils.metrics import observe_geocode
+
+logger = get_logger("ai_trip_planner.upstream")
+
+GAZETTEER_ENABLED = os.getenv("GAZETTEER_ENABLED", "true").lower() == "true"
+
+
+class Location(BaseModel):
+    name: str
+    country: str = ""
+    latitude: float
+    longitude: float
+    population: Optional[int] = None
+    source: str = "api"   # "gazetteer" or "api"
+
+
+def geocode(city: str) -> Location:
+    """Resolve a city name to coordinates. Raises LocationNotFoundError if unknown."""
+    if GAZETTEER_ENABLED:
+        place = resolve(city)
+        if place is not None:
+            observe_geocode("gazetteer")
+            return Location(
+                name=place.name,
+                country=place.country,
+                latitude=place.lat,
+                longitude=place.lon,
+                population=place.population,
+                source="gazetteer",
+            )
+        logger.debug("gazetteer miss for %r, calling geocoding API", city)
+
+    observe_geocode("api")
+    geo_data = request_json("geocoding", params={"name": city, "count": 1})
+    if not geo_data.get("results"):
+        raise LocationNotFoundError(f"Could not find location data for '{city}'.")
+    result = geo_data["results"][0]
+    return Location(
+        name=result.get("name", city),
+        country=result.get("country", ""),
+        latitude=result["latitude"],
+        longitude=result["longitude"],
+        population=result.get("population"),
+    )
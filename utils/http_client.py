@@ -0,0 +1,340 @@
+"""Shared HTTP layer for the tools — pooled session, retries, circuit breakers, stale cache.
+
+Every upstream (geocoding, forecast, Overpass, ER-API) gets:
+  * bounded retries with full-jitter exponential backoff on transient errors,
+  * a circuit breaker that fails fast while the host keeps failing,
+  * a TTL cache whose expired entries are still served when the host is down.
+
+Timeouts, retry, breaker and cache tuning come from `config.settings` and are
+re-applied to the live clients when settings are reloaded.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import Settings, UpstreamTuning, get_settings, on_reload
+from exception.excep_handling import APIConnectionError
+from logger.logging import get_logger
+from utils.cassette import CassetteMiss, get_cassette
+from utils.metrics import observe_upstream
+from utils.tracing import tracer
+
+logger = get_logger("ai_trip_planner.upstream")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamConfig(UpstreamTuning):
+    url: str
+
+
+UPSTREAM_URLS: Dict[str, str] = {
+    "geocoding": os.getenv("GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search"),
+    "forecast": os.getenv("FORECAST_URL", "https://api.open-meteo.com/v1/forecast"),
+    "overpass": os.getenv("OVERPASS_URL", "https://overpass-api.de/api/interpreter"),
+    "exchange_rates": os.getenv("EXCHANGE_RATES_URL", "https://open.er-api.com/v6/latest"),
+}
+
+
+def upstream_config(name: str, settings: Settings) -> UpstreamConfig:
+    return UpstreamConfig(url=UPSTREAM_URLS[name], **settings.upstreams[name].model_dump())
+
+
+class CircuitBreaker:
+    """Classic closed → open → half-open breaker for one upstream host."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent right now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """End a half-open probe without a verdict on the host."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class TTLCache:
+    """Small LRU cache that remembers when each entry was stored."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return (value, age_seconds) or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self._data.move_to_end(key)
+            value, stored_at = entry
+            return value, time.monotonic() - stored_at
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def resize(self, max_size: int):
+        with self._lock:
+            self.max_size = max_size
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class UpstreamClient:
+    """Resilient JSON client for a single named upstream."""
+
+    def __init__(self, name: str, config: UpstreamConfig, session: requests.Session):
+        self.name = name
+        self.config = config
+        self.session = session
+        self.breaker = CircuitBreaker(config.failure_threshold, config.reset_timeout)
+        self.cache = TTLCache(config.cache_size)
+        self.stats = {
+            "requests": 0, "retries": 0, "failures": 0, "short_circuited": 0,
+            "cache_hits": 0, "cache_misses": 0, "stale_served": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def configure(self, config: UpstreamConfig):
+        """Apply new tuning to the live client; cached entries and breaker state are kept."""
+        with self.breaker._lock:
+            self.breaker.failure_threshold = config.failure_threshold
+            self.breaker.reset_timeout = config.reset_timeout
+        self.cache.resize(config.cache_size)
+        self.config = config
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def request_json(self, path: str = "", params: Optional[dict] = None,
+                     data: Optional[dict] = None, method: str = "GET",
+                     parser: Optional[Callable[[requests.Response], Any]] = None) -> Any:
+        """Fetch and decode a response, using the cache, retries and breaker."""
+        url = self.config.url + path
+        key = json.dumps([method, url, params, data], sort_keys=True, default=str)
+
+        with tracer.span(f"http {self.name}", kind="client", upstream=self.name,
+                         method=method, path=path or "/") as span:
+            cached = self.cache.get(key)
+            if cached is not None and cached[1] <= self.config.cache_ttl:
+                self._count("cache_hits")
+                span.set_attribute("cache", "hit")
+                return cached[0]
+            self._count("cache_misses")
+            span.set_attribute("cache", "miss")
+
+            try:
+                value = self._fetch(method, url, params, data, parser or (lambda r: r.json()))
+            except APIConnectionError:
+                if cached is not None and cached[1] <= self.config.max_stale:
+                    self._count("stale_served")
+                    span.set_attribute("cache", "stale")
+                    return cached[0]
+                raise
+
+            self.cache.set(key, value)
+            return value
+
+    def _fetch(self, method, url, params, data, parser):
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            logger.warning("%s short-circuited (breaker open)", self.name, extra={"upstream": self.name})
+            raise APIConnectionError(f"{self.name} is unavailable (circuit open), try again later")
+
+        # Every exit must settle the breaker, or a half-open probe stays "in flight" forever
+        settled = False
+        try:
+            last_error = None
+            for attempt in range(self.config.max_attempts):
+                if attempt:
+                    self._count("retries")
+                    logger.info("retrying %s (attempt %d): %s", self.name, attempt + 1, last_error,
+                                extra={"upstream": self.name})
+                    time.sleep(self._backoff(attempt, last_error))
+                self._count("requests")
+                started = time.perf_counter()
+                try:
+                    resp = self._send(method, url, params, data)
+                    if resp.status_code in RETRYABLE_STATUS:
+                        observe_upstream(self.name, "retryable_status", time.perf_counter() - started)
+                        last_error = requests.HTTPError(f"{resp.status_code} from {self.name}", response=resp)
+                        continue
+                    resp.raise_for_status()
+                    value = parser(resp)
+                except requests.HTTPError as e:
+                    # Non-retryable client error — the host is healthy, the request isn't
+                    observe_upstream(self.name, "client_error", time.perf_counter() - started)
+                    self.breaker.record_success()
+                    settled = True
+                    raise APIConnectionError(f"{self.name} request failed", e)
+                except ValueError as e:
+                    observe_upstream(self.name, "invalid_response", time.perf_counter() - started)
+                    self.breaker.record_success()
+                    settled = True
+                    raise APIConnectionError(f"{self.name} returned an invalid response", e)
+                except CassetteMiss as e:
+                    # Nothing was sent, so the host's health is unknown: only free the probe
+                    self.breaker.release_probe()
+                    settled = True
+                    raise APIConnectionError(f"{self.name} has no recorded response", e)
+                except requests.RequestException as e:
+                    # Connection resets, timeouts, truncated bodies — worth another try
+                    observe_upstream(self.name, "network_error", time.perf_counter() - started)
+                    last_error = e
+                    continue
+                elapsed = time.perf_counter() - started
+                observe_upstream(self.name, "ok", elapsed)
+                logger.debug("%s %s %s", self.name, method, resp.status_code,
+                             extra={"upstream": self.name, "duration_ms": round(elapsed * 1000, 1)})
+                self.breaker.record_success()
+                settled = True
+                return value
+
+            self._count("failures")
+            self.breaker.record_failure()
+            settled = True
+            logger.error("%s failed after %d attempts: %s", self.name, self.config.max_attempts, last_error,
+                         extra={"upstream": self.name})
+            raise APIConnectionError(
+                f"{self.name} failed after {self.config.max_attempts} attempts", last_error
+            )
+        finally:
+            if not settled:
+                # Unexpected error (e.g. a parser bug): count it against the host
+                self._count("failures")
+                self.breaker.record_failure()
+
+    def _send(self, method, url, params, data) -> requests.Response:
+        """Send one attempt — or record/replay it when a cassette is active."""
+        cassette = get_cassette()
+        if cassette is not None and cassette.mode == "replay":
+            return cassette.replay(method, url, params, data)
+        started = time.perf_counter()
+        resp = self.session.request(method, url, params=params, data=data, timeout=self.config.timeout)
+        if cassette is not None:
+            cassette.record(self.name, method, url, params, data, resp, time.perf_counter() - started)
+        return resp
+
+    def _backoff(self, attempt: int, last_error) -> float:
+        retry_after = None
+        response = getattr(last_error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                retry_after = None
+        if retry_after is not None and retry_after <= self.config.backoff_cap:
+            return retry_after
+        return random.uniform(0, min(self.config.backoff_cap, self.config.backoff_base * 2 ** attempt))
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats.update({
+            "breaker_state": self.breaker.state,
+            "breaker_opened_total": self.breaker.times_opened,
+            "consecutive_failures": self.breaker.failures,
+            "cache_entries": len(self.cache),
+        })
+        return stats
+
+
+def _mount_adapter(session: requests.Session, pool_maxsize: int):
+    # Requests already holding a connection finish on the old adapter's pool
+    adapter = HTTPAdapter(pool_connections=len(UPSTREAM_URLS), pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    _mount_adapter(session, get_settings().http_pool_maxsize)
+    return session
+
+
+_session = _build_session()
+_clients: Dict[str, UpstreamClient] = {
+    name: UpstreamClient(name, upstream_config(name, get_settings()), _session) for name in UPSTREAM_URLS
+}
+
+
+def _apply_settings(old: Settings, new: Settings):
+    for name, client in _clients.items():
+        client.configure(upstream_config(name, new))
+    if new.http_pool_maxsize != old.http_pool_maxsize:
+        _mount_adapter(_session, new.http_pool_maxsize)
+
+
+on_reload(_apply_settings)
+
+
+def get_upstream(name: str) -> UpstreamClient:
+    """Return the shared client for a named upstream (see UPSTREAM_URLS)."""
+    return _clients[name]
+
+
+def request_json(upstream: str, path: str = "", params: Optional[dict] = None,
+                 data: Optional[dict] = None, method: str = "GET", parser=None) -> Any:
+    """Convenience wrapper: `get_upstream(upstream).request_json(...)`."""
+    return get_upstream(upstream).request_json(path, params=params, data=data, method=method, parser=parser)
+
+
+def upstream_stats() -> Dict[str, dict]:
+    """Breaker state, retry and cache counters for every upstream."""
+    return {name: client.snapshot() for name, client in _clients.items()}
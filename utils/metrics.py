@@ -0,0 +1,289 @@
+"""Prometheus metrics for the API, graph nodes, tools, LLM calls, model routing and upstream HTTP.
+
+Hot-path cost is a dict lookup plus a histogram observe; upstream breaker and
+cache counters are read from utils.http_client only when /metrics is scraped.
+"""
+
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from logger.logging import get_logger
+
+logger = get_logger("ai_trip_planner.agent")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+HTTP_REQUESTS = Counter(
+    "trip_planner_http_requests_total", "API requests served", ["endpoint", "method", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "trip_planner_http_request_seconds", "API request latency (time to response headers)",
+    ["endpoint"], buckets=LATENCY_BUCKETS,
+)
+NODE_LATENCY = Histogram(
+    "trip_planner_graph_node_seconds", "LangGraph node execution time", ["node"], buckets=LATENCY_BUCKETS
+)
+TOOL_LATENCY = Histogram(
+    "trip_planner_tool_seconds", "Tool execution time", ["tool"], buckets=LATENCY_BUCKETS
+)
+TOOL_ERRORS = Counter(
+    "trip_planner_tool_errors_total", "Tool calls that raised or returned an error", ["tool"]
+)
+LLM_LATENCY = Histogram(
+    "trip_planner_llm_call_seconds", "Chat model call latency", ["model"], buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "trip_planner_llm_tokens_total", "Tokens used by chat model calls", ["model", "kind"]
+)
+LLM_ERRORS = Counter(
+    "trip_planner_llm_errors_total", "Chat model calls that raised", ["model"]
+)
+REACT_ITERATIONS = Histogram(
+    "trip_planner_react_iterations", "Agent (LLM) turns per graph run",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 25),
+)
+UPSTREAM_LATENCY = Histogram(
+    "trip_planner_upstream_request_seconds", "Outbound HTTP attempt latency",
+    ["upstream", "outcome"], buckets=LATENCY_BUCKETS,
+)
+GEOCODE_LOOKUPS = Counter(
+    "trip_planner_geocode_lookups_total", "City resolutions by source", ["source"]
+)
+ROUTE_DECISIONS = Counter(
+    "trip_planner_route_decisions_total", "Model tier choices: per request, and downshifts inside a run",
+    ["tier", "reason"],
+)
+AGENT_STEP_LATENCY = Histogram(
+    "trip_planner_agent_step_seconds", "Agent (LLM) step latency by model tier", ["tier"], buckets=LATENCY_BUCKETS
+)
+RUN_LATENCY = Histogram(
+    "trip_planner_agent_run_seconds", "Graph run latency by the tier it was routed to", ["tier"],
+    buckets=LATENCY_BUCKETS,
+)
+SETTINGS_RELOADS = Counter(
+    "trip_planner_settings_reloads_total", "Settings reloads by trigger and result", ["trigger", "result"]
+)
+
+# Tools report failures as strings for the LLM rather than raising
+_TOOL_ERROR_PREFIXES = ("Error", "Unexpected error", "Could not find")
+
+
+class UpstreamCollector:
+    """Exports breaker state and retry/cache counters from utils.http_client at scrape time."""
+
+    _BREAKER_STATES = ("closed", "half_open", "open")
+
+    def describe(self):
+        # Lets the registry skip calling collect() at import time
+        return []
+
+    def collect(self):
+        from utils.http_client import upstream_stats
+
+        stats = upstream_stats()
+        state = GaugeMetricFamily(
+            "trip_planner_upstream_breaker_state", "1 for the breaker's current state",
+            labels=["upstream", "state"],
+        )
+        counters = {
+            name: CounterMetricFamily(f"trip_planner_upstream_{name}", help_text, labels=["upstream"])
+            for name, help_text in (
+                ("requests", "Outbound HTTP attempts"),
+                ("retries", "Retried HTTP attempts"),
+                ("failures", "Requests that failed after all retries"),
+                ("short_circuited", "Requests rejected by an open circuit breaker"),
+                ("breaker_opened", "Times the circuit breaker opened"),
+                ("cache_hits", "Responses served fresh from cache"),
+                ("cache_misses", "Lookups that missed the fresh cache"),
+                ("stale_served", "Expired cache entries served because the host failed"),
+            )
+        }
+        for upstream, snap in stats.items():
+            for breaker_state in self._BREAKER_STATES:
+                state.add_metric([upstream, breaker_state], 1.0 if snap["breaker_state"] == breaker_state else 0.0)
+            for name, family in counters.items():
+                key = "breaker_opened_total" if name == "breaker_opened" else name
+                family.add_metric([upstream], snap[key])
+        yield state
+        yield from counters.values()
+
+
+REGISTRY.register(UpstreamCollector())
+
+
+class RunPoolCollector:
+    """Exports the agent run pool's size and load (utils.run_pool) at scrape time."""
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        from utils import run_pool
+
+        if run_pool._pool is None:
+            return
+        stats = run_pool._pool.stats()
+        for name, help_text in (("size", "Agent runs allowed at once"),
+                                ("active", "Agent runs executing"),
+                                ("queued", "Agent runs waiting for a slot")):
+            family = GaugeMetricFamily(f"trip_planner_agent_runs_{name}", help_text)
+            family.add_metric([], stats[name])
+            yield family
+
+
+REGISTRY.register(RunPoolCollector())
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback that times graph nodes, tools and LLM calls.
+
+    Create one per request and pass it in the run config's `callbacks`.
+    """
+
+    def __init__(self):
+        self._started: Dict[UUID, tuple] = {}
+        self.agent_turns = 0
+
+    def _start(self, run_id: UUID, kind: str, label: str):
+        self._started[run_id] = (kind, label, time.perf_counter())
+
+    def _stop(self, run_id: UUID) -> Optional[tuple]:
+        entry = self._started.pop(run_id, None)
+        if entry is None:
+            return None
+        kind, label, started = entry
+        return kind, label, time.perf_counter() - started
+
+    # ── Graph nodes ─────────────────────────────────────────────
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None,
+                       metadata: Optional[Dict[str, Any]] = None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._start(run_id, "graph", (metadata or {}).get("model_tier", "unrouted"))
+        elif node and kwargs.get("name") == node:
+            if node == "agent":
+                self.agent_turns += 1
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        stopped = self._stop(run_id)
+        if stopped is None:
+            return
+        kind, label, elapsed = stopped
+        if kind == "node":
+            NODE_LATENCY.labels(label).observe(elapsed)
+        elif kind == "graph":
+            REACT_ITERATIONS.observe(self.agent_turns)
+            RUN_LATENCY.labels(label).observe(elapsed)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+    # ── Tools ───────────────────────────────────────────────────
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        stopped = self._stop(run_id)
+        if stopped is None:
+            return
+        _, tool_name, elapsed = stopped
+        TOOL_LATENCY.labels(tool_name).observe(elapsed)
+        content = getattr(output, "content", output)
+        if isinstance(content, str) and content.startswith(_TOOL_ERROR_PREFIXES):
+            TOOL_ERRORS.labels(tool_name).inc()
+            logger.warning("tool %s returned an error", tool_name,
+                           extra={"tool": tool_name, "duration_ms": round(elapsed * 1000, 1)})
+        else:
+            logger.debug("tool %s finished", tool_name,
+                         extra={"tool": tool_name, "duration_ms": round(elapsed * 1000, 1)})
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        stopped = self._stop(run_id)
+        if stopped is not None:
+            TOOL_LATENCY.labels(stopped[1]).observe(stopped[2])
+            TOOL_ERRORS.labels(stopped[1]).inc()
+            logger.warning("tool %s raised: %s", stopped[1], error, extra={"tool": stopped[1]})
+
+    # ── LLM calls ───────────────────────────────────────────────
+    def on_chat_model_start(self, serialized, messages, *, run_id,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        self._start(run_id, "llm", model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        stopped = self._stop(run_id)
+        if stopped is None:
+            return
+        _, model, elapsed = stopped
+        LLM_LATENCY.labels(model).observe(elapsed)
+        prompt_tokens, completion_tokens = token_usage(response)
+        if prompt_tokens:
+            LLM_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(model, "completion").inc(completion_tokens)
+        logger.debug("llm turn %s", self.agent_turns, extra={
+            "model": model, "duration_ms": round(elapsed * 1000, 1),
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+        })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        stopped = self._stop(run_id)
+        if stopped is not None:
+            LLM_LATENCY.labels(stopped[1]).observe(stopped[2])
+            LLM_ERRORS.labels(stopped[1]).inc()
+            logger.warning("llm call to %s failed: %s", stopped[1], error, extra={"model": stopped[1]})
+
+
+def token_usage(response) -> tuple:
+    """Extract (prompt, completion) token counts from an LLMResult."""
+    for generations in response.generations or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+
+def observe_upstream(upstream: str, outcome: str, elapsed: float):
+    """Record one outbound HTTP attempt (called by utils.http_client)."""
+    UPSTREAM_LATENCY.labels(upstream, outcome).observe(elapsed)
+
+
+def observe_geocode(source: str):
+    """Record where a city was resolved: "gazetteer" or "api" (called by utils.geocoding)."""
+    GEOCODE_LOOKUPS.labels(source).inc()
+
+
+def observe_route(tier: str, reason: str):
+    """Record a routing decision, or a downshift (reason "downshift") inside a run (called by agent.router)."""
+    ROUTE_DECISIONS.labels(tier, reason).inc()
+
+
+def observe_agent_step(tier: str, elapsed: float):
+    """Record one agent LLM step on a model tier (called by agent.workflow)."""
+    AGENT_STEP_LATENCY.labels(tier).observe(elapsed)
+
+
+def observe_settings_reload(trigger: str, result: str):
+    """Record a settings reload: trigger "endpoint" or "signal", result "changed", "unchanged" or "invalid"."""
+    SETTINGS_RELOADS.labels(trigger, result).inc()
+
+
+def record_http_request(endpoint: str, method: str, status: int, elapsed: float):
+    """Record one API request (called by the FastAPI middleware)."""
+    HTTP_REQUESTS.labels(endpoint, method, str(status)).inc()
+    HTTP_LATENCY.labels(endpoint).observe(elapsed)
+
+
+def render_latest() -> tuple:
+    """Return (body, content_type) in the Prometheus text exposition format."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
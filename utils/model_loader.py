@@ -1,13 +1,23 @@
-"""Model loader — validates API keys and provides LLM instances."""
+"""Model loader — validates API keys and provides LLM instances.
 
+Provider SDKs are imported on first use: `langchain_google_genai` alone takes
+most of a second to import, and a process usually talks to one provider.
+Environment variables (including `.env`) are loaded by the entry point.
+"""
+
+import importlib
 import os
-from dotenv import load_dotenv
+from typing import Optional
+
 from pydantic import BaseModel, Field, ValidationError
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-# Load environment variables
-load_dotenv(override=True)
+from config.settings import get_settings
+
+# Provider name -> SDK module, imported by the load_* method that needs it
+PROVIDER_MODULES = {
+    "google": "langchain_google_genai",
+    "groq": "langchain_groq",
+}
 
 
 class ModelConfig(BaseModel):
@@ -38,22 +48,47 @@ class ModelLoader:
         self.config_loader = ConfigLoader()
         self.config = self.config_loader.get_config()
 
-    def load_groq_model(self, model_name: str = "llama-3.3-70b-versatile"):
-        """Load a Groq-hosted model (default: Llama 3.3 70B)."""
+    def load_groq_model(self, model_name: Optional[str] = None):
+        """Load a Groq-hosted model (default: the `groq_model` setting)."""
         if not self.config.groq_api_key:
             raise ValueError("GROQ_API_KEY is not set in environment variables.")
+        from langchain_groq import ChatGroq
+
+        settings = get_settings()
         return ChatGroq(
             api_key=self.config.groq_api_key,
-            model_name=model_name,
-            temperature=0,
+            model_name=model_name or settings.groq_model,
+            temperature=settings.llm_temperature,
         )
 
-    def load_google_model(self, model_name: str = "gemini-2.5-flash-lite"):
-        """Load a Google Gemini model (default: gemini-2.5-flash-lite)."""
+    def load_google_model(self, model_name: Optional[str] = None):
+        """Load a Google Gemini model (default: the `google_model` setting)."""
         if not self.config.google_api_key:
             raise ValueError("GOOGLE_API_KEY is not set in environment variables.")
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        settings = get_settings()
         return ChatGoogleGenerativeAI(
             google_api_key=self.config.google_api_key,
-            model=model_name,
-            temperature=0,
-        )
\ No newline at end of file
+            model=model_name or settings.google_model,
+            temperature=settings.llm_temperature,
+        )
+
+    def load_model(self, provider: str, tier: str = "strong"):
+        """Load `provider`'s model for a routing tier ("fast" or "strong")."""
+        settings = get_settings()
+        if provider == "groq":
+            return self.load_groq_model(settings.groq_fast_model if tier == "fast" else settings.groq_model)
+        return self.load_google_model(settings.google_fast_model if tier == "fast" else settings.google_model)
+
+
+def preload_providers() -> list:
+    """Import the SDKs of providers whose API key is set; returns their names."""
+    config = ConfigLoader().get_config()
+    keys = {"google": config.google_api_key, "groq": config.groq_api_key}
+    loaded = []
+    for provider, module in PROVIDER_MODULES.items():
+        if keys[provider]:
+            importlib.import_module(module)
+            loaded.append(provider)
+    return loaded
@@ -0,0 +1,216 @@
+"""Packed, memory-mapped lookup tables for bundled reference data.
+
+A CSV under `data/` is compiled once into two `.npy` files in PACKED_CACHE_DIR:
+
+    <name>.rows.npy   structured array, one record per CSV row
+    <name>.keys.npy   sorted (hash, row) pairs over normalised names and aliases
+    <name>.names.npy  sorted (name, row) pairs, only for tables with `prefix_index`
+
+All are opened with `mmap_mode="r"`, so loading costs a few syscalls and pages
+are read only when touched. Exact lookups hash the normalised name and binary
+search the key array; prefix lookups binary search the sorted names the same
+way — no per-process dict or trie to build.
+"""
+
+import csv
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PACKED_CACHE_DIR = os.getenv("PACKED_CACHE_DIR", "state/cache")
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Bump when the on-disk layout changes so stale caches are rebuilt
+FORMAT_VERSION = 1
+
+KEY_DTYPE = np.dtype([("hash", "<u8"), ("row", "<u4")])
+NAME_DTYPE = np.dtype([("name", "U64"), ("row", "<u4")])
+
+
+def normalize_name(text: str) -> str:
+    """ASCII-fold, lower-case and collapse punctuation: 'São Paulo ' -> 'sao paulo'."""
+    folded = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", " ", folded.lower()).strip()
+
+
+def name_hash(normalized: str) -> int:
+    return int.from_bytes(hashlib.blake2b(normalized.encode(), digest_size=8).digest(), "little")
+
+
+class PackedTable:
+    """
+    A read-only table compiled from a CSV and memory-mapped on first use.
+
+    `dtype` lists the columns to keep (NumPy types, e.g. "<f4" or "U48").
+    `name_columns` are indexed by normalised name; `alias_column`, if given,
+    holds extra names separated by `|`. With `prefix_index`, the same names are
+    also stored sorted so `complete()` can answer prefix queries.
+    """
+
+    def __init__(self, name: str, csv_path: str, dtype: Sequence[Tuple[str, str]],
+                 name_columns: Sequence[str], alias_column: Optional[str] = None,
+                 prefix_index: bool = False, cache_dir: str = PACKED_CACHE_DIR):
+        self.name = name
+        self.csv_path = csv_path
+        self.dtype = np.dtype(list(dtype))
+        self.name_columns = list(name_columns)
+        self.alias_column = alias_column
+        self.prefix_index = prefix_index
+        self.cache_dir = cache_dir
+        self._rows = None
+        self._keys = None
+        self._names = None
+        self._lock = threading.Lock()
+
+    # ── Build ───────────────────────────────────────────────────
+    def _paths(self) -> Tuple[str, ...]:
+        base = os.path.join(self.cache_dir, f"{self.name}.v{FORMAT_VERSION}")
+        paths = (f"{base}.rows.npy", f"{base}.keys.npy")
+        return paths + (f"{base}.names.npy",) if self.prefix_index else paths
+
+    def _stale(self) -> bool:
+        paths = self._paths()
+        if not all(os.path.exists(p) for p in paths):
+            return True
+        return os.path.getmtime(self.csv_path) > min(os.path.getmtime(p) for p in paths)
+
+    def build(self):
+        """Compile the CSV into the packed row and key files (atomic replace)."""
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            records = list(csv.DictReader(f))
+
+        rows = np.zeros(len(records), dtype=self.dtype)
+        for column in self.dtype.names:
+            kind = self.dtype[column].kind
+            values = [r.get(column) or "" for r in records]
+            if kind in "fiu":
+                rows[column] = [float(v) if v != "" else 0 for v in values]
+            else:
+                rows[column] = values
+
+        keys: Dict[int, int] = {}
+        names_to_rows: Dict[str, int] = {}
+        for i, record in enumerate(records):
+            names = [record.get(c, "") for c in self.name_columns]
+            if self.alias_column:
+                names += (record.get(self.alias_column) or "").split("|")
+            for value in names:
+                normalized = normalize_name(value)
+                # First row wins on collisions, so put the preferred entry first in the CSV
+                if normalized:
+                    keys.setdefault(name_hash(normalized), i)
+                    names_to_rows.setdefault(normalized, i)
+        arrays = [rows, np.array(sorted(keys.items()), dtype=KEY_DTYPE)]
+        if self.prefix_index:
+            arrays.append(np.array(sorted(names_to_rows.items()), dtype=NAME_DTYPE))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path, array in zip(self._paths(), arrays):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as out:
+                np.save(out, array)
+            os.replace(tmp, path)
+
+    # ── Access ──────────────────────────────────────────────────
+    def _load(self):
+        with self._lock:
+            if self._rows is None:
+                if self._stale():
+                    self.build()
+                paths = self._paths()
+                if self.prefix_index:
+                    self._names = np.load(paths[2], mmap_mode="r")
+                self._keys = np.load(paths[1], mmap_mode="r")
+                self._rows = np.load(paths[0], mmap_mode="r")
+
+    @property
+    def rows(self) -> np.ndarray:
+        if self._rows is None:
+            self._load()
+        return self._rows
+
+    @property
+    def keys(self) -> np.ndarray:
+        if self._keys is None:
+            self._load()
+        return self._keys
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def find(self, name: str) -> Optional[int]:
+        """Row index for an exact (normalised) name or alias, else None."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        keys = self.keys
+        target = np.uint64(name_hash(normalized))
+        i = int(np.searchsorted(keys["hash"], target))
+        if i < len(keys) and keys["hash"][i] == target:
+            return int(keys["row"][i])
+        return None
+
+    def complete(self, prefix: str, limit: Optional[int] = None) -> List[int]:
+        """Distinct rows whose normalised name or alias starts with `prefix`, in name order."""
+        if not self.prefix_index:
+            raise ValueError(f"Table '{self.name}' was built without a prefix index")
+        normalized = normalize_name(prefix)
+        if not normalized:
+            return []
+        if self._names is None:
+            self._load()
+        names = self._names["name"]
+        # Every name with the prefix sorts between the prefix and prefix + U+FFFF
+        lo = int(np.searchsorted(names, normalized, side="left"))
+        hi = int(np.searchsorted(names, normalized + "\uffff", side="left"))
+        rows: List[int] = []
+        seen = set()
+        for row in self._names["row"][lo:hi].tolist():
+            if row not in seen:
+                seen.add(row)
+                rows.append(row)
+                if limit is not None and len(rows) >= limit:
+                    break
+        return rows
+
+    def record(self, index: int) -> dict:
+        """One row as a plain dict of Python values."""
+        row = self.rows[index]
+        return {name: row[name].item() for name in self.dtype.names}
+
+    def column(self, name: str) -> np.ndarray:
+        return self.rows[name]
+
+    def normalized_names(self, column: str) -> List[str]:
+        """Normalised values of a column (used by fuzzy matching; computed per call)."""
+        return [normalize_name(v) for v in self.rows[column].tolist()]
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats.astype(np.float64)), np.radians(lons.astype(np.float64))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0088 * 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rebuild packed lookup tables from data/*.csv.")
+    parser.add_argument("tables", nargs="*", help="Table names (default: all registered)")
+    args = parser.parse_args()
+
+    from utils.city_costs import city_cost_table
+    from utils.gazetteer import gazetteer_table
+
+    registry = {"city_costs": city_cost_table, "gazetteer": gazetteer_table}
+    for table_name in args.tables or registry:
+        table = registry[table_name]
+        table.build()
+        print(f"{table_name}: {len(table)} rows, {len(table.keys)} keys -> {table._paths()[0]}")
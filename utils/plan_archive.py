@@ -0,0 +1,376 @@
+"""Plan archive — background, deduplicated persistence of generated travel plans.
+
+Plans are handed to a writer thread and never written on the request path.
+Each plan is appended, gzip-compressed, to a monthly segment file and indexed
+in SQLite (question, destination, duration, provider, timestamp, size,
+location in the segment). Identical plans are stored once, keyed by their
+SHA-256. An FTS5 index over question, destination and plan text backs search
+and the "similar trip" reuse path:
+
+    PLAN_ARCHIVE_DIR=state/plans
+    PLAN_REUSE_ENABLED=false        # default for /query's reuse fast path
+    PLAN_REUSE_THRESHOLD=0.8        # minimum question similarity (0–1)
+"""
+
+import atexit
+import datetime
+import gzip
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from logger.logging import get_logger
+
+PLAN_ARCHIVE_DIR = os.getenv("PLAN_ARCHIVE_DIR", "state/plans")
+PLAN_ARCHIVE_QUEUE_SIZE = int(os.getenv("PLAN_ARCHIVE_QUEUE_SIZE", "1000"))
+PLAN_REUSE_ENABLED = os.getenv("PLAN_REUSE_ENABLED", "false").lower() in ("1", "true", "yes")
+PLAN_REUSE_THRESHOLD = float(os.getenv("PLAN_REUSE_THRESHOLD", "0.8"))
+
+logger = get_logger("ai_trip_planner.plan_archive")
+
+_DESTINATION = re.compile(
+    r"\b(?:to|in|visit(?:ing)?|around|explore|for)\s+"
+    r"((?:[A-Z][\w'\-]+)(?:[ ,]+(?:[A-Z][\w'\-]+))*)"
+)
+_DURATION = re.compile(r"\b(\d{1,2}|a|one|two|three|four|five|six|seven|ten)[\s\-]*(day|night|week)s?\b", re.I)
+_NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "ten": 10}
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_STOPWORDS = {
+    "a", "an", "and", "the", "to", "in", "of", "for", "on", "at", "with", "me", "my", "i",
+    "we", "our", "us", "please", "plan", "trip", "travel", "itinerary", "want", "would",
+    "like", "can", "you", "give", "make", "create", "help", "is", "it", "be", "some",
+}
+
+
+def extract_destination(question: str) -> Optional[str]:
+    """Best-effort destination from a question: the capitalised words after 'to', 'in', 'visit'..."""
+    match = _DESTINATION.search(question or "")
+    if not match:
+        return None
+    return re.sub(r"\s*,\s*", ", ", match.group(1)).strip(" ,")
+
+
+def extract_duration(question: str) -> Optional[int]:
+    """Trip length in days from phrases like '5-day', 'two weeks' or 'weekend'."""
+    match = _DURATION.search(question or "")
+    if match:
+        count = match.group(1).lower()
+        count = _NUMBER_WORDS.get(count) or int(count)
+        unit = match.group(2).lower()
+        return count * 7 if unit == "week" else count + 1 if unit == "night" else count
+    if re.search(r"\bweekend\b", question or "", re.I):
+        return 2
+    return None
+
+
+def keywords(text: str) -> set:
+    """Lower-cased content words of a question (stopwords dropped)."""
+    return {w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS}
+
+
+def question_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of two questions' keyword sets."""
+    ka, kb = keywords(a), keywords(b)
+    if not ka or not kb:
+        return 0.0
+    return len(ka & kb) / len(ka | kb)
+
+
+def _fts_query(text: str) -> Optional[str]:
+    terms = sorted(keywords(text))
+    return " OR ".join(f'"{t}"' for t in terms) or None
+
+
+class ArchivedPlan(BaseModel):
+    id: int
+    sha256: str
+    question: str
+    destination: Optional[str] = None
+    duration_days: Optional[int] = None
+    provider: Optional[str] = None
+    created_at: float
+    size: int
+
+
+class PlanMatch(BaseModel):
+    plan: ArchivedPlan
+    score: float
+
+
+class _PendingPlan(BaseModel):
+    text: str
+    question: str
+    provider: Optional[str] = None
+    created_at: float
+
+
+class PlanArchive:
+    """Append-only segment files plus a SQLite index, fed by a writer thread."""
+
+    def __init__(self, directory: str = PLAN_ARCHIVE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, sha256 TEXT NOT NULL UNIQUE,"
+            " question TEXT, destination TEXT, provider TEXT, created_at REAL,"
+            " size INTEGER, segment TEXT, offset INTEGER, length INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(plans)")}
+        if "duration_days" not in columns:
+            self._conn.execute("ALTER TABLE plans ADD COLUMN duration_days INTEGER")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS plans_destination ON plans (destination COLLATE NOCASE)"
+        )
+        fts_exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'plans_fts'"
+        ).fetchone()
+        # Contentless: the text already lives in the segments, the index only needs terms
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS plans_fts USING fts5("
+            " question, destination, plan, content='', tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        self._conn.commit()
+        if not fts_exists:
+            self._backfill()
+        self._queue: "queue.Queue[Optional[_PendingPlan]]" = queue.Queue(maxsize=PLAN_ARCHIVE_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._drain, name="plan-archive", daemon=True)
+        self._thread.start()
+
+    # ── Writing ─────────────────────────────────────────────────
+    def submit(self, text: str, question: str = "", provider: Optional[str] = None) -> bool:
+        """Queue a plan for archiving. Never blocks; returns False if the queue is full."""
+        if not text:
+            return False
+        try:
+            self._queue.put_nowait(_PendingPlan(
+                text=text, question=question, provider=provider, created_at=time.time()
+            ))
+            return True
+        except queue.Full:
+            logger.warning("plan archive queue full, dropping plan")
+            return False
+
+    def flush(self, timeout: float = 10.0):
+        """Block until every plan submitted so far is on disk."""
+        done = threading.Event()
+        self._queue.put(_FlushMarker(done))
+        done.wait(timeout)
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            # Group whatever else is already waiting into one write + one commit
+            while len(batch) < 64:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            plans = [p for p in batch if isinstance(p, _PendingPlan)]
+            if plans:
+                try:
+                    self._write(plans)
+                except Exception:
+                    logger.exception("failed to archive %d plan(s)", len(plans))
+            for item in batch:
+                if isinstance(item, _FlushMarker):
+                    item.done.set()
+            if any(item is None for item in batch):
+                return
+
+    def _write(self, plans: List[_PendingPlan]):
+        rows, seen = [], set()
+        with self._lock:
+            for plan in plans:
+                digest = hashlib.sha256(plan.text.strip().encode("utf-8")).hexdigest()
+                if digest in seen or self._conn.execute(
+                    "SELECT 1 FROM plans WHERE sha256 = ?", (digest,)
+                ).fetchone():
+                    continue
+                seen.add(digest)
+                rows.append((digest, plan))
+        if not rows:
+            return
+
+        segment = "plans-" + datetime.date.today().strftime("%Y-%m") + ".seg"
+        entries = []
+        # Data first, index second: a crash in between leaves unreferenced bytes, never a dangling row
+        with open(os.path.join(self.directory, segment), "ab") as f:
+            for digest, plan in rows:
+                blob = gzip.compress(plan.text.encode("utf-8"))
+                offset = f.tell()
+                f.write(blob)
+                entries.append((plan, (
+                    digest, plan.question, extract_destination(plan.question),
+                    extract_duration(plan.question), plan.provider, plan.created_at,
+                    len(plan.text), segment, offset, len(blob),
+                )))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock:
+            for plan, row in entries:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO plans (sha256, question, destination, duration_days,"
+                    " provider, created_at, size, segment, offset, length)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                if cursor.rowcount:
+                    self._index_text(cursor.lastrowid, plan.question, row[2], plan.text)
+            self._conn.commit()
+
+    def _index_text(self, plan_id: int, question: str, destination: Optional[str], text: str):
+        self._conn.execute(
+            "INSERT INTO plans_fts (rowid, question, destination, plan) VALUES (?, ?, ?, ?)",
+            (plan_id, question or "", destination or "", text),
+        )
+
+    def _backfill(self):
+        """Index plans archived before the FTS table existed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, question, destination, segment, offset, length FROM plans"
+            ).fetchall()
+            for plan_id, question, destination, segment, offset, length in rows:
+                try:
+                    text = self._read_text(segment, offset, length)
+                except OSError:
+                    continue
+                self._index_text(plan_id, question, destination, text)
+                if self._conn.execute(
+                    "SELECT duration_days FROM plans WHERE id = ?", (plan_id,)
+                ).fetchone()[0] is None:
+                    self._conn.execute(
+                        "UPDATE plans SET duration_days = ? WHERE id = ?",
+                        (extract_duration(question), plan_id),
+                    )
+            self._conn.commit()
+
+    def _read_text(self, segment: str, offset: int, length: int) -> str:
+        with open(os.path.join(self.directory, segment), "rb") as f:
+            f.seek(offset)
+            return gzip.decompress(f.read(length)).decode("utf-8")
+
+    # ── Reading ─────────────────────────────────────────────────
+    def list(self, limit: int = 20, before_id: Optional[int] = None) -> List[ArchivedPlan]:
+        """Newest plans first; pass the last id of a page as `before_id` for the next one."""
+        sql = f"SELECT {_PLAN_COLUMNS} FROM plans"
+        params: tuple = ()
+        if before_id is not None:
+            sql += " WHERE id < ?"
+            params = (before_id,)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, params + (limit,)).fetchall()
+        return [_to_plan(row) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
+
+    def get(self, plan_id: int) -> Optional[dict]:
+        """Metadata plus the plan text for one archived plan."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_PLAN_COLUMNS}, segment, offset, length FROM plans WHERE id = ?",
+                (plan_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        n = len(ArchivedPlan.model_fields)
+        return {**_to_plan(row[:n]).model_dump(), "plan": self._read_text(*row[n:])}
+
+    def search(self, query: str, limit: int = 10, destination: Optional[str] = None,
+               duration_days: Optional[int] = None) -> List[PlanMatch]:
+        """Full-text search, best first. Scores are BM25 (higher is better, unbounded)."""
+        match = _fts_query(query)
+        if match is None:
+            return []
+        sql = (
+            f"SELECT {', '.join('plans.' + c for c in ArchivedPlan.model_fields)},"
+            " -bm25(plans_fts, 2.0, 4.0, 1.0) AS score"
+            " FROM plans_fts JOIN plans ON plans.id = plans_fts.rowid"
+            " WHERE plans_fts MATCH ?"
+        )
+        params: list = [match]
+        if destination:
+            sql += " AND plans.destination = ? COLLATE NOCASE"
+            params.append(destination)
+        if duration_days:
+            sql += " AND plans.duration_days = ?"
+            params.append(duration_days)
+        sql += " ORDER BY score DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [PlanMatch(plan=_to_plan(row[:-1]), score=round(row[-1], 4)) for row in rows]
+
+    def find_similar(self, question: str, threshold: float = PLAN_REUSE_THRESHOLD) -> Optional[PlanMatch]:
+        """
+        Best archived plan for a near-identical question, or None.
+
+        Candidates must share the destination (and the trip length, when the
+        question states one); among them, the question with the highest keyword
+        Jaccard similarity wins if it reaches `threshold`.
+        """
+        destination = extract_destination(question)
+        if not destination:
+            return None
+        duration = extract_duration(question)
+        sql = f"SELECT {_PLAN_COLUMNS} FROM plans WHERE destination = ? COLLATE NOCASE"
+        params: list = [destination]
+        if duration:
+            sql += " AND duration_days = ?"
+            params.append(duration)
+        sql += " ORDER BY id DESC LIMIT 200"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        best = None
+        for row in rows:
+            plan = _to_plan(row)
+            score = question_similarity(question, plan.question)
+            if best is None or score > best.score:
+                best = PlanMatch(plan=plan, score=round(score, 4))
+        return best if best is not None and best.score >= threshold else None
+
+
+_PLAN_COLUMNS = ", ".join(ArchivedPlan.model_fields)
+
+
+def _to_plan(row) -> ArchivedPlan:
+    return ArchivedPlan(**dict(zip(ArchivedPlan.model_fields, row)))
+
+
+class _FlushMarker:
+    def __init__(self, done: threading.Event):
+        self.done = done
+
+
+_archive: Optional[PlanArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_plan_archive() -> PlanArchive:
+    """Return the process-wide archive, starting its writer thread on first use."""
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = PlanArchive()
+            atexit.register(_archive.close)
+        return _archive
@@ -0,0 +1,125 @@
+"""On-demand profiling — capture cProfile and tracemalloc data for a single request.
+
+Profiling is opt-in per request and guarded by the admin token
+(`config.settings.is_admin`, unset ADMIN_TOKEN = profiling disabled).
+Captures are written to PROFILE_DIR (default `profiles`).
+
+Requests that don't ask for a profile only pay for one header check.
+"""
+
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import re
+import threading
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+TOP_ALLOCATIONS = 30
+TOP_FUNCTIONS = 40
+
+_PROFILE_NAME = re.compile(r"^[A-Za-z0-9_\-]+\.(pstats|alloc\.txt|txt)$")
+# cProfile and tracemalloc are process-wide resources — one capture at a time
+_capture_lock = threading.Lock()
+
+
+def profile_path(name: str) -> Optional[str]:
+    """Resolve a stored profile file name, rejecting anything outside PROFILE_DIR."""
+    if not _PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+class ProfileCapture:
+    """Result of a capture — file names are filled in once the capture ends."""
+
+    def __init__(self, label: str):
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.id = f"{stamp}-{label}-{uuid.uuid4().hex[:8]}"
+        self.captured = False
+        self.files = {}
+        self.peak_bytes = 0
+
+    def links(self, prefix: str = "/profiles") -> dict:
+        if not self.captured:
+            return {"id": self.id, "status": "skipped (another profile is being captured)"}
+        return {
+            "id": self.id,
+            "peak_memory_bytes": self.peak_bytes,
+            **{kind: f"{prefix}/{name}" for kind, name in self.files.items()},
+        }
+
+
+@contextmanager
+def capture_profile(label: str = "query"):
+    """
+    Run the enclosed block under cProfile and tracemalloc and write a report.
+
+    Writes `<id>.pstats` (load with `python -m pstats` or snakeviz),
+    `<id>.txt` (top functions by cumulative time) and `<id>.alloc.txt`
+    (top allocation sites). cProfile sees only the calling thread; tool calls
+    that LangGraph runs on worker threads show up as time spent waiting.
+    """
+    capture = ProfileCapture(label)
+    if not _capture_lock.acquire(blocking=False):
+        yield capture
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    profiler = cProfile.Profile()
+    try:
+        if started_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.take_snapshot()
+        profiler.enable()
+        try:
+            yield capture
+        finally:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, capture.peak_bytes = tracemalloc.get_traced_memory()
+            _write_reports(capture, profiler, baseline, snapshot)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _capture_lock.release()
+
+
+def _write_reports(capture: ProfileCapture, profiler: cProfile.Profile, baseline, snapshot):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    base = os.path.join(PROFILE_DIR, capture.id)
+
+    profiler.dump_stats(f"{base}.pstats")
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+    with open(f"{base}.txt", "w", encoding="utf-8") as f:
+        f.write(text.getvalue())
+
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    diff = snapshot.filter_traces(filters).compare_to(baseline.filter_traces(filters), "lineno")
+    lines = [
+        f"Peak traced memory during request: {capture.peak_bytes / 1024:,.1f} KiB",
+        f"Top {TOP_ALLOCATIONS} allocation sites (growth since request start):",
+        "",
+    ]
+    for stat in diff[:TOP_ALLOCATIONS]:
+        lines.append(str(stat))
+    with open(f"{base}.alloc.txt", "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    capture.files = {
+        "pstats": f"{capture.id}.pstats",
+        "summary": f"{capture.id}.txt",
+        "allocations": f"{capture.id}.alloc.txt",
+    }
+    capture.captured = True
@@ -0,0 +1,74 @@
+"""Bounded, resizable worker pool for agent graph runs.
+
+Graph runs are synchronous and long (several LLM turns and tool calls). They run
+on this pool instead of the event loop or a thread per request, so at most
+`max_concurrent_runs` execute at once and the rest wait in order. Resizing swaps
+in a new executor: queued and running work finishes on the old one.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from config.settings import Settings, get_settings, on_reload
+
+
+class RunPool:
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="agent-run")
+        self._active = 0
+        self._queued = 0
+
+    def submit(self, fn, *args) -> Future:
+        """Run `fn(*args)` on the pool with the caller's context (request id, current span)."""
+        context = contextvars.copy_context()
+
+        def run():
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+            try:
+                return context.run(fn, *args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        with self._lock:
+            self._queued += 1
+            return self._executor.submit(run)
+
+    def resize(self, size: int):
+        with self._lock:
+            if size == self._size:
+                return
+            old, self._executor = self._executor, ThreadPoolExecutor(max_workers=size, thread_name_prefix="agent-run")
+            self._size = size
+        old.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": self._size, "active": self._active, "queued": self._queued}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_run_pool() -> RunPool:
+    """The process-wide pool, sized by the `max_concurrent_runs` setting."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = RunPool(get_settings().max_concurrent_runs)
+    return _pool
+
+
+def _apply_settings(old: Settings, new: Settings):
+    if _pool is not None:
+        _pool.resize(new.max_concurrent_runs)
+
+
+on_reload(_apply_settings)
@@ -0,0 +1,161 @@
+"""Run registry — tracks agent runs by idempotency key so crashed runs can resume.
+
+Each keyed run is checkpointed step by step (see utils.checkpointer). The
+registry records which thread a key maps to and whether the run finished, so a
+retried request either gets the stored answer or resumes from the last
+completed step instead of starting over.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+# SQLite file holding the run table
+RUN_REGISTRY_DB_PATH = os.getenv("RUN_REGISTRY_DB", "state/runs.sqlite")
+# A "running" run owned by another host is considered dead after this long
+STALE_RUN_SECONDS = int(os.getenv("STALE_RUN_SECONDS", "900"))
+
+RUNNING = "running"
+INTERRUPTED = "interrupted"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class RunRecord(BaseModel):
+    idempotency_key: str
+    thread_id: str
+    status: str
+    question: str = ""
+    answer: Optional[str] = None
+    owner: str = ""
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+
+def _owner_alive(owner: str, updated_at: float) -> bool:
+    """Best-effort check whether the process that owns a run is still around."""
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname():
+        return time.time() - updated_at < STALE_RUN_SECONDS
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RunRegistry:
+    """SQLite-backed table of keyed runs and their status."""
+
+    def __init__(self, path: str = RUN_REGISTRY_DB_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " idempotency_key TEXT PRIMARY KEY, thread_id TEXT NOT NULL,"
+            " status TEXT NOT NULL, question TEXT, answer TEXT, owner TEXT,"
+            " created_at REAL, updated_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS runs_status ON runs (status)")
+        self._conn.commit()
+
+    def get(self, idempotency_key: str) -> Optional[RunRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT idempotency_key, thread_id, status, question, answer, owner,"
+                " created_at, updated_at FROM runs WHERE idempotency_key = ?",
+                (idempotency_key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return RunRecord(
+            idempotency_key=row[0], thread_id=row[1], status=row[2], question=row[3] or "",
+            answer=row[4], owner=row[5] or "", created_at=row[6] or 0.0, updated_at=row[7] or 0.0,
+        )
+
+    def claim(self, idempotency_key: str, thread_id: str, question: str,
+              stale: Optional[RunRecord] = None) -> Optional[RunRecord]:
+        """
+        Insert a new run, or take over an unfinished one, in a single statement.
+
+        A run that is running or completed is left alone, unless it's `stale`: a
+        "running" record the caller found with a dead owner, claimed only if it
+        hasn't changed since. Returns the claimed record, or None when another
+        request got there first.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (idempotency_key, thread_id, status, question, owner, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(idempotency_key) DO UPDATE SET status = excluded.status,"
+                " owner = excluded.owner, updated_at = excluded.updated_at"
+                " WHERE runs.status NOT IN (?, ?) OR (runs.owner = ? AND runs.updated_at = ?)",
+                (idempotency_key, thread_id, RUNNING, question, _OWNER, now, now, RUNNING, COMPLETED,
+                 stale.owner if stale else None, stale.updated_at if stale else None),
+            )
+            self._conn.commit()
+            claimed = cursor.rowcount > 0
+        return self.get(idempotency_key) if claimed else None
+
+    def finish(self, idempotency_key: str, status: str, answer: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, answer = ?, updated_at = ? WHERE idempotency_key = ?",
+                (status, answer, time.time(), idempotency_key),
+            )
+            self._conn.commit()
+
+    def is_active_elsewhere(self, record: RunRecord) -> bool:
+        """True if another live process (or this one) is still executing the run."""
+        return record.status == RUNNING and _owner_alive(record.owner, record.updated_at)
+
+    def recover_unfinished(self) -> List[RunRecord]:
+        """
+        Mark runs left "running" by dead processes as interrupted.
+
+        Called on startup; the returned runs resume from their last checkpoint
+        when the client retries with the same idempotency key.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idempotency_key, owner, updated_at FROM runs WHERE status = ?", (RUNNING,)
+            ).fetchall()
+        recovered = []
+        for key, owner, updated_at in rows:
+            if owner == _OWNER or not _owner_alive(owner or "", updated_at or 0.0):
+                with self._lock:
+                    self._conn.execute(
+                        "UPDATE runs SET status = ?, updated_at = ? WHERE idempotency_key = ? AND status = ?",
+                        (INTERRUPTED, time.time(), key, RUNNING),
+                    )
+                    self._conn.commit()
+                recovered.append(self.get(key))
+        return recovered
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_run_registry() -> RunRegistry:
+    """Return the process-wide run registry, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = RunRegistry()
+    return _registry
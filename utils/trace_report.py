@@ -0,0 +1,148 @@
+"""Trace report CLI — per-request waterfall and critical-path summary from a JSONL trace file.
+
+Usage:
+    python -m utils.trace_report logs/traces.jsonl
+    python -m utils.trace_report logs/traces.jsonl --trace <trace_id>
+    python -m utils.trace_report logs/traces.jsonl --slowest 5 --width 60
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from typing import Dict, List
+
+
+def load_traces(path: str) -> Dict[str, List[dict]]:
+    """Group span records by trace id."""
+    traces = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                span = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            traces[span["trace_id"]].append(span)
+    return traces
+
+
+def _children(spans: List[dict]) -> Dict[str, List[dict]]:
+    ids = {s["span_id"] for s in spans}
+    children = defaultdict(list)
+    for span in spans:
+        parent = span["parent_id"] if span["parent_id"] in ids else None
+        children[parent].append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start"])
+    return children
+
+
+def critical_path(spans: List[dict]) -> List[dict]:
+    """
+    Follow, from the root, the child that finishes last at every level.
+
+    That chain is what bounded the request's end time; speeding up anything
+    off the path would not have made the response faster.
+    """
+    children = _children(spans)
+    roots = children.get(None, [])
+    if not roots:
+        return []
+    node = max(roots, key=lambda s: s["end"] - s["start"])
+    path = [node]
+    while children.get(node["span_id"]):
+        node = max(children[node["span_id"]], key=lambda s: s["end"])
+        path.append(node)
+    return path
+
+
+def render_waterfall(spans: List[dict], width: int = 50) -> str:
+    children = _children(spans)
+    roots = children.get(None, [])
+    if not roots:
+        return "(empty trace)"
+    t0 = min(s["start"] for s in spans)
+    total = max(s["end"] for s in spans) - t0 or 1e-9
+    lines = []
+
+    def walk(span, depth):
+        offset = int((span["start"] - t0) / total * width)
+        length = max(1, int((span["end"] - span["start"]) / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        attrs = span.get("attributes", {})
+        detail = ", ".join(
+            f"{k}={v}" for k, v in attrs.items()
+            if k in ("city", "arg.city", "arg.category", "cache", "prompt_tokens", "completion_tokens", "http.status")
+        )
+        label = ("  " * depth + span["name"])[:40]
+        flag = " !" if span.get("status") == "error" else ""
+        lines.append(f"{label:<40} {span['duration_ms']:>10.1f} ms |{bar:<{width}}|{flag} {detail}")
+        for child in children.get(span["span_id"], []):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def render_critical_path(spans: List[dict]) -> str:
+    path = critical_path(spans)
+    if not path:
+        return ""
+    lines = ["Critical path:"]
+    for i, span in enumerate(path):
+        nxt = path[i + 1] if i + 1 < len(path) else None
+        self_ms = span["duration_ms"] - (nxt["duration_ms"] if nxt else 0.0)
+        lines.append(f"  {span['name']:<38} {span['duration_ms']:>10.1f} ms  (self {max(self_ms, 0):.1f} ms)")
+    return "\n".join(lines)
+
+
+def summarize(spans: List[dict]) -> str:
+    """Total time per span name across the trace (excluding the root)."""
+    totals = defaultdict(lambda: [0, 0.0])
+    for span in spans:
+        if span["parent_id"]:
+            totals[span["name"]][0] += 1
+            totals[span["name"]][1] += span["duration_ms"]
+    lines = ["Time by operation:"]
+    for name, (count, ms) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+        lines.append(f"  {name:<38} {count:>4}× {ms:>10.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render waterfalls and critical paths from a trace file.")
+    parser.add_argument("path", help="JSONL trace file (see utils/tracing.py)")
+    parser.add_argument("--trace", help="Only show this trace id")
+    parser.add_argument("--slowest", type=int, default=3, help="Show the N slowest traces (default 3)")
+    parser.add_argument("--width", type=int, default=50, help="Waterfall width in characters")
+    args = parser.parse_args(argv)
+
+    traces = load_traces(args.path)
+    if args.trace:
+        selected = [(args.trace, traces.get(args.trace, []))]
+    else:
+        by_duration = sorted(
+            traces.items(),
+            key=lambda kv: max(s["end"] for s in kv[1]) - min(s["start"] for s in kv[1]),
+            reverse=True,
+        )
+        selected = by_duration[: args.slowest]
+
+    for trace_id, spans in selected:
+        if not spans:
+            print(f"Trace {trace_id} not found.")
+            continue
+        print(f"═══ Trace {trace_id} ({len(spans)} spans)")
+        print(render_waterfall(spans, args.width))
+        print()
+        print(render_critical_path(spans))
+        print()
+        print(summarize(spans))
+        print()
+
+
+if __name__ == "__main__":
+    main()
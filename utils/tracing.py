@@ -0,0 +1,347 @@
+"""Lightweight span tracing for requests, graph nodes, tools and outbound HTTP.
+
+Spans carry trace/parent ids, timings and attributes, and are exported to a
+local JSONL file (default) or to an OTLP/HTTP collector:
+
+    TRACE_EXPORTER=jsonl|otlp|none
+    TRACE_FILE=logs/traces.jsonl
+    TRACE_MAX_MB=50          # the JSONL file rotates at this size...
+    TRACE_BACKUPS=3          # ...keeping this many old files (traces.jsonl.1, .2, ...)
+    OTEL_EXPORTER_OTLP_ENDPOINT=http://localhost:4318
+
+Turn a trace file into waterfalls with `python -m utils.trace_report`.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import requests
+from langchain_core.callbacks import BaseCallbackHandler
+
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+TRACE_MAX_BYTES = int(float(os.getenv("TRACE_MAX_MB", "50")) * 1024 * 1024)
+TRACE_BACKUPS = int(os.getenv("TRACE_BACKUPS", "3"))
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ai-trip-planner")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation. Call `end()` (or use `tracer.span(...)`) to export it."""
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start", "end_time",
+                 "attributes", "status", "_tracer")
+
+    def __init__(self, tracer, name: str, kind: str, parent: Optional["Span"],
+                 attributes: Optional[Dict[str, Any]] = None):
+        self._tracer = tracer
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.start = time.time()
+        self.end_time = None
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error"] = f"{type(error).__name__}: {error}"[:300]
+
+    def end(self):
+        if self.end_time is None:
+            self.end_time = time.time()
+            self._tracer.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end_time,
+            "duration_ms": round((self.end_time - self.start) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class JsonlExporter:
+    """Appends finished spans to a size-capped, rotated JSONL file from a background thread."""
+
+    def __init__(self, path: str, max_bytes: int = TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._drain, name="trace-jsonl", daemon=True).start()
+
+    def export(self, span: Span):
+        self._queue.put(span.to_dict())
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, default=str) + "\n" for record in batch))
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        """traces.jsonl → .1 → .2 ...; the oldest backup is dropped."""
+        try:
+            for i in range(self.backups - 1, 0, -1):
+                if os.path.exists(f"{self.path}.{i}"):
+                    os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+            if self.backups:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        except OSError:
+            pass  # tracing must never take the app down; retried after the next batch
+
+
+class OtlpHttpExporter:
+    """Sends spans to an OTLP/HTTP collector (`/v1/traces`, JSON encoding) in batches."""
+
+    _KINDS = {"server": 2, "client": 3}
+
+    def __init__(self, endpoint: str, flush_interval: float = 2.0, max_batch: int = 256):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._drain, name="trace-otlp", daemon=True).start()
+
+    def export(self, span: Span):
+        self._queue.put(span)
+
+    def _drain(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                requests.post(self.url, json=self._encode(batch), timeout=5)
+            except requests.RequestException:
+                pass  # tracing must never break the app
+
+    def _encode(self, spans) -> dict:
+        def attr(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        encoded = []
+        for span in spans:
+            item = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": self._KINDS.get(span.kind, 1),
+                "startTimeUnixNano": str(int(span.start * 1e9)),
+                "endTimeUnixNano": str(int(span.end_time * 1e9)),
+                "attributes": [attr(k, v) for k, v in span.attributes.items()],
+                "status": {"code": 2 if span.status == "error" else 1},
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            encoded.append(item)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attr("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "ai_trip_planner"}, "spans": encoded}],
+        }]}
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the configured exporter."""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, kind: str = "internal", parent: Optional[Span] = None,
+                   **attributes) -> Span:
+        return Span(self, name, kind, parent or _current_span.get(), attributes)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes):
+        """Open a span, make it the current one for nested spans, and end it on exit."""
+        current = self.start_span(name, kind, parent, **attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end()
+
+    def export(self, span: Span):
+        if self.exporter is not None:
+            self.exporter.export(span)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _build_exporter():
+    if TRACE_EXPORTER == "otlp" and OTLP_ENDPOINT:
+        return OtlpHttpExporter(OTLP_ENDPOINT)
+    if TRACE_EXPORTER == "jsonl":
+        return JsonlExporter(TRACE_FILE)
+    return None
+
+
+tracer = Tracer(_build_exporter())
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback that opens spans for graph nodes, tools and LLM calls.
+
+    Parent/child links follow LangChain's run tree; the root graph run becomes
+    a child of `parent` (usually the API request span). While a tool runs its
+    span is the current span, so outbound HTTP spans nest under it.
+    """
+
+    def __init__(self, parent: Optional[Span] = None):
+        self.parent = parent
+        self._spans: Dict[UUID, Span] = {}
+        # Intermediate runnables (routers, RunnableSequences) map to their nearest span
+        self._aliases: Dict[UUID, Span] = {}
+        self._previous: Dict[UUID, Optional[Span]] = {}
+
+    def _lookup(self, run_id: Optional[UUID]) -> Optional[Span]:
+        if run_id is None:
+            return None
+        return self._spans.get(run_id) or self._aliases.get(run_id)
+
+    def _open(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str,
+              attributes: Optional[dict] = None) -> Span:
+        parent = self._lookup(parent_run_id) or self.parent
+        span = tracer.start_span(name, kind, parent, **(attributes or {}))
+        self._spans[run_id] = span
+        return span
+
+    def _close(self, run_id: UUID, error: Optional[BaseException] = None):
+        self._aliases.pop(run_id, None)
+        span = self._spans.pop(run_id, None)
+        if span is not None:
+            if error is not None:
+                span.set_error(error)
+            span.end()
+
+    # ── Graph and nodes ─────────────────────────────────────────
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None,
+                       metadata: Optional[Dict[str, Any]] = None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if parent_run_id is None:
+            self._open(run_id, None, "graph", "internal")
+        elif node and kwargs.get("name") == node:
+            self._open(run_id, parent_run_id, f"node {node}", "internal",
+                       {"node": node, "step": (metadata or {}).get("langgraph_step")})
+        else:
+            parent = self._lookup(parent_run_id)
+            if parent is not None:
+                self._aliases[run_id] = parent
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._close(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
+
+    # ── Tools ───────────────────────────────────────────────────
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None,
+                      inputs: Optional[dict] = None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        attributes = {"tool": name}
+        for key, value in (inputs or {}).items():
+            if isinstance(value, (str, int, float, bool)):
+                attributes[f"arg.{key}"] = value if not isinstance(value, str) else value[:120]
+        span = self._open(run_id, parent_run_id, f"tool {name}", "internal", attributes)
+        self._previous[run_id] = _current_span.get()
+        _current_span.set(span)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, "content", output)
+        span = self._spans.get(run_id)
+        if span is not None and isinstance(content, str):
+            span.set_attribute("output_chars", len(content))
+        self._close(run_id)
+        _current_span.set(self._previous.pop(run_id, None))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)
+        _current_span.set(self._previous.pop(run_id, None))
+
+    # ── LLM calls ───────────────────────────────────────────────
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None,
+                            metadata: Optional[Dict[str, Any]] = None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "unknown"
+        input_messages = sum(len(batch) for batch in messages)
+        self._open(run_id, parent_run_id, f"llm {model}", "client",
+                   {"model": model, "input_messages": input_messages})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        from utils.metrics import token_usage
+
+        span = self._spans.get(run_id)
+        if span is not None:
+            prompt_tokens, completion_tokens = token_usage(response)
+            span.set_attribute("prompt_tokens", prompt_tokens)
+            span.set_attribute("completion_tokens", completion_tokens)
+            tool_calls = [
+                call["name"]
+                for generations in response.generations or []
+                for generation in generations
+                for call in getattr(getattr(generation, "message", None), "tool_calls", None) or []
+            ]
+            if tool_calls:
+                span.set_attribute("tool_calls", ",".join(tool_calls))
+        self._close(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._close(run_id, error)